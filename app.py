@@ -11,6 +11,13 @@ def main():
     
     app = MainApplication(root)
     app.pack(fill="both", expand=True)
+
+    def on_close():
+        # Finish background writes and fold the journal into the data file before exiting
+        app.close()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
     
     root.mainloop()
 
@@ -0,0 +1,249 @@
+"""Time DataManager operations on synthetic data, without starting Tk
+
+    python -m benchmarks.run                           # 1k, 10k and 100k rows
+    python -m benchmarks.run --sizes 1000000 --output big.json
+    python -m benchmarks.run --update-baseline         # store results as the new baseline
+
+Every size is timed on a CSV file, then with the same entries copied into
+SQLite and monthly partitions (operations prefixed sqlite. and partitioned.).
+Results are written as JSON (benchmarks/results.json by default) and
+compared with benchmarks/baseline.json; the exit status is 1 when an
+operation got slower than the tolerance allows. Refresh the baseline in any
+change that affects performance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks import synthetic
+from data_manager import DataManager
+from storage import migrate_csv_to_partitions, migrate_csv_to_sqlite
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, 'results.json')
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Storage backends timed besides the CSV file, and how each is filled from it
+BACKENDS = {'sqlite': migrate_csv_to_sqlite, 'partitioned': migrate_csv_to_partitions}
+# One month of the synthetic data, for date range queries
+QUERY_MONTH = {'start': '2024-03-01', 'end': '2024-03-31'}
+# Slowdowns smaller than this many seconds are treated as noise
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def timed(fn, repeat=1, setup=None):
+    """Return the median wall time of fn() in seconds over repeat runs"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_size(rows, workdir, repeat):
+    """Run every benchmark against a fresh synthetic file of the given size"""
+    data_path = os.path.join(workdir, 'data.csv')
+    synthetic.write(data_path, rows)
+    import_path = os.path.join(workdir, 'import.csv')
+    # Half new rows, half copies of stored ones, as when two kiosks' files are merged
+    fresh = synthetic.generate(max(1, rows // 20), seed=1)
+    pd.concat([fresh, pd.read_csv(data_path, dtype=str, nrows=len(fresh))]).to_csv(import_path, index=False)
+
+    results = {}
+
+    def snapshot_path():
+        return data_path + '.snapshot.npz'
+
+    def drop_snapshot():
+        if os.path.exists(snapshot_path()):
+            os.remove(snapshot_path())
+
+    # The messy file is cleaned up (quarantine and rewrite) on first load
+    results['load_migrate'] = timed(lambda: DataManager(data_path).get_all_people())
+    results['load_csv'] = timed(lambda: DataManager(data_path).get_all_people(), repeat, setup=drop_snapshot)
+    results['load_snapshot'] = timed(lambda: DataManager(data_path).get_all_people(), repeat)
+
+    dm = DataManager(data_path)
+    people = dm.get_all_people()
+    regular = people[0]
+    busiest = max(people[:50], key=lambda name: len(dm.get_person_info(name)))
+
+    results['get_all_people'] = timed(dm.get_all_people, repeat)
+    results['search_people_prefix'] = timed(lambda: dm.search_people(regular[:2], 'prefix'), repeat)
+    results['search_people_token'] = timed(lambda: dm.search_people(regular.split()[-1][:1], 'token'), repeat)
+    results['search_people_substring'] = timed(lambda: dm.search_people('an', 'substring'), repeat)
+    results['get_person_info'] = timed(lambda: dm.get_person_info(busiest), repeat)
+    results['count_entries'] = timed(dm.count_entries, repeat)
+    results['get_entries_page'] = timed(lambda: dm.get_entries_page(rows // 2, 200), repeat)
+    results['get_entries_page_person'] = timed(lambda: dm.get_entries_page(0, 200, name=busiest), repeat)
+    # A new filter or sort order each time, so nothing comes from the view cache
+    forget_view = lambda: setattr(dm, '_view_cache', None)
+    results['get_entries_page_week'] = timed(
+        lambda: dm.get_entries_page(0, 200, start='2024-03-04', end='2024-03-10'), repeat, setup=forget_view)
+    results['get_entries_page_year_by_date'] = timed(
+        lambda: dm.get_entries_page(0, 200, sort='Timestamp', descending=True, start='2024-01-01', end='2024-12-31'),
+        repeat, setup=forget_view)
+    results['get_entries_page_by_hours'] = timed(lambda: dm.get_entries_page(0, 200, sort='Hours'), repeat)
+    results['get_entries_page_search'] = timed(lambda: dm.get_entries_page(0, 200, text='food pack'),
+                                               repeat, setup=forget_view)
+    results['get_all_entries'] = timed(dm.get_all_entries, repeat)
+    results['query_month'] = timed(lambda: dm.query(**QUERY_MONTH), repeat)
+    results['query_person_month'] = timed(lambda: dm.query(busiest, **QUERY_MONTH), repeat)
+    results['report_build'] = timed(lambda: dm.get_report('person'),
+                                    setup=lambda: setattr(dm, '_totals_stale', True))
+    results['report_person_year'] = timed(lambda: dm.get_report('person', 2024), repeat)
+    results['report_month'] = timed(lambda: dm.get_report('month'), repeat)
+    results['similar_people'] = timed(lambda: dm.similar_people(regular[:-1] + 'x'), repeat)
+    results['find_duplicate_people'] = timed(dm.find_duplicate_people, repeat)
+
+    counter = iter(range(1000000))
+    results['add_person_info'] = timed(lambda: dm.add_person_info(regular, 'Food Bank', 'Packing', '2'), repeat)
+    results['add_new_person'] = timed(lambda: dm.add_new_person(f"Benchmark Person {next(counter)}"), repeat)
+
+    victims = dm.get_person_info(busiest)[:10]
+    results['delete_entries'] = timed(lambda: dm.delete_entries(victims))
+    results['restore_entries'] = timed(lambda: dm.restore_entries(victims))
+
+    results['import_entries'] = timed(lambda: dm.import_entries(import_path))
+    results['import_entries_duplicates'] = timed(lambda: dm.import_entries(import_path))
+
+    export_path = os.path.join(workdir, 'export')
+    results['export_csv'] = timed(lambda: dm.export_entries(export_path + '.csv'), repeat)
+    results['export_jsonl'] = timed(lambda: dm.export_entries(export_path + '.jsonl'), repeat)
+    results['export_person_range'] = timed(
+        lambda: dm.export_entries(export_path + '.tsv', name=busiest, start='2024-03-01', end='2024-06-30'), repeat)
+
+    results['compact'] = timed(dm.compact)
+
+    # Every entry of the busiest person under a new spelling; after compact, since
+    # a large merge starts a background compaction that compact would wait for
+    results['merge_people'] = timed(lambda: dm.merge_people([busiest], busiest.upper()))
+    dm.close()
+    results['query_month_cold'] = timed(lambda: query_cold(data_path), repeat)
+
+    for backend, migrate in BACKENDS.items():
+        path = os.path.join(workdir, backend) + ('.db' if backend == 'sqlite' else os.sep)
+        results.update(bench_backend(backend, migrate, data_path, path, repeat))
+    return results
+
+
+def query_cold(path):
+    """Open path, query one month before anything is loaded, as the command line does, and close it"""
+    dm = DataManager(path)
+    try:
+        return dm.query(**QUERY_MONTH)
+    finally:
+        dm.close()
+
+
+def bench_backend(backend, migrate, csv_path, path, repeat):
+    """Time loading, querying and writing with the entries of csv_path copied into another backend"""
+    results = {f'{backend}.migrate': timed(lambda: migrate(csv_path, path))}
+
+    def load():
+        dm = DataManager(path)
+        dm.get_all_people()
+        dm.close()
+
+    # The first load cleans up the copied rows and folds in the journals the copy wrote
+    load()
+    results[f'{backend}.load'] = timed(load, repeat)
+    results[f'{backend}.query_month_cold'] = timed(lambda: query_cold(path), repeat)
+
+    dm = DataManager(path)
+    people = dm.get_all_people()
+    regular = people[0]
+    busiest = max(people[:50], key=lambda name: len(dm.get_person_info(name)))
+    results[f'{backend}.query_month'] = timed(lambda: dm.query(**QUERY_MONTH), repeat)
+    results[f'{backend}.add_person_info'] = timed(
+        lambda: dm.add_person_info(regular, 'Food Bank', 'Packing', '2'), repeat)
+    victims = dm.get_person_info(busiest)[:10]
+    results[f'{backend}.delete_entries'] = timed(lambda: dm.delete_entries(victims))
+    results[f'{backend}.restore_entries'] = timed(lambda: dm.restore_entries(victims))
+    # The CSV run already merged the busiest person into upper case
+    results[f'{backend}.merge_people'] = timed(lambda: dm.merge_people([busiest], busiest.swapcase()))
+    results[f'{backend}.compact'] = timed(dm.compact)
+    dm.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return (size, operation, baseline, current) for every operation that slowed down"""
+    regressions = []
+    for size, operations in results['results'].items():
+        for operation, seconds in operations.items():
+            before = baseline.get('results', {}).get(size, {}).get(operation)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > MIN_REGRESSION_SECONDS:
+                regressions.append((size, operation, before, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DataManager on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="row counts to test")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per timing; the median is kept")
+    parser.add_argument('--output', default=RESULTS_PATH, help="write results JSON here")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument('--update-baseline', action='store_true', help="save the results as the baseline")
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'results': {},
+    }
+    for rows in args.sizes:
+        workdir = tempfile.mkdtemp(prefix='zf-bench-')
+        try:
+            print(f"Benchmarking {rows} rows...")
+            results['results'][str(rows)] = bench_size(rows, workdir, args.repeat)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        for operation, seconds in results['results'][str(rows)].items():
+            print(f"  {operation:<28} {seconds * 1000:10.2f} ms")
+
+    text = json.dumps(results, indent=2)
+    with open(args.output, 'w') as f:
+        f.write(text + '\n')
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --update-baseline to store one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for size, operation, before, after in regressions:
+        print(f"REGRESSION {operation} at {size} rows: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+    if not regressions:
+        print("No regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
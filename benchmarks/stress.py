@@ -0,0 +1,154 @@
+"""Several processes writing one data file at once, as kiosks sharing a network folder do
+
+    python -m benchmarks.stress                        # 4 processes, 200 entries each
+    python -m benchmarks.stress --processes 8 --rows 500 --compact-every 100
+    python -m benchmarks.stress --partitioned          # monthly partitions in a directory
+
+Each process adds its own numbered entries through add_person_info. Some of
+them are deleted again and the journal is compacted now and then. Afterwards
+a fresh DataManager must see every kept entry exactly once, under an id
+no other entry has, and none of the deleted ones. The exit status is 1 if
+any entry was lost, duplicated or left behind.
+
+Throughput is compared with one process writing alone. Every process folds
+every other process's rows into its own cache, so on a single CPU 3 writers
+reach about 42% of one writer and 4 about 37-39%.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic
+
+
+def worker(data_path, worker_id, rows, compact_every, delete_every, barrier, results):
+    try:
+        elapsed = hammer(data_path, worker_id, rows, compact_every, delete_every, barrier)
+        results.put((worker_id, elapsed, None))
+    except Exception as e:
+        barrier.abort()
+        results.put((worker_id, None, f"{type(e).__name__}: {e}"))
+
+
+def hammer(data_path, worker_id, rows, compact_every, delete_every, barrier):
+    """Add, delete and compact as fast as possible; return the seconds taken"""
+    from data_manager import DataManager
+    dm = DataManager(data_path)
+    dm.get_all_people()
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(rows):
+        success, message = dm.add_person_info(f"Stress Worker {worker_id}", f"Kiosk {worker_id}",
+                                              str(i), '1')
+        if not success:
+            print(f"worker {worker_id}: {message}", file=sys.stderr)
+        if delete_every and i % delete_every == 0:
+            dm.add_person_info(f"Stress Worker {worker_id}", 'Scratch', str(i), '1')
+            scratch = [entry for entry in dm.get_person_info(f"Stress Worker {worker_id}")
+                       if entry['Location'] == 'Scratch']
+            dm.delete_entries(scratch)
+        if compact_every and i and i % compact_every == 0:
+            dm.compact()
+    elapsed = time.perf_counter() - start
+    dm.close()
+    return elapsed
+
+
+def run(data_path, processes, rows, compact_every, delete_every):
+    """Run the workers; return the slowest one's time in seconds and any worker errors"""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [context.Process(target=worker, args=(data_path, worker_id, rows, compact_every,
+                                                    delete_every, barrier, results))
+               for worker_id in range(processes)]
+    for process in workers:
+        process.start()
+    times = []
+    errors = []
+    for _ in workers:
+        worker_id, elapsed, error = results.get()
+        if error:
+            errors.append(f"worker {worker_id} failed: {error}")
+        else:
+            times.append(elapsed)
+    for process in workers:
+        process.join()
+    return max(times, default=0.0), errors
+
+
+def prepare(path, rows, partitioned):
+    """Write the synthetic starting data; return the path to hand to DataManager"""
+    synthetic.write(path + '.csv', rows)
+    if not partitioned:
+        return path + '.csv'
+    from storage import migrate_csv_to_partitions
+    migrate_csv_to_partitions(path + '.csv', path)
+    return path + os.sep
+
+
+def check(data_path, processes, rows):
+    """Return a list of problems with the entries the workers wrote"""
+    from data_manager import DataManager
+    dm = DataManager(data_path)
+    problems = []
+    ids = []
+    for worker_id in range(processes):
+        entries = dm.get_person_info(f"Stress Worker {worker_id}")
+        ids += [entry['Id'] for entry in entries]
+        kept = sorted(int(entry['Event']) for entry in entries if entry['Location'] != 'Scratch')
+        scratch = [entry for entry in entries if entry['Location'] == 'Scratch']
+        missing = sorted(set(range(rows)) - set(kept))
+        if missing:
+            problems.append(f"worker {worker_id}: {len(missing)} entries lost, e.g. {missing[:5]}")
+        if len(kept) != len(set(kept)):
+            problems.append(f"worker {worker_id}: {len(kept) - len(set(kept))} entries stored twice")
+        if scratch:
+            problems.append(f"worker {worker_id}: {len(scratch)} deleted entries came back")
+    if len(ids) != len(set(ids)):
+        problems.append(f"{len(ids) - len(set(ids))} entries share an id with another")
+    dm.close()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hammer one data file from several processes")
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=200, help="entries added by each process")
+    parser.add_argument('--existing', type=int, default=10000, help="synthetic rows in the file beforehand")
+    parser.add_argument('--compact-every', type=int, default=50, help="compact after this many adds, 0 = never")
+    parser.add_argument('--delete-every', type=int, default=10, help="add and delete a scratch entry this often")
+    parser.add_argument('--partitioned', action='store_true', help="store entries in monthly partitions")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='zf-stress-')
+    try:
+        # One writer alone, for comparison
+        single_path = prepare(os.path.join(workdir, 'single'), args.existing, args.partitioned)
+        single, problems = run(single_path, 1, args.rows, args.compact_every, args.delete_every)
+        problems += check(single_path, 1, args.rows)
+
+        shared_path = prepare(os.path.join(workdir, 'shared'), args.existing, args.partitioned)
+        shared, errors = run(shared_path, args.processes, args.rows, args.compact_every, args.delete_every)
+        problems += errors + check(shared_path, args.processes, args.rows)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    single_rate = args.rows / single if single else 0.0
+    shared_rate = args.processes * args.rows / shared if shared else 0.0
+    print(f"1 process:   {args.rows} entries in {single:.2f} s, {single_rate:.0f} entries/s")
+    print(f"{args.processes} processes: {args.processes * args.rows} entries in {shared:.2f} s, "
+          f"{shared_rate:.0f} entries/s ({shared_rate / single_rate if single_rate else 0:.0%} of one writer)")
+    for problem in problems:
+        print(f"PROBLEM {problem}")
+    if not problems:
+        print("No entries lost")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Synthetic volunteer data shaped like what kiosks record
+
+A few regulars log most of the hours (names follow a Zipf distribution),
+locations and events repeat with stray spaces and odd casing, and Hours
+holds the kind of junk people type into a free-text box.
+"""
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = ['Ava', 'Ben', 'Chloe', 'Dev', 'Elena', 'Farah', 'Gabe', 'Hana', 'Isaac', 'Jia',
+               'Kofi', 'Lena', 'Mateo', 'Nora', 'Omar', 'Priya', 'Quinn', 'Rehan', 'Sofia', 'Tariq']
+LAST_NAMES = ['Abbu', 'Baker', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones',
+              'Kim', 'Lopez', 'Murphy', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Walsh']
+LOCATIONS = ['Food Bank', 'food bank', 'Shelter', 'Community Garden', 'Library', 'Park ', 'ZF', 'zf']
+EVENTS = ['Packing', 'packing', 'Cleanup', 'Tutoring', 'Fundraiser', 'Sorting ', 'Delivery']
+# Hours as typed: mostly numbers, some blanks, spaces, decimals and junk
+HOURS = ['1', '2', '3', '4', '5', '6', '8', '1.5', '2.5', ' 3 ', '', 'erg', '3 hrs', 'two']
+HOURS_WEIGHTS = [10, 14, 14, 12, 8, 5, 3, 6, 6, 3, 6, 1, 1, 1]
+
+
+def people(count, seed=0):
+    """Return count distinct names, some differing only in case"""
+    rng = np.random.default_rng(seed)
+    names = set()
+    while len(names) < count:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {len(names)}"
+        names.add(name.lower() if rng.random() < 0.05 else name)
+    return sorted(names)
+
+
+def generate(rows, people_count=None, seed=0, start='2024-01-01', days=365):
+    """Return a DataFrame of raw text rows in the data file's layout"""
+    rng = np.random.default_rng(seed)
+    names = people(people_count or max(10, rows // 50), seed)
+    # Zipf-like skew: the first names in the list are the regulars
+    weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    weights /= weights.sum()
+    hours_weights = np.array(HOURS_WEIGHTS, dtype=float) / sum(HOURS_WEIGHTS)
+
+    seconds = rng.integers(0, days * 24 * 3600, rows)
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(np.sort(seconds), unit='s')
+    return pd.DataFrame({
+        'Name': rng.choice(names, rows, p=weights),
+        'Location': rng.choice(LOCATIONS, rows),
+        'Event': rng.choice(EVENTS, rows),
+        'Hours': rng.choice(HOURS, rows, p=hours_weights),
+        'Timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def write(path, rows, **kwargs):
+    """Write a synthetic data file and return the number of rows"""
+    generate(rows, **kwargs).to_csv(path, index=False)
+    return rows
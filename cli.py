@@ -0,0 +1,196 @@
+"""Command-line access to the volunteer data, for scripts and cron jobs
+
+    python -m cli add "Ava Chen" --location "Food Bank" --event Packing --hours 2
+    python -m cli import entries.csv           # or '-' to read CSV from stdin
+    cat entries.jsonl | python -m cli import - --format jsonl
+    python -m cli export - --format jsonl --name "Ava Chen" --from 2024-01-01
+    python -m cli report --by month --year 2024
+    python -m cli compact
+    python -m cli stats
+    python -m cli duplicates --threshold 0.8
+    python -m cli merge "Ava Chen" "Ava  Chen" "Ava Chenn"
+
+Data goes to stdout and messages to stderr, so output can be piped. The data
+file is ZF_DATA_FILE or personal_data.csv, as for the GUI, unless --file is
+given. The exit status is 0 on success and 1 on failure. Tk is never imported.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+
+# Formats accepted on stdin and written to stdout
+STREAM_FORMATS = ['csv', 'tsv', 'jsonl']
+
+
+def _stream_format(path, fmt):
+    """The format given, else the one matching the file extension, else CSV"""
+    if fmt:
+        return fmt
+    if path != '-':
+        from data_manager import EXPORT_FORMATS
+        return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+    return 'csv'
+
+
+def _read_chunks(stream, fmt):
+    """Yield raw DataFrames of up to IMPORT_CHUNK_SIZE rows from a text stream"""
+    import pandas as pd
+    from data_manager import IMPORT_CHUNK_SIZE
+    if fmt == 'jsonl':
+        # Keep values as written; DataManager parses hours and dates itself
+        return pd.read_json(stream, lines=True, dtype=False, convert_dates=False, chunksize=IMPORT_CHUNK_SIZE)
+    return pd.read_csv(stream, sep='\t' if fmt == 'tsv' else ',', dtype=str, chunksize=IMPORT_CHUNK_SIZE)
+
+
+def cmd_add(dm, args, out):
+    return dm.add_person_info(args.name, args.location, args.event, args.hours, args.date)
+
+
+def cmd_import(dm, args, out):
+    fmt = _stream_format(args.path, args.format)
+    if args.path != '-' and fmt == 'csv':
+        return dm.import_entries(args.path)
+    if args.path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        return dm.import_frames(_read_chunks(stream, fmt))
+    if not os.path.exists(args.path):
+        return False, "Import file not found!"
+    with open(args.path, 'r', newline='', encoding='utf-8-sig') as f:
+        return dm.import_frames(_read_chunks(f, fmt))
+
+
+def cmd_export(dm, args, out):
+    columns = args.columns.split(',') if args.columns else None
+    if args.path != '-':
+        return dm.export_entries(args.path, args.format, columns, args.name, args.start, args.end)
+    return dm.write_entries(out, args.format or 'csv', columns, args.name, args.start, args.end)
+
+
+def cmd_report(dm, args, out):
+    try:
+        rows = dm.get_report(args.by, args.year)
+    except ValueError as e:
+        return False, str(e)
+    if args.format == 'jsonl':
+        for group, hours, entries in rows:
+            out.write(json.dumps({'Group': group, 'Hours': hours, 'Entries': entries}) + '\n')
+    else:
+        writer = csv.writer(out, delimiter='\t' if args.format == 'tsv' else ',', lineterminator='\n')
+        writer.writerow(['Group', 'Hours', 'Entries'])
+        writer.writerows(rows)
+    return True, f"Reported {len(rows)} groups"
+
+
+def cmd_compact(dm, args, out):
+    if dm.compact():
+        return True, f"Compacted {dm.file_path}"
+    return False, "Compaction failed"
+
+
+def cmd_stats(dm, args, out):
+    months = dm.get_report('month')
+    dated = [month for month, hours, entries in months if month]
+    stats = {
+        'file': dm.file_path,
+        'bytes': os.path.getsize(dm.file_path) if os.path.exists(dm.file_path) else 0,
+        'entries': dm.count_entries(),
+        'people': len(dm.get_all_people()),
+        'hours': round(sum(hours for month, hours, entries in months), 2),
+        'first_month': dated[0] if dated else None,
+        'last_month': dated[-1] if dated else None,
+        'years': dm.get_report_years(),
+    }
+    if args.json:
+        out.write(json.dumps(stats) + '\n')
+    else:
+        for key, value in stats.items():
+            out.write(f"{key}: {value}\n")
+    return True, None
+
+
+def cmd_duplicates(dm, args, out):
+    groups = dm.find_duplicate_people(args.threshold)
+    for group in groups:
+        out.write('\t'.join(f"{name} ({entries})" for name, entries in group) + '\n')
+    return True, f"Found {len(groups)} groups of similar names"
+
+
+def cmd_merge(dm, args, out):
+    return dm.merge_people([args.canonical] + args.names, args.canonical)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Batch operations on the volunteer data")
+    parser.add_argument('--file', help="data file (default: ZF_DATA_FILE or personal_data.csv)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="add one entry")
+    add.add_argument('name')
+    add.add_argument('--location', default='')
+    add.add_argument('--event', default='')
+    add.add_argument('--hours', default='')
+    add.add_argument('--date', help="YYYY-MM-DD, default today")
+    add.set_defaults(run=cmd_add)
+
+    import_ = commands.add_parser('import', help="add entries from a file or stdin, skipping duplicates")
+    import_.add_argument('path', help="file to read, or - for stdin")
+    import_.add_argument('--format', choices=STREAM_FORMATS, help="default: from the extension, CSV for stdin")
+    import_.set_defaults(run=cmd_import)
+
+    export = commands.add_parser('export', help="write entries to a file or stdout")
+    export.add_argument('path', help="file to write, or - for stdout")
+    export.add_argument('--format', choices=STREAM_FORMATS, help="default: from the extension, CSV for stdout")
+    export.add_argument('--columns', help="comma-separated, e.g. Name,Timestamp,Hours")
+    export.add_argument('--name', help="only this person's entries")
+    export.add_argument('--from', dest='start', help="first day, YYYY-MM-DD")
+    export.add_argument('--to', dest='end', help="last day, YYYY-MM-DD")
+    export.set_defaults(run=cmd_export)
+
+    report = commands.add_parser('report', help="write hour totals to stdout")
+    report.add_argument('--by', default='person', choices=['person', 'event', 'location', 'month'])
+    report.add_argument('--year', help="only this year")
+    report.add_argument('--format', default='csv', choices=STREAM_FORMATS)
+    report.set_defaults(run=cmd_report)
+
+    compact = commands.add_parser('compact', help="fold the journal into the data file")
+    compact.set_defaults(run=cmd_compact)
+
+    stats = commands.add_parser('stats', help="summarize the data file")
+    stats.add_argument('--json', action='store_true', help="print one JSON object")
+    stats.set_defaults(run=cmd_stats)
+
+    duplicates = commands.add_parser('duplicates', help="list groups of names that are probably one person")
+    duplicates.add_argument('--threshold', type=float, default=0.7, help="similarity from 0 to 1, default 0.7")
+    duplicates.set_defaults(run=cmd_duplicates)
+
+    merge = commands.add_parser('merge', help="rename every entry of the names to one spelling")
+    merge.add_argument('canonical', help="spelling to keep")
+    merge.add_argument('names', nargs='+', help="spellings to replace")
+    merge.set_defaults(run=cmd_merge)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    # DataManager reports problems with print(); keep them out of piped data
+    with contextlib.redirect_stdout(sys.stderr):
+        # Imported here so --help doesn't wait for pandas
+        from data_manager import DataManager
+        dm = DataManager(args.file)
+        try:
+            success, message = args.run(dm, args, out)
+        finally:
+            dm.close()
+    out.flush()
+    if message:
+        print(message, file=sys.stderr)
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
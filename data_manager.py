@@ -1,43 +1,381 @@
 import pandas as pd
+import numpy as np
 import os
+import csv
+import threading
+import contextlib
 from datetime import datetime
+from events import ROWS_ADDED, ROWS_REMOVED, ROWS_UPDATED, PEOPLE_ADDED, PEOPLE_REMOVED, RELOADED
+from indexes import NameIndex, TextIndex, TimestampIndex, TrigramIndex
+from reports import REPORT_DIMENSIONS, ReportTotals
+from schema import (ID_COLUMN, REQUIRED_COLUMNS, coerce, concat, decimal_hours, matching_rows, parse_timestamps,
+                    replace_rows, selected_rows)
+from storage import open_storage
+from utils import data_file_path, search_words
+
+# Number of rows read from an import file at a time
+IMPORT_CHUNK_SIZE = 50000
+
+# Number of rows converted and written to an export file at a time
+EXPORT_CHUNK_SIZE = 50000
+# Export format for each file extension; anything else is written as CSV
+EXPORT_FORMATS = {'.csv': 'csv', '.tsv': 'tsv', '.txt': 'tsv', '.jsonl': 'jsonl', '.json': 'jsonl'}
+# Columns written when an export doesn't choose its own
+EXPORT_COLUMNS = ['Name', 'Timestamp', 'Location', 'Event', 'Hours']
+# Free-text columns covered by the entries search
+SEARCH_COLUMNS = ['Location', 'Event']
+# Names at least this alike (Dice coefficient of their trigrams) are flagged as likely duplicates
+SIMILAR_NAME_THRESHOLD = 0.7
 
 class DataManager:
-    def __init__(self):
-        self.file_path = "personal_data.csv"
-        self.create_file_if_not_exists()
+    def __init__(self, file_path=None):
+        # A directory selects monthly partitions, a .db/.sqlite path SQLite, anything else CSV
+        self.file_path = data_file_path(file_path)
+        self.storage = open_storage(self.file_path)
+        # Raw rows whose Hours or Timestamp couldn't be read are kept here for review
+        self.quarantine_path = self.file_path + ".quarantine.csv"
+        # In-memory copy of the table and the storage signature it was read at
+        self._df = None
+        self._signature = None
+        self._names = NameIndex()
+        # Read-only copy of the names for search_people, swapped whole so readers needn't lock
+        self._people = None
+        # Report totals, computed on first use after each load and then kept up to date
+        self._totals = ReportTotals()
+        self._totals_stale = True
+        # Row labels by timestamp, built on first use after each load and then kept up to date
+        self._times = TimestampIndex()
+        self._times_stale = True
+        # Words of Location and Event -> row labels, likewise built on first use
+        self._text = TextIndex()
+        self._text_stale = True
+        # Trigrams of every person's name for spotting near-duplicates, likewise built on first use
+        self._similar = TrigramIndex()
+        self._similar_stale = True
+        # Bumped on every change so derived orderings know when to recompute
+        self._version = 0
+        # Column -> (version, positions in sorted order, rank of each position)
+        self._sort_cache = {}
+        # Text column -> (categories, sort rank of each category), until a new value appears
+        self._category_ranks = {}
+        # (version, query, labels) of the entries view last asked for
+        self._view_cache = None
+        # Guards the cache against the background compaction thread
+        self._lock = threading.RLock()
+        self._compaction_thread = None
+        # Callbacks notified of changes, called on whichever thread made the change
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """Call callback(kind, payload) after every change to the table"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, kind, payload=None):
+        for callback in list(self._listeners):
+            try:
+                callback(kind, payload)
+            except Exception as e:
+                print(f"Error in change listener: {str(e)}")
 
     def create_file_if_not_exists(self):
-        if not os.path.exists(self.file_path):
-            # Create an empty DataFrame with the required columns
-            df = pd.DataFrame(columns=['Name', 'Location', 'Event', 'Hours', 'Timestamp'])
-            df.to_csv(self.file_path, index=False)
+        self.storage.create_if_missing()
+
+    def _load(self):
+        """Return the cached table, catching up with storage only if it changed"""
+        with self._lock:
+            with self.storage.lock(shared=True):
+                if self._df is not None and self.storage.signature() == self._signature:
+                    return self._df
+                # Another process wrote; replay just its changes when storage can list them
+                changes = self.storage.read_changes() if self._df is not None else None
+                if changes is None:
+                    self._reload()
+                signature = self.storage.signature()
+            # Writers needn't wait while the cache catches up
+            if changes is not None:
+                self._apply_changes(changes)
+            self._signature = signature
+            if (self.storage.legacy_columns or self.storage.quarantine or self.storage.renumbered
+                    or self.storage.recovered):
+                self._migrate()
+            return self._df
+
+    def _reload(self):
+        """Read the whole table and rebuild everything derived from it"""
+        reloaded = self._df is not None
+        self._df = self.storage.read()
+        self._names.rebuild(self._df['Name'])
+        self._people = self._names.snapshot()
+        self._totals_stale = True
+        self._times_stale = True
+        self._text_stale = True
+        self._similar_stale = True
+        self._version += 1
+        # Rows may have come and gone unseen; views have to fetch again
+        if reloaded:
+            self._emit(RELOADED)
+
+    def _apply_changes(self, changes):
+        """Fold changes read from storage into the cache, in order"""
+        for op, rows in changes:
+            if op == 'delete':
+                mask = selected_rows(self._df, rows)
+                if mask.any():
+                    self._cache_removed(mask)
+            elif op == 'update':
+                self._cache_updated(rows)
+            else:
+                self._cache_added(rows)
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Hold the cache and, against other processes, the data files for a write"""
+        with self._lock, self.storage.lock():
+            yield
+
+    def _migrate(self):
+        """Rewrite a data file from before the typed schema
+
+        Drops columns the schema doesn't have and blanks values that can't be
+        parsed, after saving the original rows to the quarantine file. Rows
+        that had no id are stored with the one the read gave them, and rows
+        replayed from a journal that no longer matched the file are stored too.
+        """
+        with self._writing():
+            # Another process wrote since the read; the next load catches up and tries again
+            if self.storage.signature() != self._signature:
+                return
+            if self.storage.quarantine:
+                self._quarantine(pd.concat(self.storage.quarantine))
+            self.storage.replace(self._df)
+            self.storage.legacy_columns = []
+            self.storage.quarantine = []
+            self.storage.renumbered = 0
+            self.storage.recovered = 0
+            self._signature = self.storage.signature()
+        print(f"Migrated {self.file_path} to the current schema")
+
+    def _quarantine(self, rows):
+        """Append raw rows with unreadable values to the quarantine file"""
+        rows = rows.reindex(columns=REQUIRED_COLUMNS)
+        write_header = not os.path.exists(self.quarantine_path)
+        rows.to_csv(self.quarantine_path, mode='a', header=write_header, index=False)
+
+    def _append_rows(self, new_df, op='add', ids=None):
+        """Append rows to storage without rewriting it and extend the cache
+
+        Rows get new ids unless ids gives them.
+        """
+        with self._writing():
+            # Catch up with other processes first, so the cache stays in journal order
+            self._load()
+            appended = self.storage.append(new_df, self._df, op=op, ids=ids)
+            self._cache_added(appended)
+            self._signature = self.storage.signature()
+        self._schedule_compaction()
+
+    def _remove_rows(self, mask):
+        """Delete the rows selected by mask from storage and the cache
+
+        The caller holds _writing() and computed mask on the table _load() returned there.
+        """
+        with self._writing():
+            self.storage.remove(self._df, mask)
+            self._cache_removed(mask)
+            self._signature = self.storage.signature()
+        self._schedule_compaction()
+
+    def _update_rows(self, rows):
+        """Store new values for the rows with the ids rows is labelled by, in one storage write
+
+        The caller holds _writing() and took rows from the table _load() returned there.
+        """
+        with self._writing():
+            stored = self.storage.update(self._df, rows)
+            self._cache_updated(stored)
+            self._signature = self.storage.signature()
+        self._schedule_compaction()
+
+    def _cache_added(self, rows):
+        """Extend the cache and its indexes with stored rows and tell subscribers"""
+        self._df = concat([self._df, rows])
+        self._version += 1
+        new_people = self._index_rows(rows)
+        self._people = self._names.snapshot()
+        if not self._totals_stale:
+            self._totals.add(rows)
+        if not self._times_stale:
+            self._times.add(rows['Timestamp'])
+        if not self._text_stale:
+            self._text.add(rows[SEARCH_COLUMNS])
+        if not self._similar_stale:
+            for name in new_people:
+                self._similar.add(name)
+        if self._listeners:
+            self._emit(ROWS_ADDED, self._frame_records(rows))
+            if new_people:
+                self._emit(PEOPLE_ADDED, new_people)
+
+    def _cache_removed(self, mask):
+        """Drop the rows selected by mask from the cache and its indexes and tell subscribers"""
+        df = self._df
+        self._df = df[~mask]
+        self._version += 1
+        keys = [key for key in dict.fromkeys(map(NameIndex.key, df['Name'][mask].astype(object))) if key]
+        before = [self._names.canonical(key) for key in keys]
+        self._unindex_rows(df[mask])
+        # Deleting the row a spelling came from hands the name to the next row's spelling
+        spellings = set(df['Name'][mask].astype(object))
+        self._respell_names([key for key, name in zip(keys, before) if name in spellings])
+        self._people = self._names.snapshot()
+        after = [self._names.canonical(key) for key in keys]
+        removed_people = [name for name in before if name not in after]
+        added_people = [name for name in after if name and name not in before]
+        if not self._totals_stale:
+            self._totals.remove(df[mask])
+        if not self._times_stale:
+            self._times.remove(df.loc[mask, 'Timestamp'])
+        if not self._text_stale:
+            self._text.remove(df.loc[mask, SEARCH_COLUMNS])
+        if not self._similar_stale:
+            for name in removed_people:
+                self._similar.remove(name)
+            for name in added_people:
+                self._similar.add(name)
+        if self._listeners:
+            self._emit(ROWS_REMOVED, self._frame_records(df[mask]))
+            if removed_people:
+                self._emit(PEOPLE_REMOVED, removed_people)
+            if added_people:
+                self._emit(PEOPLE_ADDED, added_people)
+
+    def _cache_updated(self, rows):
+        """Swap cached rows for their stored new values, matched by id, and tell subscribers"""
+        df = self._df
+        old = df.loc[rows.index]
+        self._df = replace_rows(df, rows)
+        self._version += 1
+        # People whose canonical spelling appears or disappears, compared before and after
+        names = old['Name'].astype(object).tolist() + rows['Name'].astype(object).tolist()
+        keys = [key for key in dict.fromkeys(map(NameIndex.key, names)) if key]
+        before = [self._names.canonical(key) for key in keys]
+        self._unindex_rows(old)
+        self._index_rows(rows)
+        # A renamed row can change the spelling a name's first row has
+        renamed = old['Name'].astype(object).to_numpy() != rows['Name'].astype(object).to_numpy()
+        self._respell_names({NameIndex.key(name) for name in rows['Name'][renamed]})
+        self._people = self._names.snapshot()
+        after = [self._names.canonical(key) for key in keys]
+        removed_people = [name for name in before if name and name not in after]
+        added_people = [name for name in after if name and name not in before]
+        if not self._totals_stale:
+            self._totals.remove(old)
+            self._totals.add(rows)
+        if not self._times_stale:
+            self._times.remove(old['Timestamp'])
+            self._times.add(rows['Timestamp'])
+        if not self._text_stale:
+            self._text.remove(old[SEARCH_COLUMNS])
+            self._text.add(rows[SEARCH_COLUMNS])
+        if not self._similar_stale:
+            for name in removed_people:
+                self._similar.remove(name)
+            for name in added_people:
+                self._similar.add(name)
+        if self._listeners:
+            self._emit(ROWS_UPDATED, list(zip(self._frame_records(old), self._frame_records(rows))))
+            if removed_people:
+                self._emit(PEOPLE_REMOVED, removed_people)
+            if added_people:
+                self._emit(PEOPLE_ADDED, added_people)
+
+    def _schedule_compaction(self):
+        """Fold the journal into the data file in the background once it is large"""
+        if not self.storage.needs_compaction():
+            return
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self):
+        """Rewrite the data file from the current table and clear the journal"""
+        try:
+            with self._writing():
+                df = self._load()
+                self.storage.compact(df)
+                self._signature = self.storage.signature()
+            return True
+        except Exception as e:
+            print(f"Error compacting data: {str(e)}")
+            return False
+
+    def close(self):
+        """Compact any pending journal and release the storage"""
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        if self.storage.needs_compaction(0):
+            self.compact()
+        self.storage.close()
+
+    def _index_rows(self, rows):
+        """Add newly stored rows to the in-memory indexes and return any new names"""
+        new_people = []
+        for label, name in rows['Name'].items():
+            if NameIndex.key(name) and name not in self._names:
+                new_people.append(name)
+            self._names.add(label, name)
+        return new_people
+
+    def _unindex_rows(self, rows):
+        """Remove deleted rows from the in-memory indexes"""
+        for label, name in rows['Name'].items():
+            self._names.remove(label, name)
+
+    def _respell_names(self, keys):
+        """Give each name the spelling of its first remaining row, which is what a reload shows"""
+        if not keys:
+            return
+        names = self._df['Name']
+        codes = names.cat.codes.to_numpy()
+        lowered = names.cat.categories.map(NameIndex.key)
+        for key in keys:
+            rows = np.isin(codes, np.flatnonzero(lowered == key))
+            if rows.any():
+                self._names.respell(names.cat.categories[codes[rows.argmax()]])
 
     def get_all_people(self):
-        df = pd.read_csv(self.file_path)
-        # Convert all names to lowercase for comparison, then use unique with case preservation
-        unique_names = []
-        seen_lower = set()
-        
-        for name in df['Name']:
-            if name.lower() not in seen_lower:
-                seen_lower.add(name.lower())
-                unique_names.append(name)
-                
-        # Sort alphabetically (case-insensitive)
-        return sorted(unique_names, key=lambda x: x.lower())
+        self._load()
+        # Canonical spellings, sorted alphabetically (case-insensitive)
+        return self._names.names()
+
+    def search_people(self, text, mode='token'):
+        """Return names matching text from the in-memory name index
+
+        Never reads storage or waits for the lock, so it is safe to call on
+        every keystroke while a reload or import runs; it searches the names
+        as of the last finished change, and returns an empty list until the
+        table has been loaded.
+        """
+        people = self._people
+        if people is None:
+            return []
+        return people.search(text, mode)
 
     def add_person_info(self, name, location, event, hours, date=None):
         try:
-            df = pd.read_csv(self.file_path)
+            self._load()
             
+            # Hours are stored as numbers; blank is allowed
+            if str(hours).strip() and pd.isna(pd.to_numeric(str(hours).strip(), errors='coerce')):
+                return False, "Hours must be a number!"
+
             # Check if name exists (case-insensitive), use the original case if found
-            matching_names = df[df['Name'].str.lower() == name.lower()]['Name'].unique()
-            if len(matching_names) > 0:
-                # Use the first instance we found to maintain case consistency
-                name_to_use = matching_names[0]
-            else:
-                name_to_use = name
+            name_to_use = self._names.canonical(name) or name
             
             # Generate timestamp - if date is provided, use it as the date part
             if date and date.strip():
@@ -61,120 +399,624 @@ class DataManager:
                 'Hours': [hours],
                 'Timestamp': [timestamp]
             }
-            df = pd.concat([df, pd.DataFrame(new_data)], ignore_index=True)
-            df.to_csv(self.file_path, index=False)
+            self._append_rows(pd.DataFrame(new_data))
             return True, "Information added successfully!"
         except Exception as e:
             return False, f"Error saving data: {str(e)}"
 
+    def _similar_index(self):
+        """Return the name trigram index, building it once after each load"""
+        if self._similar_stale:
+            self._similar.rebuild(self._names.names())
+            self._similar_stale = False
+        return self._similar
+
+    def similar_people(self, name, threshold=SIMILAR_NAME_THRESHOLD):
+        """Return existing names that look like a misspelling of name, most alike first
+
+        A name that matches exactly (ignoring case) isn't included.
+        """
+        with self._lock:
+            self._load()
+            key = NameIndex.key(name)
+            return [other for other, score in self._similar_index().similar(name, threshold)
+                    if NameIndex.key(other) != key]
+
+    def find_duplicate_people(self, threshold=SIMILAR_NAME_THRESHOLD):
+        """Return groups of names that are probably the same person
+
+        Each group lists (name, entries) with the most entries first, the
+        usual choice of spelling to keep. Names alike through a chain
+        (A like B, B like C) end up in one group. Groups come out in
+        alphabetical order of their first name.
+        """
+        with self._lock:
+            self._load()
+            index = self._similar_index()
+            # Union-find over the names, joined for each alike pair
+            parent = {}
+
+            def root(name):
+                parent.setdefault(name, name)
+                while parent[name] != name:
+                    parent[name] = parent[parent[name]]
+                    name = parent[name]
+                return name
+
+            for name in self._names.names():
+                for other, score in index.similar(name, threshold):
+                    if other != name:
+                        parent[root(other)] = root(name)
+
+            groups = {}
+            for name in parent:
+                groups.setdefault(root(name), []).append((name, len(self._names.rows(name))))
+            groups = [sorted(group, key=lambda item: (-item[1], item[0].lower())) for group in groups.values()]
+            return sorted(groups, key=lambda group: group[0][0].lower())
+
+    def merge_people(self, names, canonical):
+        """Rename every entry of the given names to the canonical spelling in a single write
+
+        names are matched case-insensitively; canonical may be one of them or
+        a new spelling. Report totals move with the entries.
+        """
+        canonical = canonical.strip()
+        if not canonical:
+            return False, "Name cannot be empty!"
+        try:
+            with self._writing():
+                df = self._load()
+                keys = {NameIndex.key(name) for name in names}
+                labels = [label for key in keys for label in self._names.rows(key)]
+                mask = df.index.isin(labels)
+                # Rows already spelled the canonical way needn't be rewritten
+                mask &= (df['Name'] != canonical).to_numpy()
+                if not mask.any():
+                    return True, "Nothing to merge."
+                self._update_rows(df[mask].assign(Name=canonical))
+            return True, f"Merged {int(mask.sum())} entries into {canonical}"
+        except Exception as e:
+            return False, f"Error merging names: {str(e)}"
+
     def get_person_info(self, name):
-        df = pd.read_csv(self.file_path)
-        # Case-insensitive match
-        person_data = df[df['Name'].str.lower() == name.lower()]
-        return person_data.to_dict('records')
+        df = self._load()
+        # Case-insensitive match through the name index
+        person_data = df.loc[self._names.rows(name)]
+        return self._frame_records(person_data)
 
     def add_new_person(self, name):
         if not name.strip():
             return False, "Name cannot be empty!"
 
-        df = pd.read_csv(self.file_path)
-        # Case-insensitive check for duplicates
-        if any(existing_name.lower() == name.lower() for existing_name in df['Name'].unique()):
-            return False, "Person already exists (name is case-insensitive)!"
-
-        # Add the person with initial empty information
-        new_data = {
-            'Name': [name],
-            'Location': [''],
-            'Event': [''],
-            'Hours': [''],
-            'Timestamp': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-        }
-        df = pd.concat([df, pd.DataFrame(new_data)], ignore_index=True)
-        df.to_csv(self.file_path, index=False)
+        # Check and add under one lock so two kiosks can't add the same person
+        with self._writing():
+            self._load()
+            # Case-insensitive check for duplicates
+            if name in self._names:
+                return False, "Person already exists (name is case-insensitive)!"
+
+            # Add the person with initial empty information
+            new_data = {
+                'Name': [name],
+                'Location': [''],
+                'Event': [''],
+                'Hours': [''],
+                'Timestamp': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
+            }
+            self._append_rows(pd.DataFrame(new_data))
         return True, "Person added successfully!"
         
     def get_all_entries(self):
         """Get all entries in the database"""
-        df = pd.read_csv(self.file_path)
+        df = self._load()
         return df.to_dict('records')
         
-    def import_and_merge_entries(self, import_file_path):
-        """Import and merge entries from another CSV file"""
+    def _timestamp_index(self):
+        """Return the timestamp index, building it once after each load"""
+        if self._times_stale:
+            self._times.rebuild(self._df['Timestamp'])
+            self._times_stale = False
+        return self._times
+
+    def _text_index(self):
+        """Return the Location and Event word index, building it once after each load"""
+        if self._text_stale:
+            self._text.rebuild(self._df[SEARCH_COLUMNS])
+            self._text_stale = False
+        return self._text
+
+    def _order_rows(self, positions, column):
+        """Sort positions of the cached table by one column, ties by row id
+
+        Text sorts case-insensitively, with missing values as 'nan' the way
+        str() shows them; missing dates and hours sort last.
+        """
+        values = self._df[column]
+        if column in ('Timestamp', 'Hours'):
+            keys = values.to_numpy()[positions]
+        else:
+            # Rank each distinct value once, then sort the rows by their value's rank
+            categories = values.cat.categories
+            cached = self._category_ranks.get(column)
+            if cached is None or cached[0] is not categories:
+                lowered = pd.Series(np.append(categories.astype(str).str.lower(), 'nan'))
+                cached = self._category_ranks[column] = (categories, lowered.rank(method='dense').to_numpy())
+            keys = cached[1][values.cat.codes.to_numpy()[positions]]
+        return positions[np.lexsort((self._df.index.to_numpy()[positions], keys))]
+
+    def _sort_order(self, column):
+        """Return every position sorted by column and each position's rank, cached until the table changes"""
+        cached = self._sort_cache.get(column)
+        if cached is None or cached[0] != self._version:
+            order = self._order_rows(np.arange(len(self._df)), column)
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            cached = self._sort_cache[column] = (self._version, order, rank)
+        return cached[1], cached[2]
+
+    def _sorted_labels(self, name=None, sort='Name', descending=False, start=None, end=None, text=None):
+        """Row labels of the entries view, ordered by a column
+
+        name keeps one person's rows, start and end (YYYY-MM-DD, inclusive) a
+        date range, and text the rows whose Location or Event has a word
+        starting with each of its words; see _filter_positions. Ties go by
+        row id, the order entry_sort_key gives in the GUI, and descending
+        reverses the whole order. The result is
+        cached until the table changes, so paging through it doesn't sort
+        again.
+        """
+        df = self._load()
+        if sort not in REQUIRED_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort}")
+        bounds = self._date_bounds(start, end)
+        words = tuple(sorted(set(search_words(text))))
+        query = (None if name is None else NameIndex.key(name), sort, descending, bounds, words)
+        if self._view_cache is not None and self._view_cache[:2] == (self._version, query):
+            return self._view_cache[2]
+
+        dated = bounds != (None, None)
+        if name is None and not dated and not words:
+            labels = df.index[self._sort_order(sort)[0]]
+        elif name is None and not words and sort == 'Timestamp':
+            # Already in order
+            labels = pd.Index(self._timestamp_index().range(*bounds))
+        else:
+            positions = self._filter_positions(df, name, start, end, text)
+            cached = self._sort_cache.get(sort)
+            if cached is not None and cached[0] == self._version:
+                # Order by the full permutation rather than comparing values again
+                positions = positions[np.argsort(cached[2][positions], kind='stable')]
+            else:
+                positions = self._order_rows(positions, sort)
+            labels = df.index[positions]
+        if descending:
+            labels = labels[::-1]
+        self._view_cache = (self._version, query, labels)
+        return labels
+
+    def _records(self, labels):
+        """Return the rows with the given ids as dicts, each with its Id"""
+        return self._frame_records(self._df.loc[labels])
+
+    @staticmethod
+    def _frame_records(rows):
+        records = rows.to_dict('records')
+        for label, record in zip(rows.index.tolist(), records):
+            record[ID_COLUMN] = label
+        return records
+
+    def count_entries(self, name=None, start=None, end=None, text=None):
+        """Number of entries in total, or passing the filters of get_entries_page"""
+        with self._lock:
+            return len(self._sorted_labels(name, start=start, end=end, text=text))
+
+    def get_entries_page(self, offset, limit, name=None, sort='Name', descending=False, start=None, end=None,
+                         text=None):
+        """Return (total, records) for one window of the entries; see _sorted_labels"""
+        with self._lock:
+            labels = self._sorted_labels(name, sort, descending, start, end, text)
+            return len(labels), self._records(labels[offset:offset + limit])
+
+    def get_entries_window(self, offset, limit, **query):
+        """Return (version, total, records): get_entries_page plus the version it reflects
+
+        Change events emitted at or before that version are already part of the
+        page, so a view applying events as they come can skip them.
+        """
+        with self._lock:
+            total, records = self.get_entries_page(offset, limit, **query)
+            return self._version, total, records
+
+    @property
+    def version(self):
+        """Number of changes applied to the cached table; listeners hear of each after it is counted"""
+        return self._version
+
+    def _report_totals(self):
+        """Return the report totals, computing them once after each load"""
+        df = self._load()
+        if self._totals_stale:
+            self._totals.rebuild(df)
+            self._totals_stale = False
+        return self._totals
+
+    def get_report(self, by='person', year=None):
+        """Return (value, hours, entries) totals grouped by person, event, location or month"""
+        if by not in REPORT_DIMENSIONS:
+            raise ValueError(f"Unknown report grouping: {by}")
+        with self._lock:
+            rows = self._report_totals().report(by, year)
+            if by == 'person':
+                # Totals are keyed case-insensitively; show the stored spelling
+                rows = [(self._names.canonical(name) or name, hours, entries)
+                        for name, hours, entries in rows]
+            return rows
+
+    def get_report_years(self):
+        """Return the years that have entries, newest first"""
+        with self._lock:
+            return self._report_totals().years()
+
+    def _fingerprints(self, df):
+        """Hash each typed row so equal entries get equal fingerprints"""
+        # Categories hash by value, so tables with different category lists compare fine
+        return pd.util.hash_pandas_object(df[REQUIRED_COLUMNS], index=False).to_numpy()
+
+    def import_entries(self, import_file_path, progress=None, cancel=None, chunksize=IMPORT_CHUNK_SIZE):
+        """Stream entries from another CSV file, adding only rows not already stored
+
+        progress(rows_read, rows_added) is called after each chunk. Setting the
+        optional cancel event stops the import before anything is written.
+        """
         try:
             # Check if the import file exists
             if not os.path.exists(import_file_path):
                 return False, "Import file not found!"
-                
-            # Read the current data and the import data
-            current_df = pd.read_csv(self.file_path)
-            import_df = pd.read_csv(import_file_path)
-            
+
             # Ensure the import file has the required columns
-            required_columns = ['Name', 'Location', 'Event', 'Hours', 'Timestamp']
-            missing_columns = [col for col in required_columns if col not in import_df.columns]
+            with open(import_file_path, 'r', newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), [])
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in header]
             if missing_columns:
                 return False, f"Import file is missing required columns: {', '.join(missing_columns)}"
-            
-            # Merge the dataframes
-            merged_df = pd.concat([current_df, import_df], ignore_index=True)
-            
-            # Remove exact duplicates
-            merged_df = merged_df.drop_duplicates()
-            
-            # Save the merged data
-            merged_df.to_csv(self.file_path, index=False)
-            
-            return True, f"Successfully imported {len(import_df)} entries. After removing duplicates, database now has {len(merged_df)} entries."
+
+            reader = pd.read_csv(import_file_path, usecols=REQUIRED_COLUMNS, dtype=str,
+                                 chunksize=chunksize, encoding='utf-8-sig')
+            return self.import_frames(reader, progress, cancel)
         except Exception as e:
             return False, f"Error importing data: {str(e)}"
+
+    def import_frames(self, chunks, progress=None, cancel=None):
+        """Add rows from an iterable of raw DataFrames, skipping ones already stored
+
+        Used by import_entries and for streams such as stdin. Every chunk must
+        have the required columns. All new rows are written in one append.
+        """
+        try:
+            # Fingerprints of everything already stored
+            seen = set(self._fingerprints(self._load()).tolist())
+            version = self._version
+
+            new_chunks = []
+            quarantined = []
+            rows_read = 0
+            rows_added = 0
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    return False, "Import cancelled, no entries were added."
+                missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk]
+                if missing_columns:
+                    return False, f"Import data is missing required columns: {', '.join(missing_columns)}"
+                rows_read += len(chunk)
+
+                # Convert to the schema, setting aside rows with unreadable hours or dates
+                raw = chunk[REQUIRED_COLUMNS]
+                chunk, invalid = coerce(raw)
+                if invalid.any():
+                    quarantined.append(raw[invalid])
+                    chunk = chunk[~invalid]
+                # Drop rows without a name
+                chunk = chunk[chunk['Name'].notna()]
+
+                # Keep rows whose fingerprint hasn't been seen in the database or earlier chunks
+                keep = []
+                for fingerprint in self._fingerprints(chunk).tolist():
+                    keep.append(fingerprint not in seen)
+                    seen.add(fingerprint)
+                chunk = chunk[keep]
+
+                if len(chunk):
+                    new_chunks.append(chunk)
+                    rows_added += len(chunk)
+                if progress:
+                    progress(rows_read, rows_added)
+
+            # Write all new rows in one append
+            if new_chunks:
+                new_rows = concat(new_chunks)
+                with self._writing():
+                    df = self._load()
+                    if self._version != version:
+                        # The table changed while the file was read, perhaps on another kiosk;
+                        # drop rows that are now stored
+                        stored = np.isin(self._fingerprints(new_rows), self._fingerprints(df))
+                        new_rows = new_rows[~stored]
+                        rows_added -= int(stored.sum())
+                    if len(new_rows):
+                        self._append_rows(new_rows, op='import')
+
+            message = f"Successfully imported {rows_added} new entries ({rows_read - rows_added} duplicate or invalid rows skipped)."
+            if quarantined:
+                rows = pd.concat(quarantined)
+                self._quarantine(rows)
+                message += f" {len(rows)} rows with unreadable hours or dates were saved to {self.quarantine_path}."
+            return True, message
+        except Exception as e:
+            return False, f"Error importing data: {str(e)}"
+
+    def import_and_merge_entries(self, import_file_path):
+        """Import and merge entries from another CSV file"""
+        return self.import_entries(import_file_path)
+
+    def export_csv(self, export_file_path):
+        """Write every entry to a CSV file, whatever the storage backend"""
+        return self.export_entries(export_file_path, fmt='csv', columns=REQUIRED_COLUMNS)
+
+    @staticmethod
+    def _date_bounds(start=None, end=None):
+        """Turn inclusive YYYY-MM-DD days into datetime64 bounds [start, end), None where open"""
+        if start:
+            start = np.datetime64(datetime.strptime(start, "%Y-%m-%d"))
+        if end:
+            end = np.datetime64(datetime.strptime(end, "%Y-%m-%d")) + np.timedelta64(1, 'D')
+        return start or None, end or None
+
+    @staticmethod
+    def _date_mask(timestamps, start, end):
+        """Which datetime64 values fall in [start, end); with any bound, missing dates never do"""
+        keep = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps < end
+        return keep
+
+    def _filter_positions(self, df, name=None, start=None, end=None, text=None):
+        """Positions of the rows of the cached table df that pass the filters, in storage order
+
+        The most selective index picks the candidates (the person, then the
+        date range, then the words of text) and the other filters narrow
+        them down, so only matching rows are visited.
+        """
+        start, end = self._date_bounds(start, end)
+        dated = start is not None or end is not None
+        words = search_words(text)
+        if name is not None:
+            positions = np.sort(df.index.get_indexer(self._names.rows(name)))
+        elif dated:
+            positions = np.sort(df.index.get_indexer(self._timestamp_index().range(start, end)))
+            dated = False
+        elif words:
+            positions = np.sort(df.index.get_indexer(self._text_index().search(text)))
+            words = []
+        else:
+            positions = np.arange(len(df))
+        if dated:
+            positions = positions[self._date_mask(df['Timestamp'].to_numpy()[positions], start, end)]
+        if words and len(positions):
+            positions = positions[np.isin(df.index.to_numpy()[positions], self._text_index().search(text))]
+        return positions
+
+    def query(self, name=None, start=None, end=None):
+        """Return the entries of one person, a date range or both, as dicts in storage order
+
+        start and end are YYYY-MM-DD days, inclusive; a malformed date raises
+        ValueError. Until the table has been loaded, partitioned storage reads
+        only the months that overlap the range and SQLite only the matching
+        rows.
+        """
+        first, last = self._date_bounds(start, end)
+        with self._lock:
+            if self._df is None and hasattr(self.storage, 'query') and (first is not None or last is not None):
+                df = self.storage.query(first, last, name)
+                keep = self._date_mask(df['Timestamp'].to_numpy(), first, last)
+                if name is not None:
+                    # Same case-insensitive match as the name index, without building one
+                    names = df['Name'].cat
+                    matches = np.append(names.categories.map(NameIndex.key) == NameIndex.key(name), False)
+                    keep &= matches[names.codes.to_numpy()]
+                return df[keep].to_dict('records')
+            df = self._load()
+            return df.iloc[self._filter_positions(df, name, start, end)].to_dict('records')
+
+    @staticmethod
+    def _timestamp_text(values):
+        """Format datetime64 values the way the data file stores them, None where missing"""
+        # Much faster than Series.dt.strftime for this fixed layout
+        text = np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').astype(object)
+        text[np.isnat(values)] = None
+        return text
+
+    def export_entries(self, export_file_path, fmt=None, columns=None, name=None, start=None, end=None,
+                       progress=None, cancel=None, chunksize=EXPORT_CHUNK_SIZE):
+        """Stream entries to a CSV, TSV or JSON Lines file a chunk at a time
+
+        fmt defaults to the one matching the file extension. columns picks and
+        orders the output columns, name keeps one person's entries, and start
+        and end (YYYY-MM-DD, inclusive) keep a date range. progress(rows_written,
+        total) is called after each chunk; setting the optional cancel event
+        stops the export and leaves no file behind.
+        """
+        fmt = fmt or EXPORT_FORMATS.get(os.path.splitext(export_file_path)[1].lower(), 'csv')
+        # Write next to the target and swap it in, so a failed or cancelled export leaves nothing half-written
+        temp_path = export_file_path + ".tmp"
+        try:
+            with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+                success, message = self.write_entries(f, fmt, columns, name, start, end,
+                                                      progress, cancel, chunksize)
+            if not success:
+                os.remove(temp_path)
+                return False, message
+            os.replace(temp_path, export_file_path)
+            return True, f"{message} to {export_file_path}"
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False, f"Error exporting data: {str(e)}"
+
+    def write_entries(self, f, fmt='csv', columns=None, name=None, start=None, end=None,
+                      progress=None, cancel=None, chunksize=EXPORT_CHUNK_SIZE):
+        """Stream entries to an open text file, such as stdout; see export_entries"""
+        try:
+            if fmt not in ('csv', 'tsv', 'jsonl'):
+                return False, f"Unknown export format: {fmt}"
+            columns = list(columns or EXPORT_COLUMNS)
+            unknown = [col for col in columns if col not in REQUIRED_COLUMNS]
+            if unknown:
+                return False, f"Unknown columns: {', '.join(unknown)}"
+            try:
+                with self._lock:
+                    # Writes replace the cached table rather than change it, so this one stays consistent
+                    df = self._load()
+                    positions = self._filter_positions(df, name, start, end)
+            except ValueError:
+                return False, "Dates must be in YYYY-MM-DD format!"
+            if not len(positions):
+                return False, "No entries to export."
+
+            column_positions = [df.columns.get_loc(col) for col in columns]
+            total = len(positions)
+            for offset in range(0, total, chunksize):
+                if cancel is not None and cancel.is_set():
+                    return False, "Export cancelled, no file was written."
+                # Only this chunk is ever converted to text
+                chunk = df.iloc[positions[offset:offset + chunksize], column_positions]
+                if 'Timestamp' in chunk:
+                    chunk = chunk.assign(Timestamp=self._timestamp_text(chunk['Timestamp'].to_numpy()))
+                if fmt == 'jsonl':
+                    if 'Hours' in chunk:
+                        # As the CSV writer shows them, not with float32's binary tail
+                        chunk = chunk.assign(Hours=decimal_hours(chunk['Hours']))
+                    chunk.to_json(f, orient='records', lines=True)
+                else:
+                    chunk.to_csv(f, sep='\t' if fmt == 'tsv' else ',', header=offset == 0, index=False)
+                if progress:
+                    progress(min(offset + chunksize, total), total)
+            return True, f"Exported {total} entries"
+        except Exception as e:
+            return False, f"Error exporting data: {str(e)}"
             
     def delete_entry(self, name, timestamp, location, event, hours):
         """Delete a specific entry from the database"""
+        return self.delete_entries([{
+            'Name': name,
+            'Timestamp': timestamp,
+            'Location': location,
+            'Event': event,
+            'Hours': hours
+        }])
+
+    @staticmethod
+    def _row_ids(rows):
+        """The Id of every row, or None unless each one has one"""
+        if not all(row.get(ID_COLUMN) is not None for row in rows):
+            return None
+        return np.array([int(row[ID_COLUMN]) for row in rows], dtype='int64')
+
+    def delete_entries(self, rows):
+        """Delete several entries with a single write
+
+        Rows with an Id, as get_entries_page and get_person_info return them,
+        are found by id; rows without one by comparing every value.
+        """
         try:
-            df = pd.read_csv(self.file_path)
-            
-            # Create a mask for the exact entry to delete
-            mask = (
-                (df['Name'] == name) & 
-                (df['Timestamp'] == timestamp) & 
-                (df['Location'] == location) & 
-                (df['Event'] == event) & 
-                (df['Hours'] == hours)
-            )
-            
-            # Delete the matching row(s)
-            df = df[~mask]
-            
-            # Save the updated dataframe
-            df.to_csv(self.file_path, index=False)
-            
+            # Matched against the latest table, so rows another process added or removed count too
+            with self._writing():
+                df = self._load()
+                if not rows or df.empty:
+                    return True
+
+                ids = self._row_ids(rows)
+                if ids is not None:
+                    mask = df.index.isin(ids)
+                else:
+                    # Compare after converting the rows to the schema, whatever form the caller holds them in
+                    mask = matching_rows(df, pd.DataFrame(rows, columns=REQUIRED_COLUMNS))
+
+                # Delete every matching row in one write
+                if mask.any():
+                    self._remove_rows(mask)
+
             return True
         except Exception as e:
-            print(f"Error deleting entry: {str(e)}")
+            print(f"Error deleting entries: {str(e)}")
             return False
-            
+
+    def update_entries(self, ids, values):
+        """Set new values for the given columns of several entries, found by id, in a single write
+
+        values maps column names to the value every one of the entries gets;
+        ids no longer stored are skipped. Entries keep their ids and places.
+        """
+        unknown = set(values) - set(REQUIRED_COLUMNS)
+        if unknown:
+            return False, f"Unknown columns: {', '.join(sorted(unknown))}"
+        if 'Name' in values and not str(values['Name']).strip():
+            return False, "Name cannot be empty!"
+        if 'Hours' in values and str(values['Hours']).strip() and \
+                pd.isna(pd.to_numeric(str(values['Hours']).strip(), errors='coerce')):
+            return False, "Hours must be a number!"
+        if 'Timestamp' in values and parse_timestamps(pd.Series([values['Timestamp']], dtype=object))[1].any():
+            return False, "Timestamp must be a date!"
+        try:
+            with self._writing():
+                df = self._load()
+                if 'Name' in values:
+                    # Same spelling as the person's other entries, as add_person_info does
+                    values = {**values, 'Name': self._names.canonical(values['Name']) or values['Name']}
+                ids = pd.Index(ids, dtype='int64')
+                ids = ids[ids.isin(df.index)].unique()
+                if not len(ids):
+                    return True, "Nothing to update."
+                self._update_rows(coerce(df.loc[ids].assign(**values))[0])
+            return True, f"Updated {len(ids)} entries"
+        except Exception as e:
+            return False, f"Error updating entries: {str(e)}"
+
     def add_entry(self, name, timestamp, location, event, hours):
         """Add an entry with an existing timestamp (for undo functionality)"""
+        return self.restore_entries([{
+            'Name': name,
+            'Timestamp': timestamp,
+            'Location': location,
+            'Event': event,
+            'Hours': hours
+        }])
+
+    def restore_entries(self, rows):
+        """Add back several entries (with their timestamps) in a single write
+
+        Rows with an Id come back under it, unless an entry with that id is
+        already stored, so restoring twice doesn't duplicate them.
+        """
         try:
-            df = pd.read_csv(self.file_path)
-            
-            new_data = {
-                'Name': [name],
-                'Location': [location],
-                'Event': [event],
-                'Hours': [hours],
-                'Timestamp': [timestamp]
-            }
-            
-            df = pd.concat([df, pd.DataFrame(new_data)], ignore_index=True)
-            df.to_csv(self.file_path, index=False)
-            
+            if not rows:
+                return True
+            new_df = pd.DataFrame(rows, columns=REQUIRED_COLUMNS)
+            ids = self._row_ids(rows)
+            with self._writing():
+                df = self._load()
+                if ids is not None:
+                    # Perhaps restored already, here or on another kiosk
+                    keep = ~np.isin(ids, df.index) & ~pd.Series(ids).duplicated().to_numpy()
+                    new_df, ids = new_df[keep], ids[keep]
+                if len(new_df):
+                    self._append_rows(new_df, op='restore', ids=ids)
             return True
         except Exception as e:
-            print(f"Error adding entry: {str(e)}")
+            print(f"Error restoring entries: {str(e)}")
             return False
-            
+
     def get_password(self):
         """Get the saved admin password or return default if not set"""
         password_file = "admin_password.txt"
@@ -0,0 +1,8 @@
+# Change events passed to DataManager subscribers as (kind, payload)
+# Kept apart from data_manager so the GUI can use them without importing pandas
+ROWS_ADDED = 'rows_added'          # payload: list of records, each with its Id
+ROWS_REMOVED = 'rows_removed'      # payload: list of records, each with its Id
+ROWS_UPDATED = 'rows_updated'      # payload: list of (old record, new record) pairs
+PEOPLE_ADDED = 'people_added'      # payload: list of canonical names
+PEOPLE_REMOVED = 'people_removed'  # payload: list of canonical names
+RELOADED = 'reloaded'              # payload: None; the table was re-read from storage
@@ -1,8 +1,90 @@
 import tkinter as tk
+import bisect
+import queue
+import threading
 from tkinter import ttk, messagebox, filedialog
-from datetime import datetime
-from data_manager import DataManager
-from utils import validate_input
+from datetime import datetime, timedelta
+# Nothing here imports pandas; data_manager is loaded on the I/O thread after the window is up
+from events import ROWS_ADDED, ROWS_REMOVED, ROWS_UPDATED, PEOPLE_ADDED, PEOPLE_REMOVED, RELOADED
+from io_worker import AsyncDataManager, run_in_thread
+import instrumentation
+from utils import validate_input, data_file_path, read_names, search_words, matches_words
+
+# How often the Tk loop checks on background jobs, in milliseconds
+POLL_INTERVAL_MS = 50
+
+# Rows fetched from DataManager per request by the entries view
+ENTRY_PAGE_SIZE = 200
+# Extra rows fetched past the visible window so short scrolls don't wait on I/O
+ENTRY_BUFFER_ROWS = 50
+
+# Pause after the last keystroke before the people list is filtered, in milliseconds
+SEARCH_DEBOUNCE_MS = 120
+
+# Entries view column -> the DataManager column it sorts by
+SORT_COLUMNS = {'Name': 'Name', 'Date': 'Timestamp', 'Location': 'Location', 'Event': 'Event', 'Hours': 'Hours'}
+# Quick choices for the entries view's date filter
+DATE_RANGES = ['All dates', 'Today', 'This week', 'This month', 'This year']
+
+def display_value(value):
+    """Show missing values as blank cells instead of 'nan', and whole hours without '.0'"""
+    # NaN and NaT are the only values not equal to themselves
+    if value is None or value != value:
+        return ''
+    if isinstance(value, float):
+        return f"{value:g}"
+    return value
+
+def entry_values(record):
+    """Treeview cell values for an entry record"""
+    return (
+        display_value(record['Name']),
+        display_value(record['Timestamp']),
+        display_value(record['Location']),
+        display_value(record['Event']),
+        display_value(record['Hours'])
+    )
+
+def entry_sort_key(record, column='Name'):
+    """Sort key matching DataManager's order for a column: the value, then row Id
+
+    Text compares case-insensitively, and missing dates and hours sort last.
+    """
+    value = record[column]
+    if column in ('Timestamp', 'Hours'):
+        missing = value is None or value != value
+        return (missing, 0 if missing else value, record['Id'])
+    return (str(value).lower(), record['Id'])
+
+class Descending:
+    """Sort key wrapper that orders larger keys first, so bisect works on descending lists"""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+def date_range(choice, today=None):
+    """Return the first and last day of one of DATE_RANGES as YYYY-MM-DD, or blanks for all dates"""
+    today = today or datetime.now().date()
+    if choice == 'Today':
+        first, last = today, today
+    elif choice == 'This week':
+        first = today - timedelta(days=today.weekday())
+        last = first + timedelta(days=6)
+    elif choice == 'This month':
+        first = today.replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    elif choice == 'This year':
+        first, last = today.replace(month=1, day=1), today.replace(month=12, day=31)
+    else:
+        return '', ''
+    return first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
 
 class PasswordDialog(tk.Toplevel):
     def __init__(self, parent, change_password=False):
@@ -167,7 +249,8 @@ class InfoDialog(tk.Toplevel):
             'location': self.location_entry.get().strip(),
             'event': self.event_entry.get().strip(),
             'hours': self.hours_entry.get().strip(),
-            'timestamp': current_date
+            'timestamp': current_date,
+            'date': self.date_entry.get().strip()
         }
         self.destroy()
 
@@ -175,20 +258,713 @@ class InfoDialog(tk.Toplevel):
         self.result = None
         self.destroy()
 
+class ExportDialog(tk.Toplevel):
+    """Ask which entries and columns to export"""
+
+    # Column label shown in the dialog -> DataManager column
+    COLUMNS = {'Name': 'Name', 'Date': 'Timestamp', 'Location': 'Location', 'Event': 'Event', 'Hours': 'Hours'}
+
+    def __init__(self, parent, selected_person=None):
+        super().__init__(parent)
+        self.title("Export Entries")
+        self.resizable(False, False)
+        self.result = None
+
+        # Make dialog modal
+        self.transient(parent)
+        self.grab_set()
+
+        main_frame = ttk.Frame(self, padding="20")
+        main_frame.pack(fill="both", expand=True)
+
+        # Which entries
+        self.export_all = tk.BooleanVar(value=selected_person is None)
+        ttk.Radiobutton(main_frame, text="All entries", variable=self.export_all,
+                        value=True).grid(row=0, column=0, columnspan=2, sticky="w")
+        person_button = ttk.Radiobutton(main_frame, text=f"Entries for {selected_person or 'selected person'}",
+                                        variable=self.export_all, value=False)
+        person_button.grid(row=1, column=0, columnspan=2, sticky="w", pady=(0, 10))
+        if selected_person is None:
+            person_button.configure(state="disabled")
+
+        # Optional date range
+        ttk.Label(main_frame, text="From (YYYY-MM-DD):").grid(row=2, column=0, sticky="w", pady=5)
+        self.start_entry = ttk.Entry(main_frame, width=15)
+        self.start_entry.grid(row=2, column=1, sticky="w", pady=5)
+        ttk.Label(main_frame, text="To (YYYY-MM-DD):").grid(row=3, column=0, sticky="w", pady=5)
+        self.end_entry = ttk.Entry(main_frame, width=15)
+        self.end_entry.grid(row=3, column=1, sticky="w", pady=5)
+
+        # Columns to include
+        columns_frame = ttk.LabelFrame(main_frame, text="Columns", padding="5")
+        columns_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=10)
+        self.column_vars = {}
+        for label in self.COLUMNS:
+            self.column_vars[label] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(columns_frame, text=label, variable=self.column_vars[label]).pack(side="left")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(button_frame, text="Export", command=self.submit, width=10).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel, width=10).pack(side="left", padx=10)
+
+        self.center_on_parent()
+
+    def center_on_parent(self):
+        self.update_idletasks()
+        parent = self.master
+        x = parent.winfo_x() + (parent.winfo_width() - self.winfo_width()) // 2
+        y = parent.winfo_y() + (parent.winfo_height() - self.winfo_height()) // 2
+        self.geometry(f"+{x}+{y}")
+
+    def submit(self):
+        columns = [column for label, column in self.COLUMNS.items() if self.column_vars[label].get()]
+        if not columns:
+            messagebox.showerror("Error", "Please choose at least one column!", parent=self)
+            return
+        self.result = {
+            'export_all': self.export_all.get(),
+            'columns': columns,
+            'start': self.start_entry.get().strip() or None,
+            'end': self.end_entry.get().strip() or None
+        }
+        self.destroy()
+
+    def cancel(self):
+        self.result = None
+        self.destroy()
+
+class DiagnosticsDialog(tk.Toplevel):
+    """Timings collected by the instrumentation module, plus the slow-operation log"""
+
+    COLUMNS = ('Operation', 'Calls', 'Mean ms', 'p50 ms', 'p95 ms', 'Max ms', 'Rows', 'Bytes')
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnostics")
+        self.geometry("760x480")
+        self.transient(parent)
+
+        main_frame = ttk.Frame(self, padding="10")
+        main_frame.pack(fill="both", expand=True)
+
+        if not instrumentation.ENABLED:
+            ttk.Label(main_frame, text="Timings are off. Start the program with ZF_INSTRUMENT=1 "
+                                       "(or ZF_INSTRUMENT=cprofile to also profile) to collect them.",
+                      wraplength=500).pack(anchor="w", pady=(0, 10))
+
+        self.tree = ttk.Treeview(main_frame, columns=self.COLUMNS, show='headings', height=12)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=70, anchor="e")
+        self.tree.column('Operation', width=230, anchor="w")
+        self.tree.pack(fill="both", expand=True)
+
+        ttk.Label(main_frame, text=f"Slow operations (over {instrumentation.SLOW_MS:g} ms)").pack(
+            anchor="w", pady=(10, 0))
+        self.slow_text = tk.Text(main_frame, height=8, wrap="none")
+        self.slow_text.pack(fill="both", expand=True)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill="x", pady=(10, 0))
+        ttk.Button(button_frame, text="Refresh", command=self.refresh, width=10).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Reset", command=self.reset, width=10).pack(side="left", padx=5)
+        if instrumentation.PROFILE:
+            ttk.Button(button_frame, text="Save Profile", command=self.save_profile,
+                       width=12).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Close", command=self.destroy, width=10).pack(side="right", padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for name, stats in instrumentation.recorder.snapshot():
+            self.tree.insert('', 'end', values=(
+                name, stats.calls, f"{stats.total_ms / stats.calls:.1f}",
+                f"{stats.percentile(0.5):.1f}", f"{stats.percentile(0.95):.1f}",
+                f"{stats.max_ms:.1f}", stats.rows, stats.bytes))
+        self.slow_text.delete('1.0', 'end')
+        self.slow_text.insert('end', '\n'.join(instrumentation.recorder.slow))
+
+    def reset(self):
+        instrumentation.recorder.reset()
+        self.refresh()
+
+    def save_profile(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".pstats",
+                                            initialfile=instrumentation.PROFILE_PATH,
+                                            filetypes=[("Profile", "*.pstats")])
+        if not path:
+            return
+        if instrumentation.recorder.save_profile(path):
+            messagebox.showinfo("Success", f"Profile saved to {path}", parent=self)
+        else:
+            messagebox.showerror("Error", "No profile has been recorded yet!", parent=self)
+
+class DuplicatesDialog(tk.Toplevel):
+    """Groups of names that are probably one person, merged a group at a time
+
+    merge(names, canonical, on_merged) does the work; on_merged is called
+    once the entries have been renamed.
+    """
+
+    def __init__(self, parent, groups, merge):
+        super().__init__(parent)
+        self.title("Possible Duplicates")
+        self.geometry("420x400")
+        self.transient(parent)
+        self.grab_set()
+        self.merge = merge
+        # Tree item of each group -> names in it
+        self.groups = {}
+
+        main_frame = ttk.Frame(self, padding="10")
+        main_frame.pack(fill="both", expand=True)
+        ttk.Label(main_frame, text="Select the spelling to keep, then Merge. "
+                                   "The first name in each group has the most entries.",
+                  wraplength=380).pack(anchor="w", pady=(0, 10))
+
+        self.tree = ttk.Treeview(main_frame, columns=('Entries',), show='tree headings', height=12)
+        self.tree.heading('#0', text='Name')
+        self.tree.heading('Entries', text='Entries')
+        self.tree.column('Entries', width=70, anchor="e")
+        self.tree.pack(fill="both", expand=True)
+        for group in groups:
+            item = self.tree.insert('', 'end', text=group[0][0], values=(sum(count for name, count in group),),
+                                    open=True)
+            self.groups[item] = [name for name, count in group]
+            for name, count in group:
+                self.tree.insert(item, 'end', text=name, values=(count,))
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill="x", pady=(10, 0))
+        ttk.Button(button_frame, text="Merge", command=self.merge_selected, width=10).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Close", command=self.destroy, width=10).pack(side="right", padx=5)
+
+    def merge_selected(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showinfo("Information", "Please select a name to keep", parent=self)
+            return
+        item = selection[0]
+        group = self.tree.parent(item) or item
+        names = self.groups[group]
+        # Selecting the group itself keeps its busiest name
+        canonical = self.tree.item(item, 'text')
+        if not messagebox.askyesno("Confirm Merge", f"Rename every entry of {', '.join(names)} to {canonical}?",
+                                   parent=self):
+            return
+
+        def on_merged():
+            del self.groups[group]
+            if self.winfo_exists():
+                self.tree.delete(group)
+
+        self.merge(names, canonical, on_merged)
+
+class EntriesView(ttk.Frame):
+    """Treeview that holds only the visible rows and pages the rest in from DataManager
+
+    The scrollbar is driven by the true row count, so it behaves as if every
+    entry were in the tree. Tree items are keyed by row Id, so changes are
+    applied as small inserts and deletes rather than a full redraw.
+    """
+
+    def __init__(self, parent, io, run_async):
+        super().__init__(parent)
+        self.io = io
+        self.run_async = run_async
+
+        # Keyword arguments passed to DataManager.get_entries_page (e.g. name=...);
+        # None until the view is first shown
+        self.query = None
+        # The person filter given to show(), kept while dates and sorting change
+        self.base_query = {}
+        self.base_matches = lambda record: True
+        # Date filter as YYYY-MM-DD text, and as datetimes [start, end) for matching records
+        self.start = self.end = None
+        self.start_time = self.end_time = None
+        # Words every shown row's Location or Event must have a word starting with
+        self.text = ''
+        self.terms = []
+        self.search_job = None
+        # Heading the view is sorted by and its direction
+        self.sort_column = 'Name'
+        self.descending = False
+        # Which records belong in the view, and the order DataManager sorts them in
+        self.matches = lambda record: True
+        self.sort_key = entry_sort_key
+        self.offset = 0
+        self.total = None
+        # A contiguous run of fetched records starting at row block_start, with their sort keys
+        self.block_start = None
+        self.block = []
+        self.block_keys = []
+        # Records currently drawn in the tree by iid
+        self.records = {}
+        # Bumped whenever the query or data changes so stale fetches are ignored
+        self.generation = 0
+        self.pending_fetch = None
+        # DataManager version the block reflects; fetches and change events arrive through
+        # separate polls, so events the fetched rows already include are skipped
+        self.version = 0
+
+        # Date filter above the table
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(side="top", fill="x", pady=(0, 5))
+
+        ttk.Label(filter_frame, text="Show:").pack(side="left", padx=(0, 5))
+        self.range_var = tk.StringVar(value=DATE_RANGES[0])
+        range_menu = ttk.Combobox(filter_frame, textvariable=self.range_var, values=DATE_RANGES,
+                                  state="readonly", width=12)
+        range_menu.pack(side="left")
+        range_menu.bind('<<ComboboxSelected>>', self.on_range_selected)
+
+        ttk.Label(filter_frame, text="From:").pack(side="left", padx=(10, 5))
+        self.from_var = tk.StringVar()
+        from_entry = ttk.Entry(filter_frame, textvariable=self.from_var, width=11)
+        from_entry.pack(side="left")
+        ttk.Label(filter_frame, text="To:").pack(side="left", padx=(10, 5))
+        self.to_var = tk.StringVar()
+        to_entry = ttk.Entry(filter_frame, textvariable=self.to_var, width=11)
+        to_entry.pack(side="left")
+        for entry in (from_entry, to_entry):
+            entry.bind('<Return>', lambda event: self.apply_dates())
+        ttk.Button(filter_frame, text="Apply", command=self.apply_dates, width=8).pack(side="left", padx=(10, 0))
+
+        # Search over Location and Event, e.g. "food pack"
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=20)
+        search_entry.pack(side="right")
+        ttk.Label(filter_frame, text="Search:").pack(side="right", padx=(10, 5))
+        self.search_var.trace_add("write", self.on_search_changed)
+
+        # Create Treeview for spreadsheet-like display
+        self.tree = ttk.Treeview(self, columns=('Name', 'Date', 'Location', 'Event', 'Hours'), show='headings')
+
+        # Define column headings; clicking one sorts by it, clicking again reverses the order
+        for column in SORT_COLUMNS:
+            self.tree.heading(column, text=column, command=lambda column=column: self.sort_by(column))
+
+        # Configure column widths
+        self.tree.column('Name', width=150)
+        self.tree.column('Date', width=150)
+        self.tree.column('Location', width=150)
+        self.tree.column('Event', width=150)
+        self.tree.column('Hours', width=100)
+
+        # The scrollbar moves our window over the data rather than the tree itself
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Redraw when the visible row count changes, and scroll with the wheel and page keys
+        self.tree.bind('<Configure>', lambda event: self.render())
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', self.on_mousewheel)
+        self.tree.bind('<Button-5>', self.on_mousewheel)
+        self.tree.bind('<Prior>', lambda event: self.on_scroll('scroll', -1, 'pages'))
+        self.tree.bind('<Next>', lambda event: self.on_scroll('scroll', 1, 'pages'))
+
+    def show(self, matches=None, **query):
+        """Switch to a new set of entries and scroll to the top
+
+        matches(record) must agree with the query so that change events can
+        be filtered without asking DataManager. The date filter and sort
+        order stay as they are.
+        """
+        self.base_query = query
+        self.base_matches = matches or (lambda record: True)
+        self.update_query()
+
+    def update_query(self):
+        """Combine the person, dates and sort order into the query and scroll to the top"""
+        self.query = dict(self.base_query, sort=SORT_COLUMNS[self.sort_column], descending=self.descending,
+                          start=self.start, end=self.end, text=self.text)
+
+        def matches(record):
+            if not self.base_matches(record):
+                return False
+            if self.terms and not matches_words(self.terms, (record['Location'], record['Event'])):
+                return False
+            # Comparisons with a missing date are False, so undated rows drop out as in DataManager
+            timestamp = record['Timestamp']
+            return ((self.start_time is None or timestamp >= self.start_time)
+                    and (self.end_time is None or timestamp < self.end_time))
+        self.matches = matches
+
+        column = SORT_COLUMNS[self.sort_column]
+        if self.descending:
+            self.sort_key = lambda record: Descending(entry_sort_key(record, column))
+        else:
+            self.sort_key = lambda record: entry_sort_key(record, column)
+        self.offset = 0
+        self.total = None
+        self.refresh()
+
+    def sort_by(self, column):
+        """Sort by a column, or reverse the order if it already is"""
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        for name in SORT_COLUMNS:
+            arrow = (' \u25bc' if self.descending else ' \u25b2') if name == column else ''
+            self.tree.heading(name, text=name + arrow)
+        if self.query is not None:
+            self.update_query()
+
+    def on_range_selected(self, event=None):
+        first, last = date_range(self.range_var.get())
+        self.from_var.set(first)
+        self.to_var.set(last)
+        self.apply_dates()
+
+    def on_search_changed(self, *args):
+        """Search once typing pauses"""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_job = None
+        text = self.search_var.get().strip()
+        if text == self.text:
+            return
+        self.text = text
+        self.terms = search_words(text)
+        if self.query is not None:
+            self.update_query()
+
+    def apply_dates(self):
+        """Filter by the From and To days, either of which may be left blank"""
+        start, end = self.from_var.get().strip(), self.to_var.get().strip()
+        try:
+            start_time = datetime.strptime(start, "%Y-%m-%d") if start else None
+            end_time = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format!")
+            return
+        if (start, end) != date_range(self.range_var.get()):
+            self.range_var.set('Custom')
+        self.start, self.end = start or None, end or None
+        self.start_time, self.end_time = start_time, end_time
+        if self.query is not None:
+            self.update_query()
+
+    def refresh(self):
+        """Drop fetched rows and redraw the current window from DataManager"""
+        self.generation += 1
+        self.block_start = None
+        self.block = []
+        self.block_keys = []
+        self.pending_fetch = None
+        self.render()
+
+    def visible_rows(self):
+        """How many rows fit in the tree at its current size"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return int(self.tree.cget('height'))
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        # Leave room for the heading row
+        return max(1, (height - 25) // int(row_height))
+
+    def render(self):
+        """Draw the rows at the current offset, fetching them if they aren't loaded"""
+        if self.query is None:
+            return
+        visible = self.visible_rows()
+        if self.total is not None:
+            self.offset = max(0, min(self.offset, self.total - visible))
+
+        # Fetch a fresh block if the window isn't covered by the one we have
+        end = self.offset + visible
+        if self.total is not None:
+            end = min(end, self.total)
+        if (self.block_start is None or self.offset < self.block_start
+                or end > self.block_start + len(self.block)):
+            start = max(0, self.offset - ENTRY_BUFFER_ROWS)
+            self.fetch(start, max(ENTRY_PAGE_SIZE, visible + 2 * ENTRY_BUFFER_ROWS))
+            return
+
+        start = self.offset - self.block_start
+        self.draw(self.block[start:start + visible])
+
+    def fetch(self, offset, limit):
+        """Load a block of rows in the background and redraw when it arrives"""
+        request = (self.generation, offset, limit)
+        if self.pending_fetch == request:
+            return
+        self.pending_fetch = request
+        generation = self.generation
+
+        def on_done(result):
+            if generation != self.generation:
+                return
+            version, total, records = result
+            if version < self.version:
+                # Changes newer than these rows were applied meanwhile; ask again
+                self.refresh()
+                return
+            self.pending_fetch = None
+            self.version = version
+            self.total = total
+            self.block_start = offset
+            self.block = records
+            self.block_keys = [self.sort_key(record) for record in records]
+            self.render()
+
+        future = self.io.get_entries_window(offset, limit, **self.query)
+        busy_text = "Loading entries..." if self.total is None else None
+        self.run_async(future, on_done, busy_text=busy_text, error_text="Failed to load entries",
+                       name='get_entries_window')
+
+    def draw(self, records):
+        """Make the tree show exactly these records, touching only the rows that changed"""
+        wanted = {str(record['Id']): record for record in records}
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+
+        for index, (iid, record) in enumerate(wanted.items()):
+            if iid in self.records and self.tree.exists(iid):
+                if self.records[iid] is not record:
+                    self.tree.item(iid, values=entry_values(record))
+                self.tree.move(iid, '', index)
+            else:
+                self.tree.insert('', index, iid=iid, values=entry_values(record))
+        self.records = wanted
+
+        # Size the scrollbar thumb by the window's share of all rows
+        if self.total:
+            first = self.offset / self.total
+            self.scrollbar.set(first, min(1.0, first + len(records) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def is_new(self, version):
+        """Whether a change event at version isn't already part of the fetched rows"""
+        if version <= self.version:
+            return False
+        self.version = version
+        return True
+
+    def rows_added(self, records, version):
+        """Apply newly stored rows to the fetched block"""
+        if self.is_new(version):
+            self.add_records(records)
+
+    def rows_removed(self, records, version):
+        """Remove deleted rows from the fetched block"""
+        if self.is_new(version):
+            self.remove_records(records)
+
+    def rows_updated(self, pairs, version):
+        """Apply edited rows as a removal followed by an insert"""
+        if self.is_new(version):
+            self.remove_records([old for old, new in pairs])
+            self.add_records([new for old, new in pairs])
+
+    def add_records(self, records):
+        """Place stored rows that belong in the view in the fetched block"""
+        records = [record for record in records if self.matches(record)]
+        if self.query is None or not records:
+            return
+        if self.total is None or len(records) > ENTRY_PAGE_SIZE:
+            # Too many to place one by one; fetch the window again
+            self.refresh()
+            return
+        for record in records:
+            key = self.sort_key(record)
+            block_end = self.block_start + len(self.block) if self.block_start is not None else 0
+            if self.block_start is not None and self.block_keys and key < self.block_keys[0]:
+                # Before the block: everything shifts down one, keep the same rows on screen
+                self.block_start += 1
+                self.offset += 1
+            elif self.block_start is not None and (
+                    (self.block_keys and key < self.block_keys[-1]) or block_end >= self.total):
+                position = bisect.bisect_left(self.block_keys, key)
+                self.block_keys.insert(position, key)
+                self.block.insert(position, record)
+            self.total += 1
+        self.render()
+
+    def remove_records(self, records):
+        """Take deleted rows that were in the view out of the fetched block"""
+        records = [record for record in records if self.matches(record)]
+        if self.query is None or not records:
+            return
+        if self.total is None or len(records) > ENTRY_PAGE_SIZE:
+            self.refresh()
+            return
+        for record in records:
+            key = self.sort_key(record)
+            if self.block_start is not None and self.block_keys and key < self.block_keys[0]:
+                self.block_start -= 1
+                self.offset -= 1
+            elif self.block_keys:
+                position = bisect.bisect_left(self.block_keys, key)
+                if position < len(self.block_keys) and self.block_keys[position] == key:
+                    del self.block_keys[position]
+                    del self.block[position]
+            self.total -= 1
+        self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        """Handle scrollbar drags and clicks"""
+        if action == 'moveto':
+            self.offset = int(float(amount) * (self.total or 0))
+        elif unit == 'pages':
+            self.offset += int(amount) * self.visible_rows()
+        else:
+            self.offset += int(amount)
+        self.render()
+
+    def on_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.on_scroll('scroll', -3)
+        else:
+            self.on_scroll('scroll', 3)
+        return "break"
+
+    def selected_records(self):
+        """Return the records behind the selected rows"""
+        return [self.records[iid] for iid in self.tree.selection() if iid in self.records]
+
+
+class ReportView(ttk.Frame):
+    """Total hours and entries grouped by volunteer, event, location or month"""
+
+    # Label shown in the grouping menu -> DataManager.get_report grouping
+    GROUPINGS = {'Volunteer': 'person', 'Event': 'event', 'Location': 'location', 'Month': 'month'}
+    ALL_YEARS = 'All years'
+
+    def __init__(self, parent, io, run_async):
+        super().__init__(parent)
+        self.io = io
+        self.run_async = run_async
+        # Set when the data changes while the report is hidden
+        self.stale = True
+
+        controls = ttk.Frame(self)
+        controls.pack(fill="x", pady=(0, 5))
+
+        ttk.Label(controls, text="Group by:").pack(side="left", padx=(0, 5))
+        self.grouping = ttk.Combobox(controls, values=list(self.GROUPINGS), state="readonly", width=12)
+        self.grouping.set('Volunteer')
+        self.grouping.pack(side="left", padx=(0, 10))
+        self.grouping.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+
+        ttk.Label(controls, text="Year:").pack(side="left", padx=(0, 5))
+        self.year = ttk.Combobox(controls, values=[self.ALL_YEARS], state="readonly", width=10)
+        self.year.set(self.ALL_YEARS)
+        self.year.pack(side="left")
+        self.year.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+
+        self.tree = ttk.Treeview(self, columns=('Group', 'Hours', 'Entries'), show='headings')
+        self.tree.heading('Group', text='Volunteer')
+        self.tree.heading('Hours', text='Hours')
+        self.tree.heading('Entries', text='Entries')
+        self.tree.column('Group', width=250)
+        self.tree.column('Hours', width=100, anchor="e")
+        self.tree.column('Entries', width=100, anchor="e")
+
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # Catch up on changes made while hidden
+        self.bind('<Map>', lambda event: self.stale and self.refresh())
+
+    def invalidate(self):
+        """Refresh now if the report is on screen, otherwise when it is next shown"""
+        if self.winfo_ismapped():
+            self.refresh()
+        else:
+            self.stale = True
+
+    def refresh(self):
+        self.stale = False
+        label = self.grouping.get()
+        year = self.year.get()
+        year = None if year == self.ALL_YEARS else year
+
+        def on_done(rows):
+            self.tree.heading('Group', text=label)
+            self.tree.delete(*self.tree.get_children())
+            for value, hours, entries in rows:
+                self.tree.insert('', 'end', values=(value or '(none)', f"{hours:g}", entries))
+
+        self.run_async(self.io.get_report_years(), self.fill_years)
+        self.run_async(self.io.get_report(self.GROUPINGS[label], year), on_done,
+                       error_text="Could not build report", name='get_report')
+
+    def fill_years(self, years):
+        self.year.configure(values=[self.ALL_YEARS] + years)
+
+
 class MainApplication(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
         ttk.Frame.__init__(self, parent, *args, **kwargs)
         self.parent = parent
-        self.data_manager = DataManager()
-        # Load password from file via DataManager
-        self.ADMIN_PASSWORD = self.data_manager.get_password()
+        # Run DataManager calls on a background thread so the window never blocks on disk;
+        # the DataManager itself, and pandas with it, is created there too
+        self.io = AsyncDataManager(factory=self.create_data_manager)
+        # Load password from file via DataManager; read when first needed
+        self.ADMIN_PASSWORD = None
+        self.password_future = self.io.get_password()
         # Track deleted entries for undo functionality
         self.deleted_entries = []
+        # Busy indicator state for background jobs
+        self.busy_jobs = 0
+        self.progress_text = ""
+        self.cancel_event = None
+        # Lowercased names in listbox order, for placing added and removed people
+        self.people_keys = []
+        # Names read straight from the data file, shown until the full table is loaded
+        self.preview_people = []
+        self.people_loaded = False
+        # Pending after() id for the debounced people search
+        self.search_job = None
+        # Change events from DataManager, queued by the I/O thread for the Tk loop
+        self.changes = queue.Queue()
 
         self.create_widgets()
+        self.run_async(run_in_thread(read_names, data_file_path()), self.fill_preview)
         self.refresh_people_list()
+        self.after(POLL_INTERVAL_MS, self.process_changes)
+
+    @property
+    def data_manager(self):
+        """The DataManager, or None while it is still being created"""
+        return self.io.data_manager
+
+    def create_data_manager(self):
+        """Build the DataManager; runs on the I/O thread"""
+        from data_manager import DataManager
+        data_manager = DataManager()
+        # Time DataManager calls when ZF_INSTRUMENT is set; a no-op otherwise
+        instrumentation.instrument(data_manager)
+        instrumentation.instrument(data_manager, ['_load'])
+        # Tagged with the version each change brought the table to, so the entries view can skip
+        # changes a fetch already saw
+        data_manager.subscribe(lambda kind, payload: self.changes.put((kind, payload, data_manager.version)))
+        return data_manager
 
     def create_widgets(self):
+        # Status bar with a busy indicator for background work
+        self.status_frame = ttk.Frame(self)
+        self.status_frame.pack(side="bottom", fill="x", padx=10)
+
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side="left")
+
+        # Shown only while a job is running
+        self.busy_bar = ttk.Progressbar(self.status_frame, mode="indeterminate", length=120)
+        self.cancel_button = ttk.Button(self.status_frame, text="Cancel",
+                                        command=self.cancel_operation, width=10)
+
         # Create main containers
         self.left_frame = ttk.Frame(self, relief="solid", borderwidth=1)
         self.right_frame = ttk.Frame(self, relief="solid", borderwidth=1)
@@ -224,6 +1000,20 @@ class MainApplication(ttk.Frame):
                               command=self.add_new_person, style='Accent.TButton')
         add_button.pack(side="right")
 
+        # Type-ahead search over the people list
+        search_frame = ttk.Frame(self.left_frame)
+        search_frame.pack(fill="x", pady=(0, 5))
+
+        ttk.Label(search_frame, text="Search:").pack(side="left", padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side="left", fill="x", expand=True)
+        self.search_var.trace_add("write", self.on_search_changed)
+
+        self.match_anywhere_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Anywhere", variable=self.match_anywhere_var,
+                        command=self.apply_people_filter).pack(side="left", padx=(5, 0))
+
         # People listbox with scrollbar
         listbox_frame = ttk.Frame(self.left_frame)
         listbox_frame.pack(fill="both", expand=True)
@@ -281,6 +1071,16 @@ class MainApplication(ttk.Frame):
                                  command=self.export_entries, width=10)
         export_button.pack(side="right", padx=5)
 
+        # Add diagnostics button
+        diagnostics_button = ttk.Button(self.buttons_frame, text="Diagnostics",
+                                        command=lambda: DiagnosticsDialog(self), width=12)
+        diagnostics_button.pack(side="right", padx=5)
+
+        # Add find duplicates button
+        duplicates_button = ttk.Button(self.buttons_frame, text="Find Duplicates",
+                                       command=self.find_duplicates, width=15)
+        duplicates_button.pack(side="right", padx=5)
+
         # Add close button
         close_button = ttk.Button(self.buttons_frame, text="Close", 
                                 command=self.close_entries_view, width=10)
@@ -291,29 +1091,17 @@ class MainApplication(ttk.Frame):
         import_button.pack(side="right", padx=5)
 
 
-        # Create Treeview for spreadsheet-like display
-        self.tree = ttk.Treeview(self.entries_frame, columns=('Name', 'Date', 'Location', 'Event', 'Hours'), show='headings')
-
-        # Define column headings
-        self.tree.heading('Name', text='Name')
-        self.tree.heading('Date', text='Date')
-        self.tree.heading('Location', text='Location')
-        self.tree.heading('Event', text='Event')
-        self.tree.heading('Hours', text='Hours')
-
-        # Configure column widths
-        self.tree.column('Name', width=150)
-        self.tree.column('Date', width=150)
-        self.tree.column('Location', width=150)
-        self.tree.column('Event', width=150)
-        self.tree.column('Hours', width=100)
+        # Entries and report side by side as notebook tabs
+        self.entries_notebook = ttk.Notebook(self.entries_frame)
+        self.entries_notebook.pack(fill="both", expand=True)
 
-        # Add scrollbar to treeview
-        tree_scroll = ttk.Scrollbar(self.entries_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scroll.set)
+        # Paged Treeview for spreadsheet-like display
+        self.entries_view = EntriesView(self.entries_notebook, self.io, self.run_async)
+        self.entries_notebook.add(self.entries_view, text="Entries")
+        self.tree = self.entries_view.tree
 
-        self.tree.pack(side="left", fill="both", expand=True)
-        tree_scroll.pack(side="right", fill="y")
+        self.report_view = ReportView(self.entries_notebook, self.io, self.run_async)
+        self.entries_notebook.add(self.report_view, text="Report")
 
         # Initially hide the entries frame and right frame
         self.entries_frame.pack_forget()
@@ -376,47 +1164,24 @@ class MainApplication(ttk.Frame):
             self.new_person_entry.focus_set()
 
     def export_entries(self):
-        from tkinter import filedialog, simpledialog
-        import csv
-
-        # Ask if user wants to export all entries or just selected person
-        has_selection = bool(self.people_listbox.curselection())
-
-        if has_selection:
+        # Ask which entries and columns to export
+        selected_person = None
+        if self.people_listbox.curselection():
             selected_person = self.people_listbox.get(self.people_listbox.curselection())
-            options = ["Selected Person", "All Entries"]
-            choice = simpledialog.askstring(
-                "Export Options", 
-                f"Export entries for {selected_person} or all entries?",
-                initialvalue="Selected Person"
-            )
-
-            if not choice:  # User canceled
-                return
-
-            export_all = (choice.lower() == "all entries")
-        else:
-            export_all = True
-
-        # Get the records
-        if export_all:
-            records = self.data_manager.get_all_entries()
-            if not records:
-                messagebox.showinfo("Information", "No records to export")
-                return
-            export_title = "All Entries"
-        else:
-            records = self.data_manager.get_person_info(selected_person)
-            if not records:
-                messagebox.showinfo("Information", "No records to export for this person")
-                return
-            export_title = f"Entries for {selected_person}"
+        dialog = ExportDialog(self, selected_person)
+        self.wait_window(dialog)
+        if not dialog.result:
+            return
+        options = dialog.result
+        export_all = options['export_all']
 
         # Ask user for file location with a default filename
+        export_title = "All Entries" if export_all else f"Entries for {selected_person}"
         default_filename = f"exported_{export_title.replace(' ', '_')}.csv"
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[("CSV files", "*.csv"), ("Tab-separated files", "*.tsv"),
+                       ("JSON Lines files", "*.jsonl"), ("All files", "*.*")],
             title=f"Export {export_title}",
             initialfile=default_filename
         )
@@ -424,37 +1189,216 @@ class MainApplication(ttk.Frame):
         if not filename:  # If user cancels the save dialog
             return
 
-        # Show message about file location
-        messagebox.showinfo("Export Complete", 
-            f"File saved as: {filename}\n\n" +
-            "To download this file from Replit to your computer:\n" +
-            "1. Look for the file in the Files panel (left side)\n" +
-            "2. Right-click on the file and select 'Download'")
-
-        try:
-            with open(filename, 'w', newline='') as csvfile:
-                if export_all:
-                    fieldnames = ['Name', 'Timestamp', 'Location', 'Event', 'Hours']
-                else:
-                    fieldnames = ['Timestamp', 'Location', 'Event', 'Hours']
-
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                writer.writeheader()
-                for record in records:
-                    # Only write the specified fields
-                    filtered_record = {k: record[k] for k in fieldnames if k in record}
-                    writer.writerow(filtered_record)
+        def report_progress(rows_written, total):
+            # Runs on the I/O thread; the polling loop shows the text
+            self.progress_text = f"Exporting... {rows_written} of {total} rows"
 
-            messagebox.showinfo("Success", f"{export_title} exported to {filename}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+        def on_done(result):
+            success, message = result
+            if success:
+                # Show message about file location
+                messagebox.showinfo("Export Complete", 
+                    f"File saved as: {filename}\n\n" +
+                    "To download this file from Replit to your computer:\n" +
+                    "1. Look for the file in the Files panel (left side)\n" +
+                    "2. Right-click on the file and select 'Download'")
+                messagebox.showinfo("Success", f"{export_title} exported to {filename}")
+            else:
+                messagebox.showinfo("Export", message)
+
+        cancel = threading.Event()
+        future = self.io.export_entries(
+            filename,
+            columns=options['columns'],
+            name=None if export_all else selected_person,
+            start=options['start'],
+            end=options['end'],
+            progress=report_progress,
+            cancel=cancel
+        )
+        self.run_async(future, on_done, busy_text="Exporting...", cancel=cancel, error_text="Failed to export",
+                       name='export_entries')
+
+    def run_async(self, future, on_done, busy_text=None, cancel=None, error_text="Operation failed", name=None):
+        """Poll a background Future from the Tk loop and pass its result to on_done
+
+        With a name, the time from submit until the job finishes is recorded as
+        ui.<name> when instrumentation is on; dialogs the user had open before
+        the submit aren't counted.
+        """
+        if name:
+            instrumentation.track(f"ui.{name}", future)
+        if busy_text:
+            self.show_busy(busy_text, cancel)
+
+        def poll():
+            if not future.done():
+                if busy_text and self.progress_text:
+                    self.status_label.configure(text=self.progress_text)
+                self.after(POLL_INTERVAL_MS, poll)
+                return
+            if busy_text:
+                self.hide_busy()
+            try:
+                result = future.result()
+            except Exception as e:
+                messagebox.showerror("Error", f"{error_text}: {e}")
+                return
+            on_done(result)
+
+        self.after(POLL_INTERVAL_MS, poll)
+
+    def show_busy(self, text, cancel=None):
+        """Show the busy indicator, with a Cancel button if the job supports it"""
+        self.busy_jobs += 1
+        self.progress_text = ""
+        self.status_label.configure(text=text)
+        if self.busy_jobs == 1:
+            self.busy_bar.pack(side="right", padx=5)
+            self.busy_bar.start()
+        if cancel is not None:
+            self.cancel_event = cancel
+            self.cancel_button.pack(side="right", padx=5)
+
+    def hide_busy(self):
+        self.busy_jobs -= 1
+        if self.busy_jobs > 0:
+            return
+        self.busy_bar.stop()
+        self.busy_bar.pack_forget()
+        self.cancel_button.pack_forget()
+        self.cancel_event = None
+        self.status_label.configure(text="")
+
+    def cancel_operation(self):
+        """Ask the running import or export to stop"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.status_label.configure(text="Cancelling...")
+
+    def close(self):
+        """Finish queued background work and release the data file"""
+        self.io.shutdown(wait=True)
+        if self.data_manager is not None:
+            self.data_manager.close()
+        if instrumentation.PROFILE:
+            path = instrumentation.recorder.save_profile()
+            if path:
+                print(f"Profile written to {path}")
 
     def refresh_people_list(self):
+        busy_text = None if self.people_loaded else "Loading entries..."
+        self.run_async(self.io.get_all_people(), self.fill_people_list, busy_text=busy_text, name='get_all_people')
+
+    def fill_preview(self, people):
+        """Show names from the quick reader unless the full list already arrived"""
+        if self.people_loaded:
+            return
+        self.preview_people = people
+        if self.search_var.get().strip():
+            self.apply_people_filter()
+            return
         self.people_listbox.delete(0, tk.END)
-        people = self.data_manager.get_all_people()
+        self.people_listbox.insert(tk.END, *people)
+        self.people_keys = [person.lower() for person in people]
+
+    def fill_people_list(self, people):
+        self.people_loaded = True
+        self.preview_people = []
+        if self.search_var.get().strip():
+            # Names are already indexed in memory; show only the matching ones
+            self.apply_people_filter()
+            return
+        self.people_listbox.delete(0, tk.END)
+        self.people_listbox.insert(tk.END, *people)
+        self.people_keys = [person.lower() for person in people]
+
+    def on_search_changed(self, *args):
+        """Filter the people list once typing pauses"""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DEBOUNCE_MS, self.apply_people_filter)
+
+    def apply_people_filter(self):
+        """Show the people matching the search box, changing only rows that differ"""
+        self.search_job = None
+        mode = 'substring' if self.match_anywhere_var.get() else 'token'
+        if self.people_loaded:
+            # Searches a copy of the names without the data lock, so a reload or import never stalls typing
+            people = self.data_manager.search_people(self.search_var.get(), mode)
+        else:
+            # No name index yet; match the preview names directly
+            text = self.search_var.get().strip().lower()
+            people = [person for person in self.preview_people
+                      if (text in person.lower() if mode == 'substring'
+                          else any(word.startswith(text) for word in person.lower().split()))]
+        wanted = {person.lower() for person in people}
+
+        # Delete runs of rows that no longer match, from the bottom up so indexes stay valid
+        index = len(self.people_keys) - 1
+        while index >= 0:
+            if self.people_keys[index] in wanted:
+                index -= 1
+                continue
+            end = index
+            while index >= 0 and self.people_keys[index] not in wanted:
+                index -= 1
+            self.people_listbox.delete(index + 1, end)
+            del self.people_keys[index + 1:end + 1]
+
         for person in people:
-            self.people_listbox.insert(tk.END, person)
+            self.insert_person(person)
+
+    def insert_person(self, name):
+        """Insert a name into the people list at its sorted position"""
+        key = name.lower()
+        index = bisect.bisect_left(self.people_keys, key)
+        if index < len(self.people_keys) and self.people_keys[index] == key:
+            return
+        self.people_keys.insert(index, key)
+        self.people_listbox.insert(index, name)
+
+    def remove_person(self, name):
+        """Remove a name from the people list"""
+        key = name.lower()
+        index = bisect.bisect_left(self.people_keys, key)
+        if index < len(self.people_keys) and self.people_keys[index] == key:
+            del self.people_keys[index]
+            self.people_listbox.delete(index)
+
+    def process_changes(self):
+        """Apply queued DataManager change events to the people list, entries and report"""
+        rows_changed = False
+        try:
+            while True:
+                kind, payload, version = self.changes.get_nowait()
+                rows_changed = rows_changed or kind in (ROWS_ADDED, ROWS_REMOVED, ROWS_UPDATED, RELOADED)
+                if kind == ROWS_ADDED:
+                    self.entries_view.rows_added(payload, version)
+                elif kind == ROWS_REMOVED:
+                    self.entries_view.rows_removed(payload, version)
+                elif kind == ROWS_UPDATED:
+                    self.entries_view.rows_updated(payload, version)
+                elif kind == PEOPLE_ADDED:
+                    if self.search_var.get().strip():
+                        # Only names matching the search box belong in the list
+                        self.apply_people_filter()
+                    else:
+                        for name in payload:
+                            self.insert_person(name)
+                elif kind == PEOPLE_REMOVED:
+                    for name in payload:
+                        self.remove_person(name)
+                elif kind == RELOADED:
+                    # Another program changed the data file; start over
+                    self.refresh_people_list()
+                    self.entries_view.refresh()
+        except queue.Empty:
+            pass
+        if rows_changed:
+            # One report refresh per batch of changes; totals are kept up to date by DataManager
+            self.report_view.invalidate()
+        self.after(POLL_INTERVAL_MS, self.process_changes)
 
     def on_entry_focus_in(self, event):
         """Remove placeholder text when entry gets focus"""
@@ -475,15 +1419,25 @@ class MainApplication(ttk.Frame):
             messagebox.showerror("Error", "Please enter a name!")
             return
 
-        success, message = self.data_manager.add_new_person(name)
-        if success:
-            self.new_person_entry.delete(0, tk.END)
-            self.refresh_people_list()
-            messagebox.showinfo("Success", message)
-            # Hide the add person form after successful addition
-            self.toggle_add_person_form()
-        else:
-            messagebox.showerror("Error", message)
+        def on_done(result):
+            success, message = result
+            if success:
+                # The people list is updated by the change event
+                self.new_person_entry.delete(0, tk.END)
+                messagebox.showinfo("Success", message)
+                # Hide the add person form after successful addition
+                self.toggle_add_person_form()
+            else:
+                messagebox.showerror("Error", message)
+
+        def on_similar(similar):
+            # Catch a misspelling of someone already on the list before it splits their hours
+            if similar and not messagebox.askyesno(
+                    "Similar Names", f"Similar names already exist: {', '.join(similar[:5])}\n\nAdd {name} anyway?"):
+                return
+            self.run_async(self.io.add_new_person(name), on_done)
+
+        self.run_async(self.io.similar_people(name), on_similar)
 
     def on_double_click(self, event):
         if not self.people_listbox.curselection():
@@ -496,137 +1450,135 @@ class MainApplication(ttk.Frame):
         dialog = InfoDialog(self, name)
         self.wait_window(dialog)
         if hasattr(dialog, 'result') and dialog.result is not None:
-            success, message = self.data_manager.add_person_info(
+            def on_done(result):
+                success, message = result
+                if success:
+                    # The new row reaches the entries view as a change event
+                    messagebox.showinfo("Success", message)
+                else:
+                    messagebox.showerror("Error", message)
+
+            self.run_async(self.io.add_person_info(
                 name,
                 dialog.result['location'],
                 dialog.result['event'],
                 dialog.result['hours'],
                 dialog.result['date']
-            )
-            if success:
-                if self.entries_frame.winfo_ismapped():
-                    self.display_person_info(name)
-                messagebox.showinfo("Success", message)
-            else:
-                messagebox.showerror("Error", message)
+            ), on_done)
 
     def verify_password(self):
         dialog = PasswordDialog(self)
         self.wait_window(dialog)
+        if self.ADMIN_PASSWORD is None:
+            self.ADMIN_PASSWORD = self.password_future.result()
         if hasattr(dialog, 'result') and dialog.result == self.ADMIN_PASSWORD:
             return True
         return False
 
     def display_person_info(self, name):
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Get and display the records
-        info_records = self.data_manager.get_person_info(name)
-        # Sort records by name (case-insensitive)
-        info_records = sorted(info_records, key=lambda x: x['Name'].lower())
-        for record in info_records:
-            self.tree.insert('', 'end', values=(
-                record['Name'],
-                record['Timestamp'],
-                record['Location'],
-                record['Event'],
-                record['Hours']
-            ))
+        key = name.lower()
+        self.entries_view.show(matches=lambda record: str(record['Name']).lower() == key, name=name)
 
     def change_password(self):
         dialog = PasswordDialog(self, change_password=True)
         self.wait_window(dialog)
         if hasattr(dialog, 'result') and dialog.result:
-            success, message = self.data_manager.change_password(
+            new_password = dialog.result['new']
+
+            def on_done(result):
+                success, message = result
+                if success:
+                    self.ADMIN_PASSWORD = new_password
+                    messagebox.showinfo("Success", message)
+                else:
+                    messagebox.showerror("Error", message)
+
+            self.run_async(self.io.change_password(
                 dialog.result['current'],
-                dialog.result['new']
-            )
-            if success:
-                self.ADMIN_PASSWORD = dialog.result['new']
-                messagebox.showinfo("Success", message)
-            else:
-                messagebox.showerror("Error", message)
+                new_password
+            ), on_done)
 
     def display_all_entries(self):
         """Display all entries sorted by name"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Get all records and sort them by name
-        all_records = self.data_manager.get_all_entries()
-        all_records = sorted(all_records, key=lambda x: x['Name'].lower())
-
-        for record in all_records:
-            self.tree.insert('', 'end', values=(
-                record['Name'],
-                record['Timestamp'],
-                record['Location'],
-                record['Event'],
-                record['Hours']
-            ))
+        self.entries_view.show()
 
     def import_entries(self):
-        import csv
         filename = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         if not filename:
             return
 
-        try:
-            with open(filename, 'r', newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    self.data_manager.add_entry(row['Name'], row['Timestamp'], row['Location'], row['Event'], row['Hours'])
-            self.refresh_people_list()
-            self.display_all_entries()
-            messagebox.showinfo("Success", "Entries imported successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to import entries: {e}")
+        def report_progress(rows_read, rows_added):
+            # Runs on the I/O thread; the polling loop shows the text
+            self.progress_text = f"Importing... {rows_read} rows read, {rows_added} new"
+
+        def on_done(result):
+            success, message = result
+            if success:
+                # New rows and names arrive as change events
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Error", f"Failed to import entries: {message}")
+
+        cancel = threading.Event()
+        future = self.io.import_entries(filename, progress=report_progress, cancel=cancel)
+        self.run_async(future, on_done, busy_text="Importing...", cancel=cancel,
+                       error_text="Failed to import entries", name='import_entries')
+
+    def find_duplicates(self):
+        """Show names that look like misspellings of each other and offer to merge them"""
+        def on_done(groups):
+            if not groups:
+                messagebox.showinfo("Information", "No similar names found")
+                return
+            DuplicatesDialog(self, groups, self.merge_people)
+
+        self.run_async(self.io.find_duplicate_people(), on_done, busy_text="Looking for duplicates...",
+                       name='find_duplicate_people')
+
+    def merge_people(self, names, canonical, on_merged):
+        def on_done(result):
+            success, message = result
+            if success:
+                # Renamed rows and names arrive as change events
+                on_merged()
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Error", message)
+
+        self.run_async(self.io.merge_people(names, canonical), on_done, busy_text="Merging...",
+                       error_text="Failed to merge names", name='merge_people')
             
     def delete_selected_entries(self):
         """Delete selected entries from the treeview and database"""
-        # Get selected items
-        selected_items = self.tree.selection()
-        if not selected_items:
+        # Get the records behind the selected rows
+        selected_records = self.entries_view.selected_records()
+        if not selected_records:
             messagebox.showinfo("Information", "Please select entries to delete")
             return
             
         # Confirm deletion
         confirm = messagebox.askyesno("Confirm Deletion", 
-                                      f"Are you sure you want to delete {len(selected_items)} selected entries?")
+                                      f"Are you sure you want to delete {len(selected_records)} selected entries?")
         if not confirm:
             return
             
-        # Clear previous deleted entries if any
-        self.deleted_entries = []
+        # Store for potential undo, replacing any previous deleted entries
+        self.deleted_entries = selected_records
         
-        # For each selected item, get the values and delete from database
-        for item_id in selected_items:
-            # Get the values from the treeview
-            values = self.tree.item(item_id, 'values')
-            name, timestamp, location, event, hours = values
-            
-            # Store for potential undo
-            self.deleted_entries.append({
-                'Name': name,
-                'Timestamp': timestamp,
-                'Location': location,
-                'Event': event,
-                'Hours': hours
-            })
+        def on_done(success):
+            if not success:
+                self.deleted_entries = []
+                messagebox.showerror("Error", "Failed to delete the selected entries")
+                return
             
-            # Delete from database
-            self.data_manager.delete_entry(name, timestamp, location, event, hours)
+            # Enable undo button
+            self.undo_button.configure(state="normal")
             
-            # Delete from treeview
-            self.tree.delete(item_id)
-        
-        # Enable undo button
-        self.undo_button.configure(state="normal")
+            messagebox.showinfo("Success", f"{len(selected_records)} entries deleted successfully")
         
-        messagebox.showinfo("Success", f"{len(selected_items)} entries deleted successfully")
+        # Delete them from the database in one batch
+        self.run_async(self.io.delete_entries(self.deleted_entries), on_done, busy_text="Deleting...",
+                       name='delete_entries')
         
     def undo_delete(self):
         """Restore previously deleted entries"""
@@ -634,28 +1586,18 @@ class MainApplication(ttk.Frame):
             messagebox.showinfo("Information", "No deleted entries to restore")
             return
             
-        # Restore each deleted entry
-        for entry in self.deleted_entries:
-            # Add back to database
-            self.data_manager.add_entry(
-                entry['Name'],
-                entry['Timestamp'],
-                entry['Location'],
-                entry['Event'],
-                entry['Hours']
-            )
+        entries = self.deleted_entries
+
+        def on_done(success):
+            if not success:
+                messagebox.showerror("Error", "Failed to restore the deleted entries")
+                return
+                
+            self.deleted_entries = []  # Clear the deleted entries list
+            self.undo_button.configure(state="disabled")  # Disable undo button
             
-            # Add back to treeview
-            self.tree.insert('', 'end', values=(
-                entry['Name'],
-                entry['Timestamp'],
-                entry['Location'],
-                entry['Event'],
-                entry['Hours']
-            ))
-        
-        count = len(self.deleted_entries)
-        self.deleted_entries = []  # Clear the deleted entries list
-        self.undo_button.configure(state="disabled")  # Disable undo button
-        
-        messagebox.showinfo("Success", f"{count} entries restored successfully")
\ No newline at end of file
+            messagebox.showinfo("Success", f"{len(entries)} entries restored successfully")
+            
+        # Add them back to the database in one batch
+        self.run_async(self.io.restore_entries(entries), on_done, busy_text="Restoring...",
+                       name='restore_entries')
\ No newline at end of file
@@ -0,0 +1,403 @@
+import bisect
+import math
+import numpy as np
+import pandas as pd
+from utils import search_words
+
+
+def _remove_sorted(items, value):
+    """Remove value from a sorted list if present"""
+    position = bisect.bisect_left(items, value)
+    if position < len(items) and items[position] == value:
+        del items[position]
+
+
+class NameIndex:
+    """Case-insensitive index from a person's name to its canonical spelling and rows"""
+
+    def __init__(self):
+        # Lowercased name -> {'name': canonical spelling, 'rows': set of row labels}
+        self._entries = {}
+        # Lowercased names kept in sorted order for listing and prefix search
+        self._keys = []
+        # Sorted (word, lowercased name) pairs for matching any word of a name
+        self._tokens = []
+        # NameList of the current names, dropped whenever one arrives, leaves or is respelled
+        self._snapshot = None
+
+    @staticmethod
+    def key(name):
+        """Return the lookup key for a name"""
+        return str(name).lower() if isinstance(name, str) else ''
+
+    def rebuild(self, names):
+        """Build the index from a Series of names keyed by row label"""
+        self._entries = {}
+        # Work on codes so each distinct spelling is lowercased once
+        if isinstance(names.dtype, pd.CategoricalDtype):
+            codes, spellings = names.cat.codes.to_numpy(), names.cat.categories
+        else:
+            codes, spellings = pd.factorize(names)
+        spellings = pd.Index(spellings, dtype=object).astype(str)
+        lowered = spellings.str.lower()
+
+        # Visit spellings in order of first appearance so the first one seen is canonical
+        groups = pd.Series(np.arange(len(codes))).groupby(codes, sort=False).indices
+        for code, positions in sorted(groups.items(), key=lambda item: item[1][0]):
+            key = lowered[code] if code >= 0 else ''
+            if not key:
+                continue
+            entry = self._entries.setdefault(key, {'name': spellings[code], 'rows': set()})
+            entry['rows'].update(names.index[positions].tolist())
+        self._keys = sorted(self._entries)
+        self._tokens = sorted((token, key) for key in self._keys for token in set(key.split()))
+        self._snapshot = None
+
+    def add(self, label, name):
+        """Record a row for a name and return the canonical spelling"""
+        key = self.key(name)
+        if not key:
+            return name
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {'name': name, 'rows': set()}
+            self._snapshot = None
+            bisect.insort(self._keys, key)
+            for token in set(key.split()):
+                bisect.insort(self._tokens, (token, key))
+        entry['rows'].add(label)
+        return entry['name']
+
+    def remove(self, label, name):
+        """Forget a row, dropping the name once it has no rows left"""
+        key = self.key(name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry['rows'].discard(label)
+        if not entry['rows']:
+            del self._entries[key]
+            self._snapshot = None
+            _remove_sorted(self._keys, key)
+            for token in set(key.split()):
+                _remove_sorted(self._tokens, (token, key))
+
+    def respell(self, name):
+        """Make name the canonical spelling of its entry, if the name is known"""
+        entry = self._entries.get(self.key(name))
+        if entry is not None and entry['name'] != name:
+            entry['name'] = name
+            self._snapshot = None
+
+    def canonical(self, name):
+        """Return the stored spelling of a name, or None if it isn't known"""
+        entry = self._entries.get(self.key(name))
+        return entry['name'] if entry else None
+
+    def rows(self, name):
+        """Return the row labels for a name in insertion order"""
+        entry = self._entries.get(self.key(name))
+        return sorted(entry['rows']) if entry else []
+
+    def names(self):
+        """Return every canonical name sorted case-insensitively"""
+        return [self._entries[key]['name'] for key in self._keys]
+
+    def search(self, text, mode='prefix'):
+        """Return canonical names matching text, sorted case-insensitively; see NameList.search"""
+        return self.snapshot().search(text, mode)
+
+    def snapshot(self):
+        """Return a NameList of the names as they are now, made again only after names change"""
+        if self._snapshot is None:
+            names = [self._entries[key]['name'] for key in self._keys]
+            self._snapshot = NameList(tuple(self._keys), names, tuple(self._tokens))
+        return self._snapshot
+
+    def __contains__(self, name):
+        return self.key(name) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class NameList:
+    """Read-only copy of a NameIndex's names, safe to search from any thread without a lock
+
+    The index makes a new one when its names change instead of changing
+    this one.
+    """
+
+    def __init__(self, keys, names, tokens):
+        # Lowercased names in sorted order -> canonical spelling
+        self._names = dict(zip(keys, names))
+        self._keys = keys
+        self._tokens = tokens
+
+    def search(self, text, mode='prefix'):
+        """Return canonical names matching text, sorted case-insensitively
+
+        'prefix' matches the start of the whole name, 'token' requires every
+        word of text to start some word of the name, and 'substring' matches
+        anywhere in the name.
+        """
+        text = text.lower().strip()
+        if not text:
+            return list(self._names.values())
+
+        if mode == 'substring':
+            keys = [key for key in self._keys if text in key]
+        elif mode == 'token':
+            matches = None
+            for word in text.split():
+                start = bisect.bisect_left(self._tokens, (word,))
+                end = bisect.bisect_left(self._tokens, (word + '\uffff',))
+                found = {key for _, key in self._tokens[start:end]}
+                matches = found if matches is None else matches & found
+                if not matches:
+                    return []
+            keys = sorted(matches)
+        else:
+            start = bisect.bisect_left(self._keys, text)
+            end = bisect.bisect_left(self._keys, text + '\uffff')
+            keys = self._keys[start:end]
+        return [self._names[key] for key in keys]
+
+
+class TimestampIndex:
+    """Row labels sorted by timestamp, for date range lookups by binary search
+
+    Rows without a date are kept apart and come after all dated rows. Rows
+    with the same timestamp stay in label order.
+    """
+
+    def __init__(self):
+        # Sorted timestamps of dated rows and their labels, position for position
+        self._times = np.empty(0, dtype='datetime64[ns]')
+        self._labels = np.empty(0, dtype='int64')
+        # Labels of rows without a date, ascending
+        self._undated = np.empty(0, dtype='int64')
+
+    @staticmethod
+    def _split(timestamps):
+        """Return (times, labels) of dated rows sorted by time then label, and the undated labels"""
+        times = timestamps.to_numpy(dtype='datetime64[ns]')
+        labels = timestamps.index.to_numpy(dtype='int64')
+        dated = ~np.isnat(times)
+        times, undated, labels = times[dated], labels[~dated], labels[dated]
+        order = np.lexsort((labels, times))
+        return times[order], labels[order], np.sort(undated)
+
+    def rebuild(self, timestamps):
+        """Build the index from a Series of timestamps keyed by row label"""
+        self._times, self._labels, self._undated = self._split(timestamps)
+
+    def add(self, timestamps):
+        """Insert rows, keeping ties in label order"""
+        times, labels, undated = self._split(timestamps)
+        positions = np.searchsorted(self._times, times, side='right')
+        if len(self._times):
+            # Only a row restored under an old label can belong before others with its timestamp
+            before = np.maximum(positions - 1, 0)
+            tied = (positions > 0) & (self._times[before] == times) & (self._labels[before] > labels)
+            for index in np.flatnonzero(tied):
+                start = np.searchsorted(self._times, times[index], side='left')
+                positions[index] = start + np.searchsorted(self._labels[start:positions[index]], labels[index])
+        self._times = np.insert(self._times, positions, times)
+        self._labels = np.insert(self._labels, positions, labels)
+        self._undated = np.insert(self._undated, np.searchsorted(self._undated, undated), undated)
+
+    def remove(self, timestamps):
+        """Drop rows, found by their timestamp"""
+        times, labels, undated = self._split(timestamps)
+        if len(labels) > 100:
+            # Cheaper to scan every label once than to search for each
+            drop = np.flatnonzero(np.isin(self._labels, labels))
+        else:
+            drop = []
+            for time, label in zip(times, labels):
+                start = np.searchsorted(self._times, time, side='left')
+                end = np.searchsorted(self._times, time, side='right')
+                drop.extend(start + np.flatnonzero(self._labels[start:end] == label))
+        self._times = np.delete(self._times, drop)
+        self._labels = np.delete(self._labels, drop)
+        self._undated = self._undated[~np.isin(self._undated, undated)]
+
+    def range(self, start=None, end=None):
+        """Labels of rows with start <= timestamp < end, in timestamp order
+
+        Either bound may be None for an open end. With no bounds at all the
+        rows without a date follow the dated ones.
+        """
+        first = 0 if start is None else np.searchsorted(self._times, np.datetime64(start, 'ns'), side='left')
+        last = len(self._times) if end is None else np.searchsorted(self._times, np.datetime64(end, 'ns'),
+                                                                     side='left')
+        labels = self._labels[first:max(first, last)]
+        if start is None and end is None:
+            labels = np.concatenate([labels, self._undated])
+        return labels
+
+    def __len__(self):
+        return len(self._times) + len(self._undated)
+
+
+class TextIndex:
+    """Inverted index from the words of free-text columns to row labels
+
+    Each distinct value (case-folded) keeps the rows that hold it in any of
+    the indexed columns, and sorted (word, value) pairs find the values
+    whose words start with a search term.
+    """
+
+    def __init__(self):
+        # Case-folded value -> set of row labels holding it
+        self._rows = {}
+        # Sorted (word, value) pairs for prefix lookups
+        self._words = []
+
+    @staticmethod
+    def key(value):
+        """Return the lookup key for a value, '' for a missing one"""
+        return value.strip().casefold() if isinstance(value, str) else ''
+
+    @classmethod
+    def _groups(cls, frame):
+        """Yield (key, row labels) for each distinct value in every column of frame"""
+        for column in frame:
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, spellings = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, spellings = pd.factorize(values)
+            # Group the labels by code with one sort, cheaper than groupby for the few rows of an add
+            order = np.argsort(codes, kind='stable')
+            codes = codes[order]
+            starts = np.flatnonzero(np.diff(codes)) + 1
+            labels = np.split(values.index.to_numpy()[order], starts)
+            for code, group in zip(codes[np.append(0, starts)] if len(codes) else [], labels):
+                key = cls.key(spellings[code]) if code >= 0 else ''
+                if key:
+                    yield key, group.tolist()
+
+    def rebuild(self, frame):
+        """Build the index from the text columns of a table keyed by row label"""
+        self._rows = {}
+        for key, labels in self._groups(frame):
+            self._rows.setdefault(key, set()).update(labels)
+        self._words = sorted((word, key) for key in self._rows for word in set(search_words(key)))
+
+    def add(self, frame):
+        """Record newly stored rows"""
+        for key, labels in self._groups(frame):
+            rows = self._rows.get(key)
+            if rows is None:
+                rows = self._rows[key] = set()
+                for word in set(search_words(key)):
+                    bisect.insort(self._words, (word, key))
+            rows.update(labels)
+
+    def remove(self, frame):
+        """Forget deleted rows, dropping values no row holds any more"""
+        for key, labels in self._groups(frame):
+            rows = self._rows.get(key)
+            if rows is None:
+                continue
+            rows.difference_update(labels)
+            if not rows:
+                del self._rows[key]
+                for word in set(search_words(key)):
+                    _remove_sorted(self._words, (word, key))
+
+    def search(self, text):
+        """Return the labels of rows where every word of text starts a word of some indexed column"""
+        matches = None
+        for term in set(search_words(text)):
+            start = bisect.bisect_left(self._words, (term,))
+            end = bisect.bisect_left(self._words, (term + '\uffff',))
+            found = set().union(*(self._rows[key] for _, key in self._words[start:end]))
+            matches = found if matches is None else matches & found
+            if not matches:
+                break
+        return np.fromiter(matches or (), dtype=np.int64)
+
+
+class TrigramIndex:
+    """Finds names spelled like a given one through the three-letter runs they share
+
+    Names are compared in a normal form, their case-folded words joined by
+    single spaces, so "Rehan  Abbu" and "rehan abbu" are the same and
+    "Rehan Abu" is close. Similarity is the Dice coefficient of the two
+    trigram sets. Only names sharing one of the query's rarest trigrams are
+    compared, which is enough to find every name above the threshold.
+    """
+
+    def __init__(self):
+        # Trigram -> normal forms containing it
+        self._grams = {}
+        # Normal form -> its trigrams, and the spellings that reduce to it
+        self._gram_sets = {}
+        self._spellings = {}
+
+    @staticmethod
+    def normalize(name):
+        return ' '.join(search_words(name))
+
+    @staticmethod
+    def trigrams(normal):
+        # Padding makes the start of the name count more, the way people misspell
+        padded = f"  {normal} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def rebuild(self, names):
+        self._grams = {}
+        self._gram_sets = {}
+        self._spellings = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        normal = self.normalize(name)
+        if not normal:
+            return
+        spellings = self._spellings.get(normal)
+        if spellings is None:
+            spellings = self._spellings[normal] = set()
+            grams = self._gram_sets[normal] = self.trigrams(normal)
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(normal)
+        spellings.add(name)
+
+    def remove(self, name):
+        normal = self.normalize(name)
+        spellings = self._spellings.get(normal)
+        if spellings is None:
+            return
+        spellings.discard(name)
+        if not spellings:
+            del self._spellings[normal]
+            for gram in self._gram_sets.pop(normal):
+                postings = self._grams[gram]
+                postings.discard(normal)
+                if not postings:
+                    del self._grams[gram]
+
+    def similar(self, name, threshold):
+        """Return (spelling, similarity) for every indexed name at least threshold alike, best first"""
+        normal = self.normalize(name)
+        if not normal:
+            return []
+        grams = self.trigrams(normal)
+        # A name that alike shares at least this many trigrams, so it shares
+        # one of the rarest len(grams) - shared + 1 of them
+        shared = math.ceil(threshold * len(grams) / (2 - threshold))
+        rarest = sorted(grams, key=lambda gram: len(self._grams.get(gram, ())))[:len(grams) - shared + 1]
+        candidates = set().union(*(self._grams.get(gram, ()) for gram in rarest))
+
+        matches = []
+        for other in candidates:
+            other_grams = self._gram_sets[other]
+            score = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+            if score >= threshold:
+                matches.extend((spelling, score) for spelling in self._spellings[other])
+        matches.sort(key=lambda match: (-match[1], match[0].lower()))
+        return matches
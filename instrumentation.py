@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+import functools
+import collections
+from datetime import datetime
+
+# Set ZF_INSTRUMENT=1 to collect timings, or ZF_INSTRUMENT=cprofile to also capture a profile
+MODE = os.environ.get("ZF_INSTRUMENT", "").strip().lower()
+ENABLED = MODE not in ("", "0", "off", "false")
+PROFILE = MODE == "cprofile"
+
+# Calls at least this slow are written to the slow-operation log
+SLOW_MS = float(os.environ.get("ZF_SLOW_MS", "250"))
+SLOW_LOG_PATH = os.environ.get("ZF_SLOW_LOG", "slow_operations.log")
+PROFILE_PATH = os.environ.get("ZF_PROFILE_FILE", "zf_profile.pstats")
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = [1, 5, 10, 50, 100, 250, 500, 1000, 5000, float('inf')]
+
+
+class OperationStats:
+    """Call count, wall time, rows, bytes and a latency histogram for one operation"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS_MS)
+
+    def record(self, elapsed_ms, rows, size):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.bytes += size
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class Recorder:
+    """Collects stats from every thread, plus the slow-operation log and optional profiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+        # Most recent slow calls, newest last
+        self.slow = collections.deque(maxlen=200)
+        # One cProfile.Profile per thread, since a profiler only sees its own thread
+        self._profiles = []
+        self._local = threading.local()
+
+    def record(self, name, elapsed_ms, rows=0, size=0):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = OperationStats()
+            stats.record(elapsed_ms, rows, size)
+            if elapsed_ms >= SLOW_MS:
+                line = (f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {name} "
+                        f"{elapsed_ms:.1f} ms rows={rows} bytes={size}")
+                self.slow.append(line)
+                try:
+                    with open(SLOW_LOG_PATH, 'a', encoding='utf-8') as f:
+                        f.write(line + '\n')
+                except OSError as e:
+                    print(f"Error writing slow log: {str(e)}")
+
+    def snapshot(self):
+        """Return (name, stats) pairs sorted by total time, highest first"""
+        with self._lock:
+            return sorted(self.stats.items(), key=lambda item: -item[1].total_ms)
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+            self.slow.clear()
+
+    def start_profile(self):
+        """Start this thread's profiler unless an outer call already did"""
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        if depth == 0:
+            profile = getattr(self._local, 'profile', None)
+            if profile is None:
+                import cProfile
+                profile = self._local.profile = cProfile.Profile()
+                with self._lock:
+                    self._profiles.append(profile)
+            profile.enable()
+
+    def stop_profile(self):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self._local.profile.disable()
+
+    def save_profile(self, path=PROFILE_PATH):
+        """Write the merged profile of every thread for pstats/snakeviz; return the path or None"""
+        import pstats
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return path
+
+
+recorder = Recorder()
+
+
+def _measure(result, args, file_arg):
+    """Guess the rows and bytes an operation handled from its result and arguments"""
+    rows = 0
+    if isinstance(result, (list, tuple)):
+        # get_entries_page returns (total, records), get_entries_window (version, total, records)
+        if len(result) in (2, 3) and isinstance(result[-1], list):
+            result = result[-1]
+        rows = len(result) if isinstance(result, list) else 0
+    elif hasattr(result, 'shape'):
+        rows = len(result)
+    size = 0
+    # Import and export take a file path first
+    if file_arg and args and isinstance(args[0], str) and os.path.isfile(args[0]):
+        size = os.path.getsize(args[0])
+    return rows, size
+
+
+def timed(name, fn):
+    """Return fn wrapped to record its wall time under name"""
+    file_arg = 'import' in name or 'export' in name
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if PROFILE:
+            recorder.start_profile()
+        result = None
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if PROFILE:
+                recorder.stop_profile()
+            rows, size = _measure(result, args, file_arg)
+            recorder.record(name, elapsed_ms, rows, size)
+    return wrapper
+
+
+def track(name, future):
+    """Record the time from now until future finishes under name; does nothing unless enabled
+
+    For jobs handed to a background thread, where timing the call that
+    submitted them would only measure the submit.
+    """
+    if not ENABLED:
+        return
+    start = time.perf_counter()
+
+    def done(future):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        result = None if future.cancelled() or future.exception() else future.result()
+        rows, _ = _measure(result, (), False)
+        recorder.record(name, elapsed_ms, rows)
+    future.add_done_callback(done)
+
+
+def instrument(obj, names=None, prefix=''):
+    """Replace methods on obj with timed wrappers; does nothing unless enabled
+
+    names defaults to every public method. Nothing is wrapped when
+    instrumentation is off, so it costs nothing then.
+    """
+    if not ENABLED:
+        return obj
+    if names is None:
+        names = [name for name in dir(type(obj)) if not name.startswith('_')]
+    for name in names:
+        method = getattr(obj, name, None)
+        if callable(method):
+            setattr(obj, name, timed(prefix + name, method))
+    return obj
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class IOExecutor:
+    """Runs disk work on a single background thread so jobs finish in submission order"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zf-io")
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return a Future for its result"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncDataManager:
+    """Wraps a DataManager so that every method call returns a Future
+
+    Calls run one at a time on the executor's thread, so writes are applied
+    in the order they were made and reads see every earlier write.
+    """
+
+    def __init__(self, data_manager=None, executor=None, factory=None):
+        self.data_manager = data_manager
+        self.executor = executor or IOExecutor()
+        # With a factory the DataManager is built on the worker thread, ahead of
+        # every queued call, so the caller never waits on imports or disk
+        self.ready = self.executor.submit(self._create, factory) if factory else None
+
+    def _create(self, factory):
+        self.data_manager = factory()
+        return self.data_manager
+
+    def __getattr__(self, name):
+        if self.data_manager is not None:
+            attr = getattr(self.data_manager, name)
+            if not callable(attr):
+                return attr
+
+        def submit(*args, **kwargs):
+            # Looked up when the call runs, since the DataManager may not exist yet
+            return self.executor.submit(lambda: getattr(self.data_manager, name)(*args, **kwargs))
+        return submit
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+def run_in_thread(fn, *args):
+    """Run fn(*args) on a new daemon thread, apart from the I/O queue, and return a Future"""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+    threading.Thread(target=run, daemon=True).start()
+    return future
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# Report groupings and the column each one totals by
+REPORT_DIMENSIONS = {
+    'person': 'Name',
+    'event': 'Event',
+    'location': 'Location',
+    'month': 'Timestamp',
+}
+
+
+class ReportTotals:
+    """Materialized hour and entry totals per volunteer, event, location and month
+
+    Totals are kept for all time and for each year, so a report is read
+    straight from one bucket instead of the table. Rows are folded in and
+    out as they are stored or deleted, so nothing is recomputed.
+    """
+
+    def __init__(self):
+        # dimension -> {'YYYY' or None for all time: {value: [hours, entries]}}
+        self._buckets = {dimension: {} for dimension in REPORT_DIMENSIONS}
+
+    @staticmethod
+    def _frame(rows):
+        """Reduce typed rows to the grouping keys and hours, vectorized"""
+        def text(column, lower=False):
+            # Work on each distinct value once; missing values group as ''
+            values = rows[column].cat
+            categories = values.categories.astype(str)
+            if lower:
+                categories = categories.str.lower()
+            return np.append(categories.to_numpy(dtype=object), '')[values.codes.to_numpy()]
+
+        timestamps = rows['Timestamp'].dt
+        # Months as YYYYMM numbers, 0 when the date is missing; formatted per group later
+        month = (timestamps.year * 100 + timestamps.month).fillna(0).astype('int64')
+        return pd.DataFrame({
+            # Entries without hours still count as entries
+            'hours': rows['Hours'].fillna(0).astype('float64'),
+            'person': text('Name', lower=True),
+            'event': text('Event'),
+            'location': text('Location'),
+            'month': month,
+            'year': month // 100,
+        }, index=rows.index)
+
+    @staticmethod
+    def _label(period):
+        """Format a YYYYMM or YYYY number, or '' for a missing date"""
+        if not period:
+            return ''
+        if period > 9999:
+            return f"{period // 100}-{period % 100:02d}"
+        return str(period)
+
+    def _apply(self, rows, sign):
+        if rows.empty:
+            return
+        frame = self._frame(rows)
+        for dimension, buckets in self._buckets.items():
+            grouped = frame.groupby([dimension, 'year'], sort=False)['hours'].agg(['sum', 'size'])
+            for (value, year), hours, entries in zip(grouped.index, grouped['sum'].tolist(),
+                                                     grouped['size'].tolist()):
+                year = self._label(year)
+                if dimension == 'month':
+                    value = self._label(value)
+                for period in (None, year):
+                    bucket = buckets.setdefault(period, {})
+                    total = bucket.setdefault(value, [0.0, 0])
+                    total[0] += sign * hours
+                    total[1] += sign * entries
+                    if total[1] <= 0:
+                        del bucket[value]
+                        if not bucket:
+                            del buckets[period]
+
+    def rebuild(self, df):
+        """Compute every total from the full table"""
+        self._buckets = {dimension: {} for dimension in REPORT_DIMENSIONS}
+        self._apply(df, 1)
+
+    def add(self, rows):
+        self._apply(rows, 1)
+
+    def remove(self, rows):
+        self._apply(rows, -1)
+
+    def years(self):
+        """Return the years that have entries, newest first"""
+        return sorted((year for year in self._buckets['month'] if year), reverse=True)
+
+    def report(self, by='person', year=None):
+        """Return (value, hours, entries) rows for one grouping, optionally for one year
+
+        Months are listed in order; other groupings are listed by hours, highest first.
+        """
+        bucket = self._buckets[by].get(str(year) if year else None, {})
+        rows = [(value, round(hours, 2), entries) for value, (hours, entries) in bucket.items()]
+        if by == 'month':
+            rows.sort()
+        else:
+            rows.sort(key=lambda row: (-row[1], row[0]))
+        return rows
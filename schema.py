@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Columns every data file must contain, in the order they are written
+REQUIRED_COLUMNS = ['Name', 'Location', 'Event', 'Hours', 'Timestamp']
+
+# Column holding each entry's permanent row id; in memory it is the table's index
+ID_COLUMN = 'Id'
+
+# In-memory type of each column
+SCHEMA = {
+    'Name': 'category',
+    'Location': 'category',
+    'Event': 'category',
+    'Hours': 'float32',
+    'Timestamp': 'datetime64[ns]',
+}
+
+# Free-text columns, stored as categories since the same few values repeat on every row
+TEXT_COLUMNS = [col for col, dtype in SCHEMA.items() if dtype == 'category']
+
+
+def _text(values):
+    """Strip each distinct value once and return the column as a Categorical, blanks as NaN"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    stripped = pd.Index(uniques, dtype=object).astype(str).str.strip()
+    stripped = stripped.where(stripped != '')
+    # Values that differ only by surrounding spaces share one category
+    new_codes, categories = pd.factorize(stripped)
+    new_codes = np.append(new_codes, -1)[codes]
+    return pd.Categorical.from_codes(new_codes, categories=pd.Index(categories, dtype=object))
+
+
+def _hours(values):
+    """Parse hours as float32; return them with a mask of values that weren't numbers"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float32').to_numpy(), np.zeros(len(values), dtype=bool)
+    # Parse each distinct value once
+    codes, uniques = pd.factorize(values)
+    text = pd.Index(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.to_numeric(pd.Series(text), errors='coerce').to_numpy(dtype='float32')
+    bad = np.isnan(parsed) & ~np.asarray(text.isin(['', 'nan']))
+    hours = np.append(parsed, np.float32('nan'))[codes]
+    invalid = np.append(bad, False)[codes]
+    return hours, invalid
+
+
+def decimal_hours(values):
+    """Return float32 hours as float64 at the shortest decimal that reads back the same, NaN where missing
+
+    Widening float32 directly turns 1.1 into 1.100000023841858.
+    """
+    # Few distinct values, each formatted once
+    codes, uniques = pd.factorize(np.asarray(values, dtype=SCHEMA['Hours']))
+    decimals = np.array([float(str(value)) for value in uniques], dtype='float64')
+    return np.append(decimals, np.nan)[codes]
+
+
+def parse_timestamps(values):
+    """Parse timestamps; return them with a mask of values that couldn't be read"""
+    if pd.api.types.is_datetime64_dtype(values):
+        return values.astype(SCHEMA['Timestamp']).to_numpy(), np.zeros(len(values), dtype=bool)
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    failed = parsed.isna().to_numpy() & values.notna().to_numpy()
+    if failed.any():
+        blank = values[failed].astype(str).str.strip().isin(['', 'NaT', 'nan']).to_numpy()
+        failed[failed] = ~blank
+    if failed.any():
+        # Files from elsewhere may use other date layouts; try those row by row
+        parsed[failed] = pd.to_datetime(values[failed], errors='coerce', format='mixed')
+    invalid = parsed.isna().to_numpy() & failed
+    return parsed.astype(SCHEMA['Timestamp']).to_numpy(), invalid
+
+
+def coerce(df):
+    """Convert a table to the in-memory schema
+
+    Returns the typed table, holding exactly the required columns, and a mask
+    of rows whose Hours or Timestamp could not be parsed. Those values are
+    left missing in the typed table.
+    """
+    typed = {}
+    for col in TEXT_COLUMNS:
+        values = df[col] if col in df else pd.Series(np.nan, index=df.index, dtype=object)
+        typed[col] = _text(values)
+    typed['Hours'], bad_hours = _hours(df['Hours'] if 'Hours' in df else pd.Series(np.nan, index=df.index))
+    typed['Timestamp'], bad_times = parse_timestamps(
+        df['Timestamp'] if 'Timestamp' in df else pd.Series(np.nan, index=df.index, dtype=object))
+    return pd.DataFrame(typed, index=df.index)[REQUIRED_COLUMNS], bad_hours | bad_times
+
+
+def empty():
+    """Return a typed table with no rows"""
+    return coerce(pd.DataFrame(columns=REQUIRED_COLUMNS))[0]
+
+
+def _union(columns):
+    """Concatenate categorical columns, keeping the first one's codes and adding new categories at the end"""
+    categories = columns[0].cat.categories
+    codes = [columns[0].cat.codes.to_numpy()]
+    for column in columns[1:]:
+        other = column.cat.categories
+        extra = other[~other.isin(categories)]
+        if len(extra):
+            categories = categories.append(extra)
+        # Map the column's codes onto the merged categories; -1 (missing) stays -1
+        codes.append(np.append(categories.get_indexer(other), -1)[column.cat.codes.to_numpy()])
+    return pd.Categorical.from_codes(np.concatenate(codes), dtype=pd.CategoricalDtype(categories))
+
+
+def concat(frames):
+    """Concatenate typed tables, merging their categories instead of falling back to text"""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty()
+    if len(frames) == 1:
+        return frames[0]
+    # Built column by column; pd.concat plus union_categoricals costs more on every small append
+    columns = {col: _union([frame[col] for frame in frames]) for col in TEXT_COLUMNS}
+    for col in ('Hours', 'Timestamp'):
+        columns[col] = np.concatenate([frame[col].to_numpy() for frame in frames])
+    index = frames[0].index.append([frame.index for frame in frames[1:]])
+    return pd.DataFrame(columns, index=index)[REQUIRED_COLUMNS]
+
+
+def replace_rows(df, rows):
+    """Return df with the rows sharing a label with rows swapped for them, each in its place"""
+    positions = df.index.get_indexer(rows.index)
+    take = np.arange(len(df))
+    take[positions] = len(df) + np.arange(len(rows))
+    return concat([df, rows]).iloc[take]
+
+
+def _row_keys(df):
+    return pd.MultiIndex.from_frame(df[REQUIRED_COLUMNS].astype(str))
+
+
+def matching_rows(df, rows):
+    """Mask of the rows of typed table df equal to any of rows, compared after coercion"""
+    rows = coerce(rows)[0]
+    mask = np.zeros(len(df), dtype=bool)
+    # Only build keys for rows with a matching name
+    candidates = np.flatnonzero(df['Name'].isin(rows['Name'].unique()).to_numpy())
+    if len(candidates):
+        mask[candidates] = _row_keys(df.iloc[candidates]).isin(_row_keys(rows))
+    return mask
+
+
+def selected_rows(df, selection):
+    """Mask of the rows of df a delete selects: by row id, or by value when given a table of rows"""
+    if isinstance(selection, pd.DataFrame):
+        return matching_rows(df, selection)
+    return df.index.isin(selection)
+
+
+def to_arrays(df):
+    """Split a typed table into plain NumPy arrays that can be saved without pickling"""
+    arrays = {}
+    for col in TEXT_COLUMNS:
+        arrays[f'{col}.codes'] = df[col].cat.codes.to_numpy()
+        arrays[f'{col}.categories'] = np.array(df[col].cat.categories.tolist(), dtype=str)
+    arrays['Hours'] = df['Hours'].to_numpy(dtype=SCHEMA['Hours'])
+    arrays['Timestamp'] = df['Timestamp'].to_numpy(dtype=SCHEMA['Timestamp'])
+    arrays[ID_COLUMN] = df.index.to_numpy(dtype='int64')
+    return arrays
+
+
+def from_arrays(arrays):
+    """Rebuild a typed table, labelled by row id, from to_arrays() output"""
+    columns = {}
+    for col in TEXT_COLUMNS:
+        categories = pd.Index(arrays[f'{col}.categories'].tolist(), dtype=object)
+        columns[col] = pd.Categorical.from_codes(arrays[f'{col}.codes'], categories=categories)
+    columns['Hours'] = arrays['Hours']
+    columns['Timestamp'] = arrays['Timestamp']
+    return pd.DataFrame(columns, index=pd.Index(arrays[ID_COLUMN]))[REQUIRED_COLUMNS]
@@ -0,0 +1,1083 @@
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+import io
+import sqlite3
+import json
+import threading
+import contextlib
+import collections
+import glob
+import time
+import uuid
+from schema import (ID_COLUMN, REQUIRED_COLUMNS, coerce, concat, decimal_hours, parse_timestamps, replace_rows,
+                    selected_rows, to_arrays, from_arrays)
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; kiosks there must not share a data file
+    fcntl = None
+
+# File extensions that select the SQLite backend
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# Journal size in bytes after which it is folded into the CSV file
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Partitioned storage: the manifest file, and the partition for entries without a date
+PARTITION_MANIFEST = 'manifest.json'
+UNDATED_PARTITION = 'undated'
+
+# SQLite compares dates as text, which sorts them only when they start YYYY-MM-DD
+SORTABLE_DATE = r'\d{4}-\d{2}-\d{2}'
+
+
+def _fsync_directory(path):
+    """Make a rename inside path's directory durable (not supported on Windows)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def number_rows(ids, next_id=1):
+    """Return row ids as int64, giving new ones to rows without a usable id
+
+    Missing, non-positive, fractional and repeated ids (all but the first)
+    are replaced by ids counting up from next_id or past the highest kept
+    id, whichever is more. Also returns how many rows were renumbered.
+    """
+    try:
+        # Usually every id is already a distinct positive whole number; checked without parsing twice
+        whole = np.asarray(ids, dtype='int64')
+        if np.asarray(ids).dtype.kind != 'f' and (whole > 0).all() and pd.Index(whole).is_unique:
+            return whole, 0
+    except (TypeError, ValueError):
+        pass
+    ids = pd.to_numeric(pd.Series(ids, dtype=object), errors='coerce').astype('float64')
+    bad = (ids.isna() | (ids <= 0) | (ids % 1 != 0) | ids.duplicated()).to_numpy()
+    ids = ids.to_numpy()
+    if bad.any():
+        kept = ids[~bad]
+        start = max(next_id, int(kept.max()) + 1 if len(kept) else 1)
+        ids[bad] = np.arange(start, start + bad.sum())
+    return ids.astype('int64'), int(bad.sum())
+
+
+class FileLock:
+    """Advisory flock on a side file, shared between processes and reentrant within one
+
+    The data file itself can't carry the lock, since compaction swaps in a new
+    file. Threads of one process take turns through an RLock, so only the
+    outermost hold touches the file lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._exclusive = False
+        self._fd = None
+
+    @contextlib.contextmanager
+    def hold(self, shared=False):
+        """Hold the lock; shared holders only read, so several may hold it at once"""
+        with self._lock:
+            if self._depth == 0:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                self._exclusive = not shared
+            elif not shared and not self._exclusive:
+                # Converting a flock isn't atomic, so another process could write in between
+                raise RuntimeError("Can't write while holding the data file lock for reading")
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
+
+
+class CsvStorage:
+    """Stores entries in a plain CSV file plus an append-only journal of changes
+
+    Every mutation is written to the journal and fsynced before it is
+    acknowledged. The journal is folded into the CSV by compaction, which
+    writes a temporary file and swaps it in with os.replace.
+
+    Several processes may share the files. Writers hold lock() and readers
+    lock(shared=True); a process that has read the table can catch up with
+    other processes' journal records through read_changes().
+
+    Every row has a permanent id, stored in the Id column and used as its
+    label. Deletes and updates are journaled by id. Ids of deleted rows are
+    not handed out again: the journal's base record carries the next free
+    one across compactions.
+
+    The journal and snapshot name the CSV file they belong to by a hash of
+    its contents, so they still apply after the folder is copied or
+    restored. A journal found on top of different contents is replayed if
+    its records are by id, which is harmless when they were folded in
+    already, and is moved aside rather than overwritten.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        # Typed columns of the CSV file saved in binary, so startup can skip parsing
+        self.snapshot_path = file_path + ".snapshot.npz"
+        self.file_lock = FileLock(file_path + ".lock")
+        # (CSV contents, generation) of the journal this process read, and the byte offset it read up to
+        self._journal_base = None
+        self._journal_offset = 0
+        # Stat of the CSV file and the hash of its contents, computed again when the stat changes
+        self._token = None
+        # Next row id to hand out, never lower than any id seen
+        self._next_id = 1
+        # What the last read found that the current schema doesn't keep:
+        # extra columns, and raw rows with unparseable Hours or Timestamp
+        self.legacy_columns = []
+        self.quarantine = []
+        # Rows the last read had to give an id, and journal records it replayed from a journal
+        # written on top of other contents; either way the file should be rewritten
+        self.renumbered = 0
+        self.recovered = 0
+        self._lock = threading.RLock()
+        self.create_if_missing()
+
+    def create_if_missing(self):
+        if not os.path.exists(self.file_path):
+            # Create an empty DataFrame with the required columns
+            df = pd.DataFrame(columns=[ID_COLUMN] + REQUIRED_COLUMNS)
+            df.to_csv(self.file_path, index=False)
+
+    def lock(self, shared=False):
+        """Context manager holding the inter-process lock on the data files"""
+        return self.file_lock.hold(shared)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def signature(self):
+        """Return the (mtime, size, inode) of the data file and of its journal"""
+        return (self._stat(self.file_path), self._stat(self.journal_path))
+
+    def read(self):
+        """Read the CSV and replay the journal on top, labelling rows by id"""
+        with self._lock, self.lock(shared=True):
+            self.create_if_missing()
+            self.legacy_columns = []
+            self.quarantine = []
+            self.renumbered = 0
+            self.recovered = 0
+            df = self._read_snapshot()
+            if df is None:
+                # Read everything as text and convert it once, rather than letting pandas guess;
+                # ids are whole numbers unless the file is from before them or was edited by hand
+                try:
+                    raw = pd.read_csv(self.file_path, dtype=collections.defaultdict(lambda: str, {ID_COLUMN: 'int64'}))
+                except ValueError:
+                    raw = pd.read_csv(self.file_path, dtype=str)
+                self.legacy_columns = [col for col in raw.columns if col not in REQUIRED_COLUMNS + [ID_COLUMN]]
+                df = self._coerce(raw)
+                # Files from before row ids, or edited by hand, get ids where they lack them
+                df.index, self.renumbered = number_rows(raw[ID_COLUMN] if ID_COLUMN in raw else [None] * len(raw))
+                # A file that needs migrating gets its snapshot when it is rewritten
+                if not self.legacy_columns and not self.quarantine and not self.renumbered:
+                    self._write_snapshot(df)
+            self._next_id = int(df.index.max()) + 1 if len(df) else 1
+
+            # Apply the journal, with deletes and updates in order among the appends; a replayed
+            # journal may hold rows the file already has, or updates to rows it no longer has
+            for op, rows in self._changes(self._read_journal()):
+                if op == 'delete':
+                    df = df[~selected_rows(df, rows)]
+                elif op == 'update':
+                    df = replace_rows(df, rows[rows.index.isin(df.index)])
+                else:
+                    df = concat([df, rows[~rows.index.isin(df.index)]])
+            return df
+
+    def read_changes(self):
+        """Return the changes journaled since this process last read, or None
+
+        Changes come in journal order as ('add', typed rows), ('update',
+        typed rows replacing those with the same ids) and ('delete', ids)
+        pairs. A delete journaled before row ids holds the deleted rows'
+        values instead. None means the file was compacted or rewritten since,
+        so the whole table has to be read again.
+        """
+        with self._lock, self.lock(shared=True):
+            if self._journal_base is None or self._journal_base != self._journal_generation():
+                return None
+            return list(self._changes(self._read_journal(self._journal_offset)))
+
+    def _changes(self, records):
+        """Turn journal records into changes, parsing consecutive appends together"""
+        texts, ids = [], []
+        for record in records:
+            op = record['op']
+            numbered = 'ids' in record
+            # Appends from before row ids aren't parsed together with later ones
+            if texts and (op in ('delete', 'update') or (ids is None) == numbered):
+                yield 'add', self._parse_rows(''.join(texts), ids)
+                texts, ids = [], []
+            if op in ('delete', 'update') and not numbered:
+                # Journaled before row ids: deleted rows are found by value, and an update adds new ones
+                yield 'delete', self._keys(record['keys'])
+                if op == 'update':
+                    texts, ids = [record['csv']], None
+            elif op == 'delete':
+                yield 'delete', pd.Index(record['ids'], dtype='int64')
+            elif op == 'update':
+                yield 'update', self._parse_rows(record['csv'], record['ids'])
+            else:
+                if not texts:
+                    ids = [] if numbered else None
+                texts.append(record['csv'])
+                if numbered:
+                    ids += record['ids']
+        if texts:
+            yield 'add', self._parse_rows(''.join(texts), ids)
+
+    def _snapshot_key(self):
+        """Identify the CSV contents by size and hash"""
+        return [str(os.path.getsize(self.file_path)), self._base()]
+
+    def _read_snapshot(self):
+        """Return the snapshot of the CSV file, or None if it is missing or stale"""
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as snapshot:
+                if snapshot['key'].tolist() != self._snapshot_key():
+                    return None
+                return from_arrays(snapshot)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_snapshot(self, df):
+        """Save the typed table for the CSV file as it is now"""
+        # Readers share the lock, so each process writes its own temporary file
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, key=np.array(self._snapshot_key()), **to_arrays(df))
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            # Only startup speed depends on the snapshot
+            print(f"Error saving snapshot: {str(e)}")
+
+    def _coerce(self, raw):
+        """Convert raw text rows to the schema, setting aside rows with unreadable values"""
+        df, invalid = coerce(raw)
+        if invalid.any():
+            self.quarantine.append(raw[invalid])
+        return df
+
+    @staticmethod
+    def _keys(keys):
+        """Rows of a delete journaled before row ids, for matching by value"""
+        # Older journals wrote missing values as the text 'nan'
+        return pd.DataFrame(keys, columns=REQUIRED_COLUMNS).replace({'nan': None, 'NaT': None})
+
+    def _parse_rows(self, text, ids):
+        """Parse journaled CSV rows the same way a full read of the file would, labelled by ids"""
+        rows = self._coerce(pd.read_csv(io.StringIO(text), names=REQUIRED_COLUMNS, header=None, dtype=str))
+        if ids is None:
+            # Journaled before row ids; number them as every reader of this journal will
+            ids = range(self._next_id, self._next_id + len(rows))
+            self.renumbered += len(rows)
+        rows.index = pd.Index(ids, dtype='int64')
+        if len(rows):
+            self._next_id = max(self._next_id, int(rows.index.max()) + 1)
+        return rows
+
+    def _base(self):
+        """Identify the contents of the CSV file a journal or snapshot applies to, by hash"""
+        stat = self._stat(self.file_path)
+        if stat is None:
+            return None
+        if self._token is None or self._token[0] != stat:
+            with open(self.file_path, 'rb') as f:
+                digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16))
+            self._token = (stat, digest.hexdigest())
+        return self._token[1]
+
+    def _generation(self, record):
+        """Return (CSV contents, generation) of a journal's base record, or None if it isn't for the CSV file"""
+        if not isinstance(record, dict) or record.get('op') != 'base':
+            return None
+        base = record.get('file')
+        # Journals from before content hashes named the file by its mtime, size and inode
+        if base != self._base() and base != list(self._stat(self.file_path) or []):
+            return None
+        return (base, record.get('generation'))
+
+    def _journal_generation(self):
+        """Return (CSV contents, generation) of the journal on disk, or None if it isn't for the CSV file"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                return self._generation(json.loads(f.readline()))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _scan_journal(f, offset):
+        """Parse the complete records of an open journal from offset; return them and the offset after them"""
+        f.seek(offset)
+        records = []
+        end = offset
+        for line in f:
+            # A torn final line from a crash mid-write; nothing after it was acknowledged
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            end += len(line)
+        return records, end
+
+    def _read_journal(self, offset=0):
+        """Return the journal records after offset that apply to the current CSV file
+
+        Remembers how far the journal was read, for read_changes().
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                records, end = self._scan_journal(f, offset)
+        except FileNotFoundError:
+            self._journal_base = None
+            return []
+
+        if offset == 0:
+            base = self._generation(records[0]) if records else None
+            if base is None:
+                self._journal_base = None
+                # Written on top of other contents: a crash mid-compaction, or the file was edited or
+                # replaced. Records by id can be replayed without harm; the file is rewritten with them
+                head = records[0] if records and isinstance(records[0], dict) else {}
+                if head.get('op') == 'base' and all(isinstance(r, dict) and 'ids' in r for r in records[1:]):
+                    self._next_id = max(self._next_id, head.get('next_id', 1))
+                    self.recovered = len(records) - 1
+                    return records[1:]
+                return []
+            self._next_id = max(self._next_id, records[0].get('next_id', 1))
+            self._journal_base = base
+            records = records[1:]
+        self._journal_offset = end
+        return records
+
+    def _journal_is_current(self):
+        return self._journal_generation() is not None
+
+    def _write_journal(self, record):
+        """Durably append one record to the journal
+
+        The caller holds lock() and has read everything journaled before.
+        """
+        with self._lock, self.lock():
+            base = self._journal_generation()
+            if base is None:
+                self._reset_journal(keep_old=True)
+                base = self._journal_base
+            line = (json.dumps(record) + '\n').encode('utf-8')
+            with open(self.journal_path, 'r+b') as f:
+                # Cut off a record torn by a crash, or the next one would be joined onto it and lost
+                offset = self._journal_offset if self._journal_base == base else 0
+                end = self._scan_journal(f, offset)[1]
+                if end < os.fstat(f.fileno()).st_size:
+                    f.truncate(end)
+                f.seek(end)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                self._journal_offset = f.tell()
+
+    def _keep_orphaned_journal(self):
+        """Move aside a journal that holds records but wasn't written for the current CSV file"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.readline()
+                if not f.read(1):
+                    return
+        except OSError:
+            return
+        orphan_path = f"{self.journal_path}.{time.strftime('%Y%m%d-%H%M%S')}.orphaned"
+        os.replace(self.journal_path, orphan_path)
+        print(f"Kept a journal that doesn't match {self.file_path} as {orphan_path}")
+
+    def _reset_journal(self, keep_old=False):
+        """Start an empty journal on top of the current CSV file
+
+        With keep_old, a journal that doesn't belong to the file is moved aside rather than lost.
+        """
+        if keep_old:
+            self._keep_orphaned_journal()
+        temp_path = self.journal_path + ".tmp"
+        base = (self._base(), uuid.uuid4().hex)
+        record = {'op': 'base', 'file': base[0], 'generation': base[1], 'next_id': self._next_id}
+        with open(temp_path, 'wb') as f:
+            f.write((json.dumps(record) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        os.replace(temp_path, self.journal_path)
+        _fsync_directory(self.journal_path)
+        self._journal_base = base
+        self._journal_offset = offset
+
+    def append(self, new_df, current, op='add', ids=None):
+        """Journal new rows and return them as a reload would parse them
+
+        The rows get new ids unless ids gives them, as when restoring
+        deleted rows under their old ones.
+        """
+        text = new_df.reindex(columns=REQUIRED_COLUMNS).to_csv(index=False, header=False)
+        with self._lock, self.lock():
+            if ids is None:
+                ids = range(self._next_id, self._next_id + len(new_df))
+            ids = [int(i) for i in ids]
+            self._write_journal({'op': op, 'ids': ids, 'csv': text})
+            return self._parse_rows(text, ids)
+
+    def remove(self, df, mask):
+        """Journal the deletion of the rows selected by mask"""
+        self._write_journal({'op': 'delete', 'ids': df.index[mask].tolist()})
+
+    def update(self, df, rows):
+        """Journal new values for the rows with the ids rows is labelled by, as a single record
+
+        Returns the rows as a reload would parse them.
+        """
+        text = rows.reindex(columns=REQUIRED_COLUMNS).to_csv(index=False, header=False)
+        with self._lock, self.lock():
+            ids = rows.index.tolist()
+            self._write_journal({'op': 'update', 'ids': ids, 'csv': text})
+            return self._parse_rows(text, ids)
+
+    def replace(self, df):
+        """Rewrite the whole file with the given table and start a fresh journal"""
+        with self._lock, self.lock():
+            # A journal that doesn't belong to the file being replaced is kept, in case df lacks its rows
+            orphaned = not self._journal_is_current()
+            # Write to a temporary file and swap it in so readers never see a partial file
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+                df.to_csv(f, index_label=ID_COLUMN)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+            _fsync_directory(self.file_path)
+            if len(df):
+                self._next_id = max(self._next_id, int(df.index.max()) + 1)
+            self._reset_journal(keep_old=orphaned)
+            self._write_snapshot(df)
+
+    def needs_compaction(self, threshold=None):
+        """Whether the journal holds more than threshold bytes of changes"""
+        if threshold is None:
+            threshold = JOURNAL_COMPACT_BYTES
+        try:
+            with open(self.journal_path, 'rb') as f:
+                base_size = len(f.readline())
+                size = os.fstat(f.fileno()).st_size
+        except OSError:
+            return False
+        return size - base_size > threshold and self._journal_is_current()
+
+    def compact(self, df):
+        """Fold the journal into the CSV file; df must be the current table"""
+        self.replace(df)
+
+    def close(self):
+        self.file_lock.close()
+
+
+def sortable_dates(values):
+    """Rewrite dates given in another layout as YYYY-MM-DD HH:MM:SS text
+
+    Missing and unreadable values are returned as they are.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    other = (values.notna() & ~values.astype(str).str.match(SORTABLE_DATE)).to_numpy()
+    if other.any():
+        parsed, _ = parse_timestamps(values[other])
+        readable = ~np.isnat(parsed)
+        positions = other.nonzero()[0][readable]
+        values[positions] = pd.DatetimeIndex(parsed[readable]).astype(str)
+    return values.to_numpy()
+
+
+def _day_text(value, ceil=False):
+    """Format a datetime64 bound as its YYYY-MM-DD day, rounding up to the next day if ceil"""
+    day = np.datetime64(value, 'D')
+    if ceil and day < value:
+        day += np.timedelta64(1, 'D')
+    return str(day)
+
+
+class SqliteStorage:
+    """Stores entries in an SQLite database with indexes on name and timestamp
+
+    The rowid is each entry's permanent id. The next one to hand out is kept
+    in the meta table, so ids of deleted rows are never used again.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        # Columns outside the schema can't exist in the table; values that fail
+        # to parse are still collected on read. Every row has its rowid, and there is no journal.
+        self.legacy_columns = []
+        self.quarantine = []
+        self.renumbered = 0
+        self.recovered = 0
+        # SQLite locks the database itself; this lock keeps DataManager's catch-up and write together
+        self.file_lock = FileLock(file_path + ".lock")
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        # WAL lets readers keep working while a write is in progress
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_if_missing()
+
+    def create_if_missing(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "Name TEXT, Location TEXT, Event TEXT, Hours TEXT, Timestamp TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_name ON entries (lower(Name))")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (Timestamp)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'sortable_dates'").fetchone() is None:
+                # Databases from before query() may hold dates in other layouts; rewrite them once
+                rows = self.conn.execute("SELECT rowid, Timestamp FROM entries").fetchall()
+                if rows:
+                    labels, stored = zip(*rows)
+                    dates = sortable_dates(stored)
+                    self.conn.executemany("UPDATE entries SET Timestamp = ? WHERE rowid = ?",
+                                          [(date, label) for label, date, old in zip(labels, dates, stored)
+                                           if date != old])
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('sortable_dates', 1)")
+
+    def lock(self, shared=False):
+        """Context manager holding the inter-process lock on the database"""
+        return self.file_lock.hold(shared)
+
+    def signature(self):
+        """Return a value that changes whenever another connection commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def read_changes(self):
+        """Other connections' changes aren't logged here, so the table is always read again"""
+        return None
+
+    def read(self):
+        """Read the whole table, labelling rows by rowid, their id"""
+        columns = ', '.join(REQUIRED_COLUMNS)
+        raw = pd.read_sql_query(f"SELECT rowid, {columns} FROM entries ORDER BY rowid",
+                                self.conn, index_col='rowid')
+        raw.index.name = None
+        df, invalid = coerce(raw)
+        self.quarantine = [raw[invalid]] if invalid.any() else []
+        return df
+
+    def query(self, start=None, end=None, name=None):
+        """Read only the rows in [start, end), given as datetime64 or None, and of name if given
+
+        The bounds are widened to whole days and names are matched with
+        SQLite's lower(), which folds ASCII letters only, so callers filter the
+        rows again. Entries without a date are included only when neither
+        bound is set. Rows are labelled by id.
+        """
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("Timestamp >= ?")
+            params.append(_day_text(start))
+        if end is not None:
+            clauses.append("Timestamp < ?")
+            params.append(_day_text(end, ceil=True))
+        if name is not None and str(name).isascii():
+            clauses.append("lower(Name) = ?")
+            params.append(str(name).lower())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        columns = ', '.join(REQUIRED_COLUMNS)
+        raw = pd.read_sql_query(f"SELECT rowid, {columns} FROM entries {where} ORDER BY rowid",
+                                self.conn, params=params, index_col='rowid')
+        raw.index.name = None
+        return coerce(raw)[0]
+
+    @staticmethod
+    def _to_rows(df, labels):
+        """Convert a frame to (rowid, values...) tuples, storing blanks as NULL"""
+        values = df.reindex(columns=REQUIRED_COLUMNS)
+        if pd.api.types.is_float_dtype(values['Hours']):
+            # Typed rows store hours as the CSV writer would, not with float32's binary tail
+            values = values.assign(Hours=decimal_hours(values['Hours']))
+        if not pd.api.types.is_datetime64_dtype(values['Timestamp']):
+            values = values.assign(Timestamp=sortable_dates(values['Timestamp']))
+        columns = {}
+        for col in REQUIRED_COLUMNS:
+            # Format each distinct value once; missing and blank values become NULL
+            codes, uniques = pd.factorize(values[col])
+            text = [None if pd.isna(value) or value == '' else str(value) for value in uniques]
+            columns[col] = np.array(text + [None], dtype=object)[codes]
+        values = pd.DataFrame(columns, index=values.index)
+        return values, list(zip(labels, *columns.values()))
+
+    def _insert(self, df, labels):
+        values, rows = self._to_rows(df, labels)
+        placeholders = ', '.join('?' * (len(REQUIRED_COLUMNS) + 1))
+        self.conn.executemany(
+            f"INSERT INTO entries (rowid, {', '.join(REQUIRED_COLUMNS)}) VALUES ({placeholders})",
+            rows
+        )
+        if len(labels):
+            # Ids up to the highest stored are taken from now on, even once their rows are deleted
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)",
+                              (max(self._next_id(), int(max(labels)) + 1),))
+        return coerce(values.set_axis(labels))[0]
+
+    def _next_id(self):
+        """The lowest id never handed out; the caller holds a transaction"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        last = self.conn.execute("SELECT coalesce(max(rowid), 0) FROM entries").fetchone()[0]
+        return max(row[0] if row else 1, last + 1)
+
+    def append(self, new_df, current=None, op='add', ids=None):
+        """Insert rows in one transaction and return them as stored
+
+        The rows get new ids unless ids gives them, as when restoring
+        deleted rows under their old ones.
+        """
+        with self.lock(), self.conn:
+            if ids is None:
+                start = self._next_id()
+                ids = pd.RangeIndex(start, start + len(new_df))
+            return self._insert(new_df, pd.Index(ids, dtype='int64'))
+
+    def remove(self, df, mask):
+        """Delete the rows selected by mask in one transaction"""
+        with self.lock(), self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE rowid = ?",
+                                  [(int(label),) for label in df.index[mask]])
+
+    def update(self, df, rows):
+        """Store new values for the rows with the ids rows is labelled by, in one transaction"""
+        values, stored = self._to_rows(rows, rows.index)
+        assignments = ', '.join(f"{col} = ?" for col in REQUIRED_COLUMNS)
+        with self.lock(), self.conn:
+            self.conn.executemany(f"UPDATE entries SET {assignments} WHERE rowid = ?",
+                                  [(*row[1:], int(row[0])) for row in stored])
+        return coerce(values.set_axis(rows.index))[0]
+
+    def replace(self, df):
+        """Replace the whole table in one transaction"""
+        with self.lock(), self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self._insert(df, df.index)
+
+    def needs_compaction(self, threshold=None):
+        return False
+
+    def compact(self, df=None):
+        """Fold the write-ahead log back into the database file"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.conn.close()
+        self.file_lock.close()
+
+
+def partition_keys(timestamps):
+    """Return the partition of each datetime64 value: 'YYYY/MM', or UNDATED_PARTITION"""
+    months, inverse = np.unique(np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[M]'),
+                                return_inverse=True)
+    if not len(months):
+        # datetime_as_string can't format an empty array
+        return np.empty(0, dtype=object)
+    keys = np.char.replace(np.datetime_as_string(months), '-', '/').astype(object)
+    keys[np.isnat(months)] = UNDATED_PARTITION
+    return keys[inverse.reshape(-1)]
+
+
+class PartitionedStorage:
+    """Stores entries in one CsvStorage per month under a directory
+
+    data/2025/03.csv holds March 2025, data/undated.csv the entries without a
+    date, and data/manifest.json the row count and first and last timestamp
+    of every partition. Writes only touch the partitions their rows fall in,
+    so past months are never rewritten and their snapshots stay valid, and
+    query() reads just the partitions that overlap a date range. Row ids are
+    handed out for the whole directory from the manifest's next_id, so an
+    entry keeps its id when it moves to another month.
+    """
+
+    def __init__(self, directory):
+        self.file_path = directory
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, PARTITION_MANIFEST)
+        self.file_lock = FileLock(os.path.join(directory, '.lock'))
+        # Partition key -> CsvStorage, and each one's signature as of the last read
+        self._parts = {}
+        self._seen = None
+        # Next row id to hand out across all partitions, as of the last manifest read
+        self._next_id = 1
+        self.legacy_columns = []
+        self.quarantine = []
+        self.renumbered = 0
+        self.recovered = 0
+        self._lock = threading.RLock()
+        self.create_if_missing()
+
+    def create_if_missing(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.manifest_path):
+            with self._lock, self.lock():
+                self._write_manifest(self._scan())
+
+    def lock(self, shared=False):
+        """Context manager holding the inter-process lock on the whole directory"""
+        return self.file_lock.hold(shared)
+
+    def signature(self):
+        """Every write rewrites the manifest, so its stat changes with any partition"""
+        return CsvStorage._stat(self.manifest_path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, *key.split('/')) + '.csv'
+
+    def _part(self, key):
+        part = self._parts.get(key)
+        if part is None:
+            os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+            part = self._parts[key] = CsvStorage(self._path(key))
+        return part
+
+    def _scan(self):
+        """Rebuild the manifest from the partition files on disk"""
+        paths = glob.glob(os.path.join(self.directory, '[0-9]' * 4, '[0-9][0-9].csv'))
+        keys = ['/'.join(os.path.normpath(path)[:-len('.csv')].split(os.sep)[-2:]) for path in paths]
+        if os.path.exists(self._path(UNDATED_PARTITION)):
+            keys.append(UNDATED_PARTITION)
+        return {key: self._stats(self._part(key).read()) for key in keys}
+
+    def _read_manifest(self):
+        """Return the partition stats, noting the next free row id"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            partitions = manifest['partitions']
+        except (OSError, ValueError, KeyError):
+            manifest, partitions = {}, self._scan()
+        if 'next_id' in manifest:
+            self._next_id = max(self._next_id, manifest['next_id'])
+        else:
+            # A manifest from before row ids; start past every id the partitions hold
+            for key in partitions:
+                ids = self._part(key).read().index
+                if len(ids):
+                    self._next_id = max(self._next_id, int(ids.max()) + 1)
+        return partitions
+
+    def _write_manifest(self, manifest):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'next_id': int(self._next_id), 'partitions': dict(sorted(manifest.items()))}, f)
+        os.replace(temp_path, self.manifest_path)
+
+    @staticmethod
+    def _stats(rows, stats=None):
+        """Row count and first and last timestamp of a partition, extended by rows"""
+        stats = dict(stats or {'rows': 0, 'min': None, 'max': None})
+        stats['rows'] += len(rows)
+        timestamps = rows['Timestamp'].dropna()
+        if len(timestamps):
+            first = np.datetime_as_string(timestamps.min().to_datetime64(), unit='s')
+            last = np.datetime_as_string(timestamps.max().to_datetime64(), unit='s')
+            stats['min'] = min(stats['min'] or first, first)
+            stats['max'] = max(stats['max'] or last, last)
+        return stats
+
+    def _groups(self, timestamps):
+        """Yield (partition key, row positions) for the partitions rows fall in"""
+        keys = partition_keys(timestamps)
+        for key in pd.unique(keys):
+            yield key, np.flatnonzero(keys == key)
+
+    def read(self):
+        """Read every partition, oldest first, labelling rows by id"""
+        with self._lock, self.lock(shared=True):
+            frames = []
+            self.legacy_columns = []
+            self.quarantine = []
+            self.renumbered = 0
+            self.recovered = 0
+            self._seen = {}
+            for key in sorted(self._read_manifest()):
+                part = self._part(key)
+                frames.append(part.read())
+                self.legacy_columns += [col for col in part.legacy_columns if col not in self.legacy_columns]
+                self.quarantine += part.quarantine
+                self.renumbered += part.renumbered
+                self.recovered += part.recovered
+                self._seen[key] = part.signature()
+            df = concat(frames)
+            if self.renumbered or not df.index.is_unique:
+                # Partitions from before row ids each counted from 1
+                df.index, renumbered = number_rows(df.index.to_numpy(), self._next_id)
+                self.renumbered += renumbered
+            if len(df):
+                self._next_id = max(self._next_id, int(df.index.max()) + 1)
+            return df
+
+    def read_changes(self):
+        """Return the changes other processes journaled since the last read, or None"""
+        with self._lock, self.lock(shared=True):
+            manifest = self._read_manifest()
+            if self._seen is None or set(manifest) != set(self._seen):
+                return None
+            changes = []
+            touched = []
+            for key in sorted(manifest):
+                part = self._parts[key]
+                signature = part.signature()
+                if signature == self._seen[key]:
+                    continue
+                part_changes = part.read_changes()
+                if part_changes is None:
+                    return None
+                changes += part_changes
+                touched.append({i for op, rows in part_changes
+                                for i in (rows if op == 'delete' else rows.index).tolist()})
+                self._seen[key] = signature
+            # Partitions are applied one after another, which is only right if no row moved between them
+            if len(touched) > 1 and sum(map(len, touched)) != len(set().union(*touched)):
+                return None
+            return changes
+
+    def query(self, start=None, end=None, name=None):
+        """Read only the partitions that overlap [start, end), given as datetime64 or None
+
+        Partitions are read whole, so callers filter the rows again; name
+        doesn't narrow them. Entries without a date are included only when
+        neither bound is set. Rows are labelled by id.
+        """
+        with self._lock, self.lock(shared=True):
+            frames = []
+            for key, stats in sorted(self._read_manifest().items()):
+                if key == UNDATED_PARTITION:
+                    if start is not None or end is not None:
+                        continue
+                elif stats['min'] is None:
+                    continue
+                elif start is not None and np.datetime64(stats['max']) < start:
+                    continue
+                elif end is not None and np.datetime64(stats['min']) >= end:
+                    continue
+                # Separate readers, so this process's catch-up position isn't disturbed
+                part = CsvStorage(self._path(key))
+                try:
+                    frames.append(part.read())
+                finally:
+                    part.close()
+            return concat(frames)
+
+    def append(self, new_df, current=None, op='add', ids=None):
+        """Journal new rows in the partitions they belong to and return them as parsed
+
+        The rows get new ids unless ids gives them.
+        """
+        with self._lock, self.lock():
+            manifest = self._read_manifest()
+            if ids is None:
+                ids = np.arange(self._next_id, self._next_id + len(new_df))
+            ids = np.asarray(ids, dtype='int64')
+            if len(ids):
+                self._next_id = max(self._next_id, int(ids.max()) + 1)
+            stored = []
+            positions = []
+            timestamps = parse_timestamps(new_df['Timestamp'] if 'Timestamp' in new_df
+                                          else pd.Series(np.nan, index=new_df.index, dtype=object))[0]
+            for key, rows in self._groups(timestamps):
+                part = self._part(key)
+                stored.append(part.append(new_df.iloc[rows], None, op=op, ids=ids[rows]))
+                positions.append(rows)
+                manifest[key] = self._stats(stored[-1], manifest.get(key))
+                if self._seen is not None:
+                    self._seen[key] = part.signature()
+            self._write_manifest(manifest)
+            if len(stored) == 1:
+                return stored[0]
+            # Back in the order the rows were given
+            order = np.argsort(np.concatenate(positions), kind='stable')
+            return concat(stored).iloc[order]
+
+    def remove(self, df, mask):
+        """Journal the deletion of the rows selected by mask in their partitions"""
+        with self._lock, self.lock():
+            manifest = self._read_manifest()
+            rows = df[mask]
+            for key, positions in self._groups(rows['Timestamp'].to_numpy()):
+                part = self._part(key)
+                part.remove(rows.iloc[positions], np.ones(len(positions), dtype=bool))
+                manifest[key]['rows'] -= len(positions)
+                if self._seen is not None:
+                    self._seen[key] = part.signature()
+            self._write_manifest(manifest)
+
+    def update(self, df, rows):
+        """Store new values for the rows of df with the ids rows is labelled by
+
+        Rows whose new date falls in another month move there, keeping their
+        id. Each partition touched gets one journal record per kind of change.
+        """
+        with self._lock, self.lock():
+            manifest = self._read_manifest()
+            old_keys = partition_keys(df.loc[rows.index, 'Timestamp'].to_numpy())
+            new_keys = partition_keys(parse_timestamps(rows['Timestamp'])[0])
+            stored = []
+            positions = []
+            for key in sorted(set(old_keys) | set(new_keys)):
+                part = self._part(key)
+                leaving = (old_keys == key) & (new_keys != key)
+                staying = (old_keys == key) & (new_keys == key)
+                arriving = (old_keys != key) & (new_keys == key)
+                written = []
+                if leaving.any():
+                    part.remove(rows, leaving)
+                if staying.any():
+                    written.append(part.update(None, rows[staying]))
+                    positions.append(np.flatnonzero(staying))
+                if arriving.any():
+                    written.append(part.append(rows[arriving], None, ids=rows.index[arriving]))
+                    positions.append(np.flatnonzero(arriving))
+                # The count grows by the rows written, less those that were there before
+                manifest[key] = self._stats(concat(written), manifest.get(key))
+                manifest[key]['rows'] -= int(staying.sum() + leaving.sum())
+                stored += written
+                if self._seen is not None:
+                    self._seen[key] = part.signature()
+            self._write_manifest(manifest)
+            order = np.argsort(np.concatenate(positions), kind='stable')
+            return concat(stored).iloc[order]
+
+    def _rewrite(self, df, keys):
+        """Rewrite the given partitions from df and return their new manifest entries"""
+        groups = dict(self._groups(df['Timestamp'].to_numpy()))
+        stats = {}
+        for key in keys:
+            rows = df.iloc[groups.get(key, [])]
+            part = self._part(key)
+            part.replace(rows)
+            stats[key] = self._stats(rows)
+            if self._seen is not None:
+                self._seen[key] = part.signature()
+        return stats
+
+    def replace(self, df):
+        """Rewrite every partition from the given table"""
+        with self._lock, self.lock():
+            old = self._read_manifest()
+            keys = set(partition_keys(df['Timestamp'].to_numpy()))
+            manifest = self._rewrite(df, sorted(keys))
+            # Months left without entries are removed
+            for key in set(old) - keys:
+                part = self._parts.pop(key, None) or CsvStorage(self._path(key))
+                part.close()
+                for path in (part.file_path, part.journal_path, part.snapshot_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                if self._seen is not None:
+                    self._seen.pop(key, None)
+            self._write_manifest(manifest)
+
+    def needs_compaction(self, threshold=None):
+        return any(part.needs_compaction(threshold) for part in list(self._parts.values()))
+
+    def compact(self, df):
+        """Fold the journals of partitions that have one; df must be the current table"""
+        with self._lock, self.lock():
+            dirty = [key for key, part in self._parts.items() if part.needs_compaction(0)]
+            if dirty:
+                manifest = self._read_manifest()
+                manifest.update(self._rewrite(df, dirty))
+                self._write_manifest(manifest)
+
+    def close(self):
+        for part in self._parts.values():
+            part.close()
+        self.file_lock.close()
+
+
+def open_storage(file_path):
+    """Pick the storage backend: a directory is partitioned, otherwise by file extension"""
+    if file_path.endswith(('/', os.sep)) or os.path.isdir(file_path):
+        return PartitionedStorage(file_path)
+    if os.path.splitext(file_path)[1].lower() in SQLITE_EXTENSIONS:
+        return SqliteStorage(file_path)
+    return CsvStorage(file_path)
+
+
+def _copy_csv(csv_path, storage, chunksize):
+    """Copy every entry of a CSV data file, journal included, into storage under the same ids
+
+    The source is read through CsvStorage and held for reading until the
+    copy is done, so a running app can't change it halfway. Rows whose values
+    couldn't be parsed are copied blank and saved next to the new store, as
+    a load would. Returns the number of entries copied.
+    """
+    source = CsvStorage(csv_path)
+    try:
+        with source.lock(shared=True):
+            df = source.read()
+            if source.quarantine:
+                quarantine_path = storage.file_path + ".quarantine.csv"
+                rows = pd.concat(source.quarantine).reindex(columns=REQUIRED_COLUMNS)
+                rows.to_csv(quarantine_path, mode='a', header=not os.path.exists(quarantine_path), index=False)
+            for start in range(0, len(df), chunksize):
+                chunk = df.iloc[start:start + chunksize]
+                storage.append(chunk, ids=chunk.index)
+            return len(df)
+    finally:
+        source.close()
+
+
+def migrate_csv_to_sqlite(csv_path, db_path, chunksize=50000):
+    """Copy every entry from a CSV data file into an SQLite database"""
+    storage = SqliteStorage(db_path)
+    try:
+        return _copy_csv(csv_path, storage, chunksize)
+    finally:
+        storage.close()
+
+
+def migrate_csv_to_partitions(csv_path, directory, chunksize=50000):
+    """Copy every entry from a CSV data file into monthly partitions"""
+    storage = PartitionedStorage(directory)
+    try:
+        return _copy_csv(csv_path, storage, chunksize)
+    finally:
+        storage.close()
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from benchmarks import run, synthetic
+from schema import REQUIRED_COLUMNS
+
+
+def test_synthetic_data_is_the_same_for_the_same_seed():
+    df = synthetic.generate(500, seed=3)
+
+    assert sorted(df.columns) == sorted(REQUIRED_COLUMNS) and len(df) == 500
+    pd.testing.assert_frame_equal(df, synthetic.generate(500, seed=3))
+    assert not df.equals(synthetic.generate(500, seed=4))
+    assert df['Timestamp'].is_monotonic_increasing
+
+
+def test_compare_flags_only_slowdowns_past_the_tolerance_and_floor():
+    baseline = {'results': {'1000': {'load': 0.100, 'add': 0.001, 'query': 0.050}}}
+    results = {'results': {'1000': {'load': 0.130, 'add': 0.004, 'query': 0.052, 'new': 1.0},
+                           '5000': {'load': 9.0}}}
+
+    assert run.compare(results, baseline, 0.25) == [('1000', 'load', 0.100, 0.130)]
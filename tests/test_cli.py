@@ -0,0 +1,25 @@
+import json
+
+import cli
+
+
+def test_commands_write_data_to_stdout_and_messages_to_stderr(tmp_path, capsys):
+    path = str(tmp_path / 'data.csv')
+    assert cli.main(['--file', path, 'add', 'Ann', '--location', 'Hall', '--event', 'A', '--hours', '2',
+                     '--date', '2024-03-01']) == 0
+    assert cli.main(['--file', path, 'add', 'ann', '--event', 'B', '--hours', '1.5', '--date', '2024-04-01']) == 0
+    assert cli.main(['--file', path, 'add', 'Bob', '--hours', 'lots']) == 1
+    assert capsys.readouterr().err.splitlines()[-1] == "Hours must be a number!"
+
+    assert cli.main(['--file', path, 'export', '-', '--format', 'jsonl', '--columns', 'Name,Event,Hours',
+                     '--to', '2024-03-31']) == 0
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == [{'Name': 'Ann', 'Event': 'A', 'Hours': 2.0}]
+    assert err == "Exported 1 entries\n"
+
+    assert cli.main(['--file', path, 'report', '--by', 'month']) == 0
+    assert capsys.readouterr().out.splitlines() == ['Group,Hours,Entries', '2024-03,2.0,1', '2024-04,1.5,1']
+
+    assert cli.main(['--file', path, 'stats', '--json']) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert (stats['entries'], stats['people'], stats['hours'], stats['years']) == (2, 1, 3.5, ['2024'])
@@ -0,0 +1,303 @@
+import os
+import threading
+
+from data_manager import DataManager
+from events import PEOPLE_ADDED, PEOPLE_REMOVED, RELOADED, ROWS_ADDED, ROWS_REMOVED, ROWS_UPDATED
+
+
+def test_case_only_merge_changes_the_shown_spelling(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Rehan Abbu', 'Hall', 'A', '2')
+    dm.add_person_info('Rehan Abbu', 'Hall', 'B', '1')
+    # Stored in another case by hand; the first spelling seen stays the one shown
+    dm.add_entry('rehan abbu', '2024-01-01 10:00:00', 'Hall', 'C', '1')
+    dm.add_person_info('Ann', 'Hall', 'D', '1')
+    assert dm.get_all_people() == ['Ann', 'Rehan Abbu']
+    dm.get_report()
+    events = []
+    dm.subscribe(lambda kind, payload: events.append((kind, payload)))
+
+    assert dm.merge_people(['Rehan Abbu'], 'rehan abbu')[0]
+
+    assert dm.get_all_people() == ['Ann', 'rehan abbu']
+    assert dm.get_report() == [('rehan abbu', 4.0, 3), ('Ann', 1.0, 1)]
+    assert (PEOPLE_REMOVED, ['Rehan Abbu']) in events
+    assert (PEOPLE_ADDED, ['rehan abbu']) in events
+    dm.add_person_info('Rehan Abbu', 'Hall', 'E', '1')
+    assert {entry['Name'] for entry in dm.get_person_info('rehan abbu')} == {'rehan abbu'}
+    dm.close()
+
+    reloaded = DataManager(path)
+    assert reloaded.get_all_people() == ['Ann', 'rehan abbu']
+    reloaded.close()
+
+
+def test_search_people_does_not_wait_for_a_writer(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    dm.add_person_info('Rehan Abbu', 'Hall', 'A', '1')
+    result = []
+    # The lock is held by this thread, so another one searching would block if it took it
+    with dm._lock:
+        searcher = threading.Thread(target=lambda: result.append(dm.search_people('reh')))
+        searcher.start()
+        searcher.join(timeout=5)
+        assert not searcher.is_alive()
+        dm.add_person_info('Reha Ng', 'Hall', 'B', '1')
+    assert result == [['Rehan Abbu']]
+    assert dm.search_people('reh') == ['Reha Ng', 'Rehan Abbu']
+    dm.close()
+
+
+def test_jsonl_export_writes_hours_as_typed(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    dm.add_person_info('Ann', 'Hall', 'A', '1.1')
+    dm.add_person_info('Ann', 'Hall', 'B', '2')
+    dm.add_person_info('Ann', 'Hall', 'C', '')
+    assert dm.export_entries(str(tmp_path / 'out.jsonl'), columns=['Event', 'Hours'])[0]
+    lines = (tmp_path / 'out.jsonl').read_text().splitlines()
+    assert lines == ['{"Event":"A","Hours":1.1}', '{"Event":"B","Hours":2.0}', '{"Event":"C","Hours":null}']
+    dm.close()
+
+
+def test_entries_window_version_covers_earlier_change_events(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    versions = []
+    dm.subscribe(lambda kind, payload: versions.append(dm.version))
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    version, total, records = dm.get_entries_window(0, 10)
+    assert total == 1 and versions and max(versions) <= version
+    dm.add_person_info('Ann', 'Hall', 'B', '1')
+    assert versions[-1] > version
+    dm.close()
+
+
+def test_deleting_the_row_a_spelling_came_from_respells_the_name(tmp_path):
+    for path in (str(tmp_path / 'data.csv'), str(tmp_path / 'data.db'), str(tmp_path / 'parts') + os.sep):
+        dm = DataManager(path)
+        dm.add_person_info('Ann', 'Hall', 'A', '2')
+        dm.add_entry('ann', '2024-01-01 10:00:00', 'Hall', 'B', '1')
+        dm.get_report()
+        events = []
+        dm.subscribe(lambda kind, payload: events.append((kind, payload)))
+
+        assert dm.delete_entries([entry for entry in dm.get_person_info('Ann') if entry['Event'] == 'A'])
+
+        assert dm.get_all_people() == ['ann']
+        assert dm.search_people('an') == ['ann']
+        assert dm.get_report() == [('ann', 1.0, 1)]
+        assert (PEOPLE_REMOVED, ['Ann']) in events
+        assert (PEOPLE_ADDED, ['ann']) in events
+        dm.add_person_info('ANN', 'Hall', 'C', '1')
+        assert {entry['Name'] for entry in dm.get_person_info('ann')} == {'ann'}
+        dm.close()
+
+        reloaded = DataManager(path)
+        assert reloaded.get_all_people() == ['ann']
+        reloaded.close()
+
+
+def test_update_entries_keeps_ids_and_updates_indexes(tmp_path):
+    for path in (str(tmp_path / 'data.csv'), str(tmp_path / 'data.db'), str(tmp_path / 'parts') + os.sep):
+        dm = DataManager(path)
+        for day, event in enumerate('ABC', 1):
+            dm.add_entry('Ann', f'2024-03-0{day} 10:00:00', 'Hall', event, '1')
+        ids = {entry['Event']: entry['Id'] for entry in dm.get_person_info('Ann')}
+        dm.get_report()
+        events = []
+        dm.subscribe(lambda kind, payload: events.append(kind))
+
+        assert dm.update_entries([ids['A'], ids['C']], {'Hours': '2.5', 'Location': 'Park'}) == \
+            (True, "Updated 2 entries")
+        assert dm.update_entries([ids['B']], {'Hours': 'lots'}) == (False, "Hours must be a number!")
+        assert dm.update_entries([ids['B']], {'Name': 'ANN', 'Timestamp': '2024-05-01 09:00:00'})[0]
+
+        expected = [(ids['A'], 'Ann', 'Park', 2.5), (ids['B'], 'Ann', 'Hall', 1.0), (ids['C'], 'Ann', 'Park', 2.5)]
+        assert [(entry['Id'], entry['Name'], entry['Location'], entry['Hours'])
+                for entry in dm.get_person_info('Ann')] == expected
+        assert dm.get_report() == [('Ann', 6.0, 3)]
+        assert [entry['Event'] for entry in dm.query(start='2024-05-01', end='2024-05-31')] == ['B']
+        assert events == [ROWS_UPDATED, ROWS_UPDATED]
+        dm.close()
+
+        reloaded = DataManager(path)
+        assert [(entry['Id'], entry['Name'], entry['Location'], entry['Hours'])
+                for entry in reloaded.get_person_info('Ann')] == expected
+        reloaded.close()
+
+
+def test_cache_is_read_once_and_again_only_after_the_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    dm.compact()
+    reads = []
+    read = dm.storage.read
+    monkeypatch.setattr(dm.storage, 'read', lambda: reads.append(1) or read())
+
+    dm.get_all_people()
+    dm.get_person_info('Ann')
+    assert reads == []
+
+    # Edited by hand, as with a spreadsheet
+    with open(path, 'a') as f:
+        f.write('5,Bob,Park,B,2,2024-01-01 10:00:00\n')
+    assert dm.get_all_people() == ['Ann', 'Bob']
+    assert [(entry['Id'], entry['Location'], entry['Hours'])
+            for entry in dm.get_person_info('Bob')] == [(5, 'Park', 2.0)]
+    assert reads == [1]
+    dm.close()
+
+
+def test_delete_and_restore_several_entries_in_one_write(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for event in 'ABC':
+        dm.add_entry('Ann', '2024-03-01 10:00:00', 'Hall', event, '1')
+    entries = dm.get_person_info('Ann')
+    events = []
+    dm.subscribe(lambda kind, payload: events.append((kind, len(payload))))
+
+    assert dm.delete_entries(entries[:2])
+    assert [entry['Event'] for entry in dm.get_person_info('Ann')] == ['C']
+    assert dm.restore_entries(entries[:2])
+    assert dm.restore_entries(entries[:2])
+    assert dm.get_person_info('Ann') == entries
+    assert events == [(ROWS_REMOVED, 2), (ROWS_ADDED, 2)]
+
+    # Rows from before ids are matched by their values
+    assert dm.delete_entries([{key: value for key, value in entries[2].items() if key != 'Id'}])
+    assert [entry['Event'] for entry in dm.get_person_info('Ann')] == ['A', 'B']
+    dm.close()
+
+
+def test_import_skips_rows_already_stored_or_seen_in_an_earlier_chunk(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    dm.add_entry('Ann', '2024-03-01 10:00:00', 'Hall', 'A', '1')
+    import_path = tmp_path / 'import.csv'
+    import_path.write_text('Name,Timestamp,Location,Event,Hours,Extra\n'
+                           'Ann,2024-03-01 10:00:00,Hall,A,1.0,x\n'
+                           'Bob,2024-03-02 10:00:00,Park,B,2,x\n'
+                           'Bob,2024-03-02 10:00:00,Park,B,2,x\n'
+                           'Cy,2024-03-03 10:00:00,Park,C,lots,x\n'
+                           'Dee,2024-03-04 10:00:00,Park,D,3,x\n')
+    progress = []
+
+    success, message = dm.import_entries(str(import_path), progress=lambda *counts: progress.append(counts),
+                                         chunksize=2)
+
+    assert success
+    assert message.startswith("Successfully imported 2 new entries (3 duplicate or invalid rows skipped).")
+    assert progress == [(2, 1), (4, 1), (5, 2)]
+    entries = [(entry['Name'], entry['Event']) for entry in dm.get_all_entries()]
+    assert entries == [('Ann', 'A'), ('Bob', 'B'), ('Dee', 'D')]
+    assert 'lots' in open(dm.quarantine_path).read()
+    dm.close()
+
+
+def test_entries_page_is_one_window_of_the_sorted_entries(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for name, event in [('cy', 'A'), ('Ann', 'B'), ('bob', 'C'), ('Ann', 'D'), ('Dee', 'E')]:
+        dm.add_entry(name, '2024-03-01 10:00:00', 'Hall', event, '1')
+
+    assert dm.count_entries() == 5
+    total, records = dm.get_entries_page(1, 3)
+    assert total == 5
+    assert [record['Event'] for record in records] == ['D', 'C', 'A']
+    total, records = dm.get_entries_page(3, 10, descending=True)
+    assert [record['Event'] for record in records] == ['D', 'B']
+    assert dm.get_entries_page(10, 10) == (5, [])
+    dm.close()
+
+
+def test_changes_are_announced_as_rows_and_people_added_or_removed(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    events = []
+    dm.subscribe(lambda kind, payload: events.append(
+        (kind, [record['Event'] for record in payload] if kind in (ROWS_ADDED, ROWS_REMOVED) else payload)))
+
+    dm.add_person_info('ann', 'Hall', 'B', '1')
+    dm.add_person_info('Bob', 'Park', 'C', '1')
+    dm.delete_entries(dm.get_person_info('Bob'))
+    dm.compact()
+    # Rewritten by hand, so the next read starts over
+    with open(path, 'a') as f:
+        f.write('9,Cy,Park,D,1,2024-01-01 10:00:00\n')
+    dm.get_all_people()
+
+    assert events == [(ROWS_ADDED, ['B']), (ROWS_ADDED, ['C']), (PEOPLE_ADDED, ['Bob']), (ROWS_REMOVED, ['C']),
+                      (PEOPLE_REMOVED, ['Bob']), (RELOADED, None)]
+    dm.close()
+
+
+def test_export_filters_picks_columns_and_writes_in_chunks(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for day, name in enumerate(['Ann', 'Bob', 'ann', 'Ann'], 1):
+        dm.add_entry(name, f'2024-03-0{day} 10:00:00', 'Hall', str(day), '1')
+    export_path = tmp_path / 'ann.tsv'
+    progress = []
+
+    success, message = dm.export_entries(str(export_path), columns=['Timestamp', 'Event'], name='ANN',
+                                         start='2024-03-02', end='2024-03-04',
+                                         progress=lambda *counts: progress.append(counts), chunksize=1)
+
+    assert (success, message) == (True, f"Exported 2 entries to {export_path}")
+    assert export_path.read_text().splitlines() == ['Timestamp\tEvent', '2024-03-03 10:00:00\t3',
+                                                    '2024-03-04 10:00:00\t4']
+    assert progress == [(1, 2), (2, 2)]
+
+    cancel = threading.Event()
+    cancel.set()
+    assert not dm.export_entries(str(tmp_path / 'all.csv'), cancel=cancel)[0]
+    assert not (tmp_path / 'all.csv').exists() and not (tmp_path / 'all.csv.tmp').exists()
+    dm.close()
+
+
+def test_entries_page_filters_by_date_and_sorts_by_any_column(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for name, timestamp, hours in [('Ann', '2024-03-05 10:00:00', '3'), ('Bob', '2024-03-01 09:00:00', ''),
+                                   ('Cy', '2024-02-28 23:59:59', '1'), ('Dee', '2024-03-10 00:00:00', '2'),
+                                   ('Eve', '2024-03-01 09:00:00', '5')]:
+        dm.add_entry(name, timestamp, 'Hall', 'A', hours)
+
+    total, records = dm.get_entries_page(0, 10, sort='Timestamp', descending=True,
+                                         start='2024-03-01', end='2024-03-10')
+    assert total == 4
+    assert [record['Name'] for record in records] == ['Dee', 'Ann', 'Eve', 'Bob']
+    # Missing hours sort last
+    total, records = dm.get_entries_page(0, 10, sort='Hours')
+    assert [record['Name'] for record in records] == ['Cy', 'Dee', 'Ann', 'Eve', 'Bob']
+    assert dm.count_entries(start='2024-02-29', end='2024-02-29') == 0
+    dm.close()
+
+
+def test_entries_search_combines_with_the_other_filters(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for name, location, event in [('Ann', 'Food Bank', 'Packing'), ('Bob', 'Food Bank', 'Sorting'),
+                                  ('Ann', 'Park', 'Food drive'), ('Ann', 'Library', 'Packing')]:
+        dm.add_entry(name, '2024-03-01 10:00:00', location, event, '1')
+
+    assert dm.count_entries(text='food') == 3
+    total, records = dm.get_entries_page(0, 10, name='ann', text='food', sort='Location')
+    assert total == 2
+    assert [record['Location'] for record in records] == ['Food Bank', 'Park']
+    dm.add_entry('Ann', '2024-03-02 10:00:00', 'Food Bank', 'Packing', '2')
+    assert dm.count_entries(name='Ann', text='pack food', start='2024-03-02') == 1
+    dm.close()
+
+
+def test_duplicate_names_are_grouped_through_chains_of_alike_pairs(tmp_path):
+    dm = DataManager(str(tmp_path / 'data.csv'))
+    for name, entries in [('Rehan Abbu', 3), ('Rehan Abu', 1), ('Rehn Abu', 2), ('Ann Lee', 1), ('Anne Lee', 1),
+                          ('Zed Quinn', 1)]:
+        for _ in range(entries):
+            dm.add_person_info(name, 'Hall', 'A', '1')
+
+    assert dm.find_duplicate_people() == [[('Ann Lee', 1), ('Anne Lee', 1)],
+                                          [('Rehan Abbu', 3), ('Rehn Abu', 2), ('Rehan Abu', 1)]]
+    assert dm.similar_people('rehan abbu') == ['Rehan Abu']
+    assert dm.merge_people(['Rehan Abu', 'Rehn Abu'], 'Rehan Abbu') == (True, "Merged 3 entries into Rehan Abbu")
+    assert dm.find_duplicate_people() == [[('Ann Lee', 1), ('Anne Lee', 1)]]
+    assert dm.get_report()[0] == ('Rehan Abbu', 6.0, 6)
+    dm.close()
@@ -0,0 +1,88 @@
+import pandas as pd
+
+from benchmarks.synthetic import people
+from indexes import NameIndex, TextIndex, TimestampIndex, TrigramIndex
+
+
+def test_name_index_matches_any_case_and_keeps_the_first_spelling():
+    index = NameIndex()
+    index.rebuild(pd.Series(['Ann Lee', 'bob', 'ANN LEE', None, 'Bob'], index=[3, 5, 7, 8, 9]))
+
+    assert index.names() == ['Ann Lee', 'bob']
+    assert index.rows('ann lee') == [3, 7]
+    assert 'BOB' in index and 'Cy' not in index
+    assert index.add(10, 'ann lee') == 'Ann Lee'
+    assert index.add(11, 'Cy') == 'Cy'
+    assert index.names() == ['Ann Lee', 'bob', 'Cy']
+
+    index.remove(5, 'bob')
+    index.remove(9, 'Bob')
+    assert 'bob' not in index
+    assert index.names() == ['Ann Lee', 'Cy']
+
+
+def test_name_search_by_prefix_word_or_substring():
+    index = NameIndex()
+    index.rebuild(pd.Series(['Ann Lee', 'Lee Park', 'annabel', 'Bo Anders']))
+    people = index.snapshot()
+
+    assert people.search('an') == ['Ann Lee', 'annabel']
+    assert people.search('le', 'token') == ['Ann Lee', 'Lee Park']
+    assert people.search('an le', 'token') == ['Ann Lee']
+    assert people.search('nde', 'substring') == ['Bo Anders']
+    assert people.search('') == ['Ann Lee', 'annabel', 'Bo Anders', 'Lee Park']
+
+    # A snapshot keeps the names it was made with
+    index.add(9, 'Anton')
+    assert people.search('ant') == []
+    assert index.search('ant') == ['Anton']
+
+
+def test_timestamp_index_finds_date_ranges_in_time_then_label_order():
+    index = TimestampIndex()
+    index.rebuild(pd.Series(pd.to_datetime(['2024-03-02', '2024-03-01', None, '2024-03-02', '2024-04-01']),
+                            index=[1, 2, 3, 5, 6]))
+    # Restored under its old label, it goes before the later label with its timestamp
+    index.add(pd.Series(pd.to_datetime(['2024-03-02', None]), index=[4, 7]))
+
+    assert index.range('2024-03-01', '2024-04-01').tolist() == [2, 1, 4, 5]
+    assert index.range(start='2024-03-02').tolist() == [1, 4, 5, 6]
+    assert index.range().tolist() == [2, 1, 4, 5, 6, 3, 7]
+
+    index.remove(pd.Series(pd.to_datetime(['2024-03-02', None]), index=[4, 3]))
+    assert index.range().tolist() == [2, 1, 5, 6, 7]
+    assert len(index) == 5
+
+
+def test_text_search_needs_every_word_to_start_a_word_of_location_or_event():
+    index = TextIndex()
+    index.rebuild(pd.DataFrame({'Location': ['Food Bank', 'food bank ', 'Park', None],
+                                'Event': ['Packing', 'Sorting', 'Food drive', 'Packing']}, index=[1, 2, 3, 4]))
+
+    assert sorted(index.search('FOO')) == [1, 2, 3]
+    assert sorted(index.search('food pack')) == [1]
+    assert sorted(index.search('pack')) == [1, 4]
+    assert sorted(index.search('ank')) == []
+
+    index.remove(pd.DataFrame({'Location': ['Food Bank'], 'Event': ['Packing']}, index=[1]))
+    index.add(pd.DataFrame({'Location': ['Library'], 'Event': ['Packing']}, index=[5]))
+    assert sorted(index.search('pack')) == [4, 5]
+    assert sorted(index.search('food b')) == [2]
+
+
+def test_trigram_pruning_finds_every_name_a_full_comparison_finds():
+    names = people(300, seed=1) + ['Rehan Abbu', 'rehan  abbu', 'Rehan Abu', 'Reham Abbu']
+    index = TrigramIndex()
+    index.rebuild(names)
+
+    def dice(a, b):
+        a, b = TrigramIndex.trigrams(TrigramIndex.normalize(a)), TrigramIndex.trigrams(TrigramIndex.normalize(b))
+        return 2 * len(a & b) / (len(a) + len(b))
+
+    for name in names[::7] + ['Rehan Abbu']:
+        for threshold in (0.5, 0.7, 0.9):
+            expected = {other for other in names if dice(name, other) >= threshold}
+            assert {other for other, score in index.similar(name, threshold)} == expected
+    # Spellings with the same normal form match fully
+    assert [name for name, score in index.similar('REHAN ABBU', 0.7)][:3] == ['rehan  abbu', 'Rehan Abbu', 'Rehan Abu']
+    assert index.similar('REHAN ABBU', 0.7)[0][1] == 1.0
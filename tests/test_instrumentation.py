@@ -0,0 +1,34 @@
+from concurrent.futures import Future
+
+import instrumentation
+
+
+class Worker:
+    def page(self, offset):
+        return 10, [{'Id': offset}, {'Id': offset + 1}]
+
+
+def test_instrumented_calls_are_counted_with_their_rows_and_slow_ones_logged(tmp_path, monkeypatch):
+    recorder = instrumentation.Recorder()
+    monkeypatch.setattr(instrumentation, 'recorder', recorder)
+    monkeypatch.setattr(instrumentation, 'SLOW_MS', 0)
+    monkeypatch.setattr(instrumentation, 'SLOW_LOG_PATH', str(tmp_path / 'slow.log'))
+
+    monkeypatch.setattr(instrumentation, 'ENABLED', False)
+    worker = instrumentation.instrument(Worker(), prefix='dm.')
+    assert 'page' not in vars(worker)
+
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    worker = instrumentation.instrument(Worker(), prefix='dm.')
+    assert worker.page(0) == (10, [{'Id': 0}, {'Id': 1}])
+    worker.page(5)
+    future = Future()
+    instrumentation.track('ui.load', future)
+    future.set_result([1, 2, 3])
+
+    stats = dict(recorder.snapshot())
+    assert sorted(stats) == ['dm.page', 'ui.load']
+    assert (stats['dm.page'].calls, stats['dm.page'].rows) == (2, 4)
+    assert (stats['ui.load'].calls, stats['ui.load'].rows) == (1, 3)
+    assert stats['dm.page'].percentile(0.95) <= stats['dm.page'].max_ms
+    assert len((tmp_path / 'slow.log').read_text().splitlines()) == 3
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+from data_manager import DataManager
+from io_worker import AsyncDataManager, run_in_thread
+
+
+def test_calls_run_in_order_on_one_thread_once_the_data_manager_exists(tmp_path):
+    started = threading.Event()
+
+    def create():
+        started.wait()
+        return DataManager(str(tmp_path / 'data.csv'))
+
+    dm = AsyncDataManager(factory=create)
+    # Queued before the DataManager is built
+    added = dm.add_person_info('Ann', 'Hall', 'A', '1')
+    people = dm.get_all_people()
+    threads = dm.executor.submit(threading.current_thread)
+    started.set()
+
+    assert added.result(timeout=10) == (True, "Information added successfully!")
+    assert people.result(timeout=10) == ['Ann']
+    assert threads.result(timeout=10) is not threading.current_thread()
+    assert dm.file_path == str(tmp_path / 'data.csv')
+    dm.close().result(timeout=10)
+    dm.shutdown()
+
+
+def test_run_in_thread_passes_on_exceptions():
+    with pytest.raises(ZeroDivisionError):
+        run_in_thread(lambda x: 1 / x, 0).result(timeout=10)
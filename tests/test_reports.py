@@ -0,0 +1,34 @@
+import pandas as pd
+
+from reports import ReportTotals
+from schema import coerce
+
+
+def entries(*rows):
+    raw = pd.DataFrame(rows, columns=['Name', 'Location', 'Event', 'Hours', 'Timestamp'])
+    return coerce(raw.set_axis(range(1, len(rows) + 1)))[0]
+
+
+def test_totals_kept_up_to_date_match_totals_built_from_scratch():
+    df = entries(('Ann', 'Hall', 'Packing', '2', '2023-12-31 10:00:00'),
+                 ('ann', 'Hall', 'Sorting', '1.5', '2024-01-02 10:00:00'),
+                 ('Bob', 'Park', 'Packing', '', '2024-01-05 10:00:00'),
+                 ('Bob', 'Park', 'Packing', '3', None))
+    totals = ReportTotals()
+    totals.rebuild(df.iloc[:1])
+    totals.add(df.iloc[1:])
+    totals.remove(df.iloc[[0]])
+    totals.add(df.iloc[[0]])
+
+    fresh = ReportTotals()
+    fresh.rebuild(df)
+    for by in ('person', 'event', 'location', 'month'):
+        for year in (None, 2023, 2024):
+            assert totals.report(by, year) == fresh.report(by, year)
+    assert totals.report('person') == [('ann', 3.5, 2), ('bob', 3.0, 2)]
+    assert totals.report('event', 2024) == [('Sorting', 1.5, 1), ('Packing', 0.0, 1)]
+    assert totals.report('month') == [('', 3.0, 1), ('2023-12', 2.0, 1), ('2024-01', 1.5, 2)]
+    assert totals.years() == ['2024', '2023']
+
+    totals.remove(df)
+    assert totals.report('person') == [] and totals.years() == []
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from schema import REQUIRED_COLUMNS, SCHEMA, coerce, concat
+
+
+def test_coerce_types_every_column_and_flags_unreadable_values():
+    raw = pd.DataFrame({'Name': [' Ann ', 'Ann', ''], 'Location': ['Hall', None, 'Park'], 'Event': ['A', 'B', 'C'],
+                        'Hours': ['1.5', 'lots', ''], 'Timestamp': ['2024-03-01 10:00:00', '2024-03-02', 'never'],
+                        'Information': ['x', 'y', 'z']})
+
+    df, invalid = coerce(raw)
+
+    assert list(df.columns) == REQUIRED_COLUMNS
+    assert {col: str(dtype) for col, dtype in df.dtypes.items()} == SCHEMA
+    assert df['Name'].cat.categories.tolist() == ['Ann']
+    assert df['Name'].isna().tolist() == [False, False, True]
+    assert df['Location'].isna().tolist() == [False, True, False]
+    assert df['Hours'].tolist()[0] == 1.5 and np.isnan(df['Hours'].tolist()[1:]).all()
+    assert df['Timestamp'].tolist()[:2] == [pd.Timestamp('2024-03-01 10:00:00'), pd.Timestamp('2024-03-02')]
+    assert invalid.tolist() == [False, True, True]
+
+
+def test_concat_merges_categories_without_falling_back_to_text():
+    first = coerce(pd.DataFrame({'Name': ['Ann'], 'Hours': ['1']}))[0]
+    second = coerce(pd.DataFrame({'Name': ['Bob', 'Ann'], 'Hours': ['2', '']}).set_axis([1, 2]))[0]
+
+    df = concat([first, second])
+
+    assert str(df['Name'].dtype) == 'category'
+    assert df['Name'].tolist() == ['Ann', 'Bob', 'Ann']
+    assert df.index.tolist() == [0, 1, 2]
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after(statement, modules):
+    """Which of modules a fresh interpreter has imported after running statement"""
+    code = f"import sys; {statement}; print(','.join(m for m in {modules!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return [module for module in output.stdout.strip().split(',') if module]
+
+
+def test_the_window_and_command_line_start_without_loading_what_they_do_not_need():
+    heavy = ['pandas', 'numpy', 'data_manager', 'storage']
+    assert loaded_after('import app', heavy) == []
+    assert loaded_after('import cli', heavy + ['tkinter']) == []
@@ -0,0 +1,385 @@
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+from data_manager import DataManager
+from events import PEOPLE_ADDED, PEOPLE_REMOVED, RELOADED, ROWS_ADDED, ROWS_REMOVED
+from storage import CsvStorage, SqliteStorage, migrate_csv_to_partitions, migrate_csv_to_sqlite
+
+
+def names(path):
+    dm = DataManager(path)
+    try:
+        return sorted(entry['Event'] for entry in dm.get_person_info('Ann'))
+    finally:
+        dm.close()
+
+
+def test_entry_added_after_torn_journal_record_survives_restart(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    for event in ('A', 'B', 'C'):
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    dm.storage.close()
+
+    # A crash mid-write leaves half of a record at the end of the journal
+    journal = path + '.journal'
+    with open(journal, 'rb') as f:
+        lines = f.readlines()
+    with open(journal, 'wb') as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:len(lines[-1]) // 2])
+
+    dm = DataManager(path)
+    assert sorted(entry['Event'] for entry in dm.get_person_info('Ann')) == ['A', 'B']
+    dm.add_person_info('Ann', 'Hall', 'D', '1')
+    dm.storage.close()
+
+    assert names(path) == ['A', 'B', 'D']
+
+
+def test_record_cut_before_its_newline_is_not_joined_to_the_next(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    dm.storage.close()
+
+    # The whole record but not its line break reached the disk, so it was never acknowledged
+    journal = path + '.journal'
+    with open(journal, 'rb+') as f:
+        f.truncate(os.path.getsize(journal) - 1)
+
+    other = CsvStorage(path)
+    try:
+        assert len(other.read()) == 0
+    finally:
+        other.close()
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'B', '1')
+    dm.storage.close()
+
+    assert names(path) == ['B']
+
+
+def test_copied_data_folder_keeps_uncompacted_entries(tmp_path):
+    source, copy = tmp_path / 'source', tmp_path / 'copy'
+    source.mkdir()
+    path = str(source / 'data.csv')
+    dm = DataManager(path)
+    for event in ('A', 'B', 'C'):
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    dm.storage.close()
+
+    # A plain copy gets a new inode and mtime, but the same contents
+    copy.mkdir()
+    for name in os.listdir(source):
+        with open(source / name, 'rb') as src, open(copy / name, 'wb') as dst:
+            dst.write(src.read())
+
+    assert names(str(copy / 'data.csv')) == ['A', 'B', 'C']
+    dm = DataManager(str(copy / 'data.csv'))
+    dm.add_person_info('Ann', 'Hall', 'D', '1')
+    dm.storage.close()
+    assert names(str(copy / 'data.csv')) == ['A', 'B', 'C', 'D']
+
+
+def test_journal_for_edited_file_is_replayed_and_kept(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    dm.compact()
+    dm.add_person_info('Ann', 'Hall', 'B', '1')
+    dm.storage.close()
+
+    # Edited outside the app: the journal's record of B isn't in the file
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('99,Bob,Hall,Z,2,2024-01-01 10:00:00\n')
+
+    dm = DataManager(path)
+    assert sorted(entry['Event'] for entry in dm.get_person_info('Ann')) == ['A', 'B']
+    assert [entry['Event'] for entry in dm.get_person_info('Bob')] == ['Z']
+    dm.storage.close()
+    # The file was rewritten with the replayed rows, and the old journal moved aside
+    assert names(path) == ['A', 'B']
+    assert any(name.endswith('.orphaned') for name in os.listdir(tmp_path))
+
+
+def test_journal_left_by_crash_mid_compaction_is_not_applied_twice(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    for event in ('A', 'B', 'C'):
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    dm.delete_entries(dm.get_person_info('Ann')[:1])
+    journal = open(path + '.journal', 'rb').read()
+    dm.compact()
+    dm.storage.close()
+
+    # The new file was swapped in, but the crash came before the journal was reset
+    with open(path + '.journal', 'wb') as f:
+        f.write(journal)
+
+    assert names(path) == ['B', 'C']
+
+
+def test_sqlite_stores_typed_hours_as_written(tmp_path):
+    path = str(tmp_path / 'data.db')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1.1')
+    dm.add_person_info('Bob', 'Hall', 'B', '2.2')
+    # A merge rewrites the typed rows, and undoing a delete stores them again
+    assert dm.merge_people(['Ann'], 'Anne')[0]
+    entries = dm.get_person_info('Bob')
+    assert dm.delete_entries(entries)
+    assert dm.restore_entries(entries)
+    hours = sorted(row[0] for row in dm.storage.conn.execute("SELECT Hours FROM entries"))
+    assert hours == ['1.1', '2.2']
+    assert dm.storage.conn.execute("SELECT count(*) FROM entries WHERE Hours = '1.1'").fetchone()[0] == 1
+    dm.close()
+
+
+def test_partitioned_store_compacts_after_every_entry_is_deleted(tmp_path):
+    path = str(tmp_path / 'data') + os.sep
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    assert dm.delete_entries(dm.get_person_info('Ann'))
+    assert dm.compact()
+    assert not dm.storage.needs_compaction(0)
+    dm.close()
+
+    dm = DataManager(path)
+    assert dm.get_all_people() == []
+    dm.close()
+
+
+def journaled_csv(path):
+    """A CSV data file whose last changes are still only in its journal; returns the live entries"""
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1.5')
+    dm.compact()
+    for event in ('B', 'C', 'D'):
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    assert dm.delete_entries([entry for entry in dm.get_person_info('Ann') if entry['Event'] == 'A'])
+    entries = sorted((entry['Id'], entry['Event'], entry['Hours']) for entry in dm.get_person_info('Ann'))
+    dm.storage.close()
+    return entries
+
+
+def test_migrate_to_sqlite_applies_the_journal_and_keeps_ids(tmp_path):
+    entries = journaled_csv(str(tmp_path / 'data.csv'))
+    assert migrate_csv_to_sqlite(str(tmp_path / 'data.csv'), str(tmp_path / 'data.db')) == 3
+
+    dm = DataManager(str(tmp_path / 'data.db'))
+    assert sorted((entry['Id'], entry['Event'], entry['Hours']) for entry in dm.get_person_info('Ann')) == entries
+    dm.close()
+
+
+def test_migrate_to_partitions_applies_the_journal_and_keeps_ids(tmp_path):
+    entries = journaled_csv(str(tmp_path / 'data.csv'))
+    assert migrate_csv_to_partitions(str(tmp_path / 'data.csv'), str(tmp_path / 'parts')) == 3
+
+    dm = DataManager(str(tmp_path / 'parts'))
+    assert sorted((entry['Id'], entry['Event'], entry['Hours']) for entry in dm.get_person_info('Ann')) == entries
+    dm.close()
+
+
+def test_sqlite_query_reads_only_matching_rows_in_any_date_layout(tmp_path):
+    path = str(tmp_path / 'data.db')
+    # A database from before query(), with a date written in another layout
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE entries (Name TEXT, Location TEXT, Event TEXT, Hours TEXT, Timestamp TEXT)")
+    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                     [('Ann', 'Hall', 'A', '1', '03/05/2024 10:00'),
+                      ('Bob', 'Hall', 'B', '1', '2024-03-31 23:59:59')])
+    conn.commit()
+    conn.close()
+    dm = DataManager(path)
+    dm.add_entry('ANN', '2024-04-01 00:00:00', 'Hall', 'C', '1')
+    dm.storage.append(pd.DataFrame({'Name': ['ann'], 'Location': ['Hall'], 'Event': ['D'], 'Hours': ['1'],
+                                    'Timestamp': ['2024-03-20T08:00']}))
+    dm.close()
+
+    dm = DataManager(path)
+    assert [entry['Event'] for entry in dm.query(start='2024-03-01', end='2024-03-31')] == ['A', 'B', 'D']
+    assert [entry['Event'] for entry in dm.query('ann', start='2024-03-01', end='2024-04-30')] == ['A', 'C', 'D']
+    # Both indexes are there for the WHERE clause to use
+    plan = ' '.join(str(row) for row in dm.storage.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM entries WHERE Timestamp >= '2024-03-01' AND Timestamp < '2024-04-01'"))
+    assert 'idx_entries_timestamp' in plan
+    plan = ' '.join(str(row) for row in dm.storage.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM entries WHERE lower(Name) = 'ann'"))
+    assert 'idx_entries_name' in plan
+    assert dm._df is None
+    dm.close()
+
+
+def test_adding_entries_leaves_the_data_file_as_it_was(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1')
+    dm.compact()
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    dm.add_person_info('Ann', 'Hall', 'B', '1')
+    dm.add_person_info('Bob', 'Park', 'C', '2')
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    dm.storage.close()
+
+    dm = DataManager(path)
+    assert [entry['Event'] for entry in dm.get_all_entries()] == ['A', 'B', 'C']
+    dm.close()
+
+
+def test_sqlite_backend_keeps_entries_and_never_reuses_an_id(tmp_path):
+    path = str(tmp_path / 'data.sqlite')
+    dm = DataManager(path)
+    assert isinstance(dm.storage, SqliteStorage)
+    for event in 'ABC':
+        dm.add_entry('Ann', '2024-03-01 10:00:00', 'Hall', event, '1.5')
+    assert dm.delete_entries([entry for entry in dm.get_person_info('Ann') if entry['Event'] == 'C'])
+    dm.close()
+
+    dm = DataManager(path)
+    dm.add_entry('Bob', '2024-03-02 10:00:00', 'Park', 'D', '')
+    entries = dm.get_person_info('Ann') + dm.get_person_info('Bob')
+    assert [(entry['Id'], entry['Event']) for entry in entries] == [(1, 'A'), (2, 'B'), (4, 'D')]
+    assert entries[0]['Hours'] == 1.5 and pd.isna(entries[2]['Hours'])
+    assert entries[2]['Timestamp'] == pd.Timestamp('2024-03-02 10:00:00')
+    dm.close()
+
+
+def test_compaction_folds_journaled_changes_into_the_data_file(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    for event in 'ABC':
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    assert dm.delete_entries([entry for entry in dm.get_person_info('Ann') if entry['Event'] == 'B'])
+    assert dm.merge_people(['Ann'], 'Ann Lee')[0]
+    assert dm.storage.needs_compaction(0)
+    dm.storage.close()
+    # Replayed from the journal by the next reader
+    dm = DataManager(path)
+    assert [entry['Event'] for entry in dm.get_person_info('Ann Lee')] == ['A', 'C']
+
+    assert dm.compact()
+
+    assert not dm.storage.needs_compaction(0)
+    with open(dm.storage.journal_path) as f:
+        assert [json.loads(line)['op'] for line in f] == ['base']
+    stored = pd.read_csv(path)
+    assert stored[['Id', 'Name', 'Event']].values.tolist() == [[1, 'Ann Lee', 'A'], [3, 'Ann Lee', 'C']]
+    dm.close()
+
+
+def test_file_from_before_the_typed_schema_is_migrated_once(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('Name,Information,Timestamp,Location,Event,Hours\n'
+                    'Ann,,2025-03-04 23:44:07,Hall,A,2\n'
+                    'Ann,,2025-03-04 23:45:54,etg,erg,erg\n')
+
+    dm = DataManager(str(path))
+
+    assert [(entry['Id'], entry['Event'], entry['Hours']) for entry in dm.get_person_info('Ann')][0] == (1, 'A', 2.0)
+    assert pd.isna(dm.get_person_info('Ann')[1]['Hours'])
+    assert pd.read_csv(dm.quarantine_path)['Hours'].tolist() == ['erg']
+    assert path.read_text().splitlines()[0] == 'Id,Name,Location,Event,Hours,Timestamp'
+    dm.close()
+
+    dm = DataManager(str(path))
+    assert len(dm.get_person_info('Ann')) == 2
+    assert len(pd.read_csv(dm.quarantine_path)) == 1
+    dm.close()
+
+
+def test_snapshot_is_read_instead_of_the_csv_until_the_csv_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'A', '1.5')
+    dm.compact()
+    dm.add_person_info('Bob', 'Park', 'B', '')
+    expected = dm.storage.read()
+    dm.close()
+    assert os.path.exists(path + '.snapshot.npz')
+
+    storage = CsvStorage(path)
+    with monkeypatch.context() as patch:
+        patch.setattr(pd, 'read_csv', None)
+        pd.testing.assert_frame_equal(storage.read(), expected)
+    storage.close()
+
+    with open(path, 'a') as f:
+        f.write('9,Cy,Park,C,1,2024-01-01 10:00:00\n')
+    storage = CsvStorage(path)
+    assert storage.read()['Name'].tolist() == ['Ann', 'Bob', 'Cy']
+    storage.close()
+
+
+def test_kiosks_sharing_a_file_catch_up_on_each_others_changes(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    first = DataManager(path)
+    first.add_person_info('Ann', 'Hall', 'A', '1')
+    first.compact()
+    second = DataManager(path)
+    second.get_all_people()
+    events = []
+    second.subscribe(lambda kind, payload: events.append(kind))
+
+    first.add_person_info('Bob', 'Park', 'B', '1')
+    second.add_person_info('Cy', 'Park', 'C', '1')
+    assert first.get_all_people() == ['Ann', 'Bob', 'Cy']
+    assert first.delete_entries(first.get_person_info('Bob'))
+
+    assert second.get_all_people() == ['Ann', 'Cy']
+    # Replayed from the journal rather than read again
+    assert events == [ROWS_ADDED, PEOPLE_ADDED, ROWS_ADDED, PEOPLE_ADDED, ROWS_REMOVED, PEOPLE_REMOVED]
+    assert second.get_report() == [('Ann', 1.0, 1), ('Cy', 1.0, 1)]
+    # After another kiosk compacts, the file is read again
+    first.compact()
+    second.add_person_info('Dee', 'Park', 'D', '1')
+    assert events[-3:] == [RELOADED, ROWS_ADDED, PEOPLE_ADDED]
+    assert sorted(entry['Id'] for name in ('Ann', 'Cy', 'Dee') for entry in first.get_person_info(name)) == [1, 3, 4]
+    first.close()
+    second.close()
+
+
+def test_partitioned_query_reads_only_the_months_in_range(tmp_path, monkeypatch):
+    path = str(tmp_path / 'parts') + os.sep
+    dm = DataManager(path)
+    for month in ('01', '02', '03'):
+        dm.add_entry('Ann', f'2024-{month}-15 10:00:00', 'Hall', month, '1')
+    dm.add_entry('Ann', '', 'Hall', 'undated', '1')
+    moved = [entry['Id'] for entry in dm.get_person_info('Ann') if entry['Event'] == '01']
+    # A new date moves the entry to another month's file under the same id
+    assert dm.update_entries(moved, {'Timestamp': '2024-03-01 09:00:00'})[0]
+    dm.close()
+
+    read = []
+    original = CsvStorage.read
+    monkeypatch.setattr(CsvStorage, 'read', lambda self: read.append(os.path.relpath(self.file_path, path))
+                        or original(self))
+    dm = DataManager(path)
+    entries = dm.query(start='2024-03-01', end='2024-03-31')
+    assert [(entry['Event'], entry['Timestamp']) for entry in entries] == [
+        ('01', pd.Timestamp('2024-03-01 09:00:00')), ('03', pd.Timestamp('2024-03-15 10:00:00'))]
+    assert read == [os.path.join('2024', '03.csv')]
+    assert dm._df is None
+    assert [entry['Id'] for entry in dm.get_person_info('Ann') if entry['Event'] == '01'] == moved
+    dm.close()
+
+
+def test_ids_of_deleted_entries_are_not_handed_out_again_after_compaction(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    dm = DataManager(path)
+    for event in 'ABC':
+        dm.add_person_info('Ann', 'Hall', event, '1')
+    assert dm.delete_entries([entry for entry in dm.get_person_info('Ann') if entry['Event'] != 'A'])
+    dm.compact()
+    dm.close()
+
+    dm = DataManager(path)
+    dm.add_person_info('Ann', 'Hall', 'D', '1')
+    assert [(entry['Id'], entry['Event']) for entry in dm.get_person_info('Ann')] == [(1, 'A'), (4, 'D')]
+    dm.close()
@@ -1,3 +1,53 @@
+import csv
+import os
+import re
+
+# Words of free text for searching: runs of letters and digits
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def data_file_path(file_path=None):
+    """Return the data file to use: the one given, else ZF_DATA_FILE, else personal_data.csv"""
+    return file_path or os.environ.get("ZF_DATA_FILE", "personal_data.csv")
+
+
+def read_names(file_path):
+    """Quickly list the distinct names in a CSV data file, without pandas
+
+    Meant for showing the people list while the full table loads. Names are
+    compared case-insensitively, the first spelling is kept, and the result is
+    sorted the way DataManager.get_all_people sorts. Changes still in the
+    journal are not included. Returns [] for a missing or non-CSV file.
+    """
+    names = {}
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if 'Name' not in header:
+                return []
+            column = header.index('Name')
+            for row in reader:
+                if len(row) > column:
+                    name = row[column].strip()
+                    if name:
+                        names.setdefault(name.lower(), name)
+    except (OSError, csv.Error):
+        return []
+    return [names[key] for key in sorted(names)]
+
+
+def search_words(text):
+    """Split text into case-folded words for search; missing values have none"""
+    return WORD_PATTERN.findall(text.casefold()) if isinstance(text, str) else []
+
+
+def matches_words(terms, texts):
+    """Whether every term starts some word of the texts"""
+    words = [word for text in texts for word in search_words(text)]
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
 def validate_input(text):
     """
     Validate user input to ensure it meets basic requirements